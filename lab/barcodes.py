@@ -0,0 +1,89 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import re
+import json
+from functools import lru_cache
+
+# django imports
+from django.conf import settings
+
+
+class Code128(object):
+    """Code 128 encoder switching from code set B for the leading character to code set C for the digits."""
+    def __init__(self, path):
+        with open(os.path.join(path, '128B.json')) as json_file:
+            table_b = json.load(json_file)
+        with open(os.path.join(path, '128C.json')) as json_file:
+            table_c = json.load(json_file)
+        self.pattern_b = {key: str(item['Pattern']) for key, item in table_b.items()}
+        self.value_b = {key: item['Value'] for key, item in table_b.items()}
+        self.pattern_c = {key: str(item['Pattern']) for key, item in table_c.items()}
+        self.value_c = {key: item['Value'] for key, item in table_c.items()}
+        # patterns of code set B by value for the check symbol
+        self.pattern_by_value = [None] * (max(self.value_b.values()) + 1)
+        for key, value in self.value_b.items():
+            self.pattern_by_value[value] = self.pattern_b[key]
+        self.start = self.pattern_b['Start Code B']
+        self.start_value = self.value_b['Start Code B']
+        self.stop = self.pattern_b['Stop'] + '11'
+
+    def encode(self, data):
+        """Encode an identifier like "R000123" to its module pattern.
+
+            :param data: identifier, one character followed by an even number of digits
+            :type data: str
+
+            :returns: modules, "1" for black and "0" for white
+            :rtype: str
+        """
+        numbers = [data[i:i + 2] for i in range(1, len(data), 2)]
+        pattern = [self.start, self.pattern_b[data[0]], self.pattern_b['Code C']]
+        value = self.start_value + self.value_b[data[0]] + 2 * self.value_b['Code C']
+        for weight, number in enumerate(numbers, 3):
+            pattern.append(self.pattern_c[number])
+            value += weight * self.value_c[number]
+        # check symbol (remainder mod 103) and stop symbol
+        pattern.append(self.pattern_by_value[value % 103])
+        pattern.append(self.stop)
+        return ''.join(pattern)
+
+
+@lru_cache(maxsize=None)
+def encoder():
+    """Return the Code 128 encoder, the code tables are read once per process.
+
+        :returns: encoder
+        :rtype: Code128
+    """
+    return Code128(settings.FILES_DIR)
+
+
+def bars(pattern):
+    """Merge adjacent black modules of a pattern into bars.
+
+        :param pattern: modules, "1" for black and "0" for white
+        :type pattern: str
+
+        :returns: (first module, number of modules) per bar
+        :rtype: list
+    """
+    return [(match.start(), match.end() - match.start()) for match in re.finditer('1+', pattern)]
@@ -0,0 +1,327 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import hmac
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from passlib.hash import argon2
+
+# django imports
+from django.conf import settings
+from django.core.cache import cache
+
+# app imports
+import lab.custom as custom
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Argon2Algorithm(object):
+    """Salted argon2 checksums, the original checksum format."""
+    name = 'argon2'
+    prefix = '$argon2'
+    # verification costs milliseconds and is worth spreading over processes
+    slow = True
+
+    def generate(self, to_hash):
+        return custom.generate_checksum(to_hash=to_hash)
+
+    def verify(self, to_verify, checksum):
+        return argon2.verify(to_verify, checksum)
+
+
+class HMACAlgorithm(object):
+    """HMAC-SHA256 checksums keyed with the secret."""
+    name = 'hmac-sha256'
+    prefix = '$hmac-sha256$v=1$'
+    slow = False
+
+    def generate(self, to_hash):
+        if not isinstance(to_hash, str):
+            raise TypeError('Argument "to_hash" expects type str.')
+        mac = hmac.new(str(settings.SECRET).encode(), to_hash.encode(), hashlib.sha256)
+        return '{}{}'.format(self.prefix, mac.hexdigest())
+
+    def verify(self, to_verify, checksum):
+        return hmac.compare_digest(self.generate(to_hash=to_verify), checksum)
+
+
+# registered algorithms, checksums are dispatched on their prefix
+ALGORITHMS = {
+    Argon2Algorithm.name: Argon2Algorithm(),
+    HMACAlgorithm.name: HMACAlgorithm(),
+}
+
+
+def algorithm(checksum=None):
+    """Return the algorithm a checksum has been generated with, or the configured one for new checksums.
+
+        :param checksum: stored checksum
+        :type checksum: str
+
+        :returns: checksum algorithm
+        :rtype: Argon2Algorithm, HMACAlgorithm
+    """
+    if checksum is None:
+        return ALGORITHMS[settings.CHECKSUM_ALGORITHM]
+    for _algorithm in ALGORITHMS.values():
+        if checksum.startswith(_algorithm.prefix):
+            return _algorithm
+    raise ValueError('Checksum algorithm unknown.')
+
+
+def generate(to_hash):
+    """Generate a checksum with the configured algorithm.
+
+        :param to_hash: string including the secret
+        :type to_hash: str
+
+        :returns: checksum
+        :rtype: str
+    """
+    return algorithm().generate(to_hash=to_hash)
+
+
+def verify(to_verify, checksum):
+    """Verify one checksum against the string it was generated for.
+
+        :param to_verify: string including the secret
+        :type to_verify: str
+        :param checksum: stored checksum
+        :type checksum: str
+
+        :returns: flag
+        :rtype: bool
+    """
+    try:
+        return algorithm(checksum).verify(to_verify, checksum)
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+def _verify_pair(pair):
+    # module level function, pickled to the worker processes
+    return verify(*pair)
+
+
+def _generate(to_hash):
+    # module level function, pickled to the worker processes
+    return generate(to_hash=to_hash)
+
+
+class SerialEngine(object):
+    """Verification engine hashing all checksums in the calling process."""
+    def __init__(self, workers=0):
+        self.workers = workers
+
+    def verify_many(self, pairs):
+        """Verify a batch of checksums.
+
+            :param pairs: (to_verify, checksum) tuples
+            :type pairs: list
+
+            :returns: flags in the order of the passed pairs
+            :rtype: list
+        """
+        return [verify(to_verify, checksum) for to_verify, checksum in pairs]
+
+    def generate_many(self, to_hash):
+        """Generate a batch of checksums with the configured algorithm.
+
+            :param to_hash: strings including the secret
+            :type to_hash: list
+
+            :returns: checksums in the order of the passed strings
+            :rtype: list
+        """
+        return [generate(to_hash=item) for item in to_hash]
+
+
+class ProcessEngine(SerialEngine):
+    """Verification engine spreading a batch of checksums over a process pool."""
+    # below this batch size the pool overhead is bigger than the gain
+    threshold = 20
+
+    def __init__(self, workers=0):
+        super().__init__(workers=workers or os.cpu_count())
+        self._executor = None
+
+    @property
+    def executor(self):
+        # create the pool lazily, so every gunicorn worker owns its pool after forking
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def verify_many(self, pairs):
+        # fast checksums are cheaper to verify than to send to a worker
+        slow = 0
+        for to_verify, checksum in pairs:
+            try:
+                slow += algorithm(checksum).slow
+            except (ValueError, AttributeError):
+                pass
+        if slow < self.threshold:
+            return super().verify_many(pairs)
+        chunk_size = max(1, len(pairs) // (self.workers * 4))
+        try:
+            return list(self.executor.map(_verify_pair, pairs, chunksize=chunk_size))
+        except BrokenProcessPool:
+            # log entry and fall back to serial verification with a fresh pool for the next batch
+            log.warning('Checksum process pool broke down. Verifying batch of {} serial.'.format(len(pairs)))
+            self._executor = None
+            return super().verify_many(pairs)
+
+    def generate_many(self, to_hash):
+        if not algorithm().slow or len(to_hash) < self.threshold:
+            return super().generate_many(to_hash)
+        chunk_size = max(1, len(to_hash) // (self.workers * 4))
+        try:
+            return list(self.executor.map(_generate, to_hash, chunksize=chunk_size))
+        except BrokenProcessPool:
+            log.warning('Checksum process pool broke down. Generating batch of {} serial.'.format(len(to_hash)))
+            self._executor = None
+            return super().generate_many(to_hash)
+
+
+ENGINES = {
+    'serial': SerialEngine,
+    'process': ProcessEngine,
+}
+
+_engine = None
+
+
+def engine():
+    """Return the verification engine configured in the settings.
+
+        :returns: verification engine
+        :rtype: SerialEngine
+    """
+    global _engine
+    if _engine is None:
+        _engine = ENGINES[settings.CHECKSUM_ENGINE](workers=settings.CHECKSUM_WORKERS)
+    return _engine
+
+
+def digest(to_verify, checksum):
+    """Digest of the verified string and its checksum, used as proof of a successful verification.
+
+        :param to_verify: string including the secret
+        :type to_verify: str
+        :param checksum: stored checksum
+        :type checksum: str
+
+        :returns: hex digest
+        :rtype: str
+    """
+    return hashlib.sha256('{}{}'.format(to_verify, checksum).encode()).hexdigest()
+
+
+def cache_key(table, unique):
+    return 'checksum:{}:{}'.format(table, unique)
+
+
+def verify_rows(table, items):
+    """Verify table rows, skipping rows verified before with unchanged data and checksum.
+
+        :param table: database table name
+        :type table: str
+        :param items: (id, to_verify, checksum) tuples
+        :type items: list
+
+        :returns: row id as key and success flag as value
+        :rtype: dict
+    """
+    keys = [cache_key(table, unique) for unique, to_verify, checksum in items]
+    cached = cache.get_many(keys)
+    _return = dict()
+    pending = list()
+    for key, item in zip(keys, items):
+        unique, to_verify, checksum = item
+        _digest = digest(to_verify=to_verify, checksum=checksum)
+        # the digest covers data, secret and checksum, tampered rows never match
+        if cached.get(key) == _digest:
+            _return[unique] = True
+        else:
+            pending.append((key, unique, _digest, to_verify, checksum))
+    if pending:
+        pending = swept(table=table, pending=pending, results=_return)
+    if pending:
+        results = engine().verify_many([(to_verify, checksum) for key, unique, _digest, to_verify, checksum
+                                        in pending])
+        to_cache = dict()
+        for item, result in zip(pending, results):
+            key, unique, _digest = item[:3]
+            _return[unique] = result
+            if result:
+                to_cache[key] = _digest
+        cache.set_many(to_cache, timeout=settings.CHECKSUM_CACHE_TIMEOUT)
+    return _return
+
+
+def swept(table, pending, results):
+    """Take over results of the integrity sweeper for rows unchanged since the sweep.
+
+        :param table: database table name
+        :type table: str
+        :param pending: (key, id, digest, to_verify, checksum) tuples not found in the cache
+        :type pending: list
+        :param results: row id as key and success flag as value, updated in place
+        :type results: dict
+
+        :returns: tuples still to verify
+        :rtype: list
+    """
+    # import here, the sweeper results are stored in the app models
+    import lab.models as models
+    sweeps = dict()
+    for id_ref, _digest, valid in models.Integrity.objects.filter(
+            table=table, id_ref__in=[item[1] for item in pending]).values_list('id_ref', 'digest', 'valid'):
+        sweeps[id_ref] = (_digest, valid)
+    _return = list()
+    to_cache = dict()
+    for item in pending:
+        key, unique, _digest = item[:3]
+        sweep = sweeps.get(unique)
+        if sweep and sweep[0] == _digest:
+            results[unique] = sweep[1]
+            if sweep[1]:
+                to_cache[key] = _digest
+        else:
+            _return.append(item)
+    if to_cache:
+        cache.set_many(to_cache, timeout=settings.CHECKSUM_CACHE_TIMEOUT)
+    return _return
+
+
+def forget(table, uniques):
+    """Invalidate cached verification results of rewritten rows.
+
+        :param table: database table name
+        :type table: str
+        :param uniques: row ids
+        :type uniques: list
+    """
+    cache.delete_many([cache_key(table, unique) for unique in uniques])
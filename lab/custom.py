@@ -18,7 +18,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 # python imports
+import types
 import datetime
+from collections import namedtuple
+from functools import lru_cache
 from passlib.hash import argon2
 
 
@@ -374,6 +377,58 @@ def determine_box_position(alignment, x, y, value):
     return '{}{}'.format(first, second)
 
 
+@lru_cache(maxsize=None)
+def box_positions(alignment, x, y):
+    """Determine all positions of a box layout in filling order, cached per layout.
+
+    :param alignment: box alignment
+    :type alignment: str
+    :param x: max column
+    :type x: str
+    :param y: max row
+    :type y: str
+
+    :return: box positions as strings
+    :rtype: tuple
+    """
+    _max = transform_box_type_figures(x) * transform_box_type_figures(y)
+    return tuple(determine_box_position(alignment=alignment, x=x, y=y, value=value + 1) for value in range(_max))
+
+
+class BoxLayout(namedtuple('BoxLayout', ['alignment', 'columns', 'rows', 'positions', 'indices'])):
+    """Immutable layout of a box type with grid dimensions, positions in filling order and position indices."""
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return len(self.positions)
+
+    def index_of(self, position):
+        """Index of a position in filling order, None if the position is not part of the layout."""
+        return self.indices.get(position)
+
+
+@lru_cache(maxsize=None)
+def box_layout(alignment, x, y):
+    """Determine the layout of a box type, cached per layout.
+
+    :param alignment: box alignment
+    :type alignment: str
+    :param x: max column
+    :type x: str
+    :param y: max row
+    :type y: str
+
+    :return: box layout
+    :rtype: BoxLayout
+    """
+    positions = box_positions(alignment=alignment, x=x, y=y)
+    return BoxLayout(alignment=alignment, columns=transform_box_type_figures(x), rows=transform_box_type_figures(y),
+                     positions=positions,
+                     # read only, the layout is shared by all callers
+                     indices=types.MappingProxyType({position: index for index, position in enumerate(positions)}))
+
+
 def value_to_bool(value):
     """Converts 0/1 values to bool
 
@@ -22,7 +22,7 @@ from functools import wraps
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseBadRequest
 # app imports
-from lab.models import EXPORT_PERMISSIONS
+from lab.models import EXPORT_PERMISSIONS, IMPORT_PERMISSIONS
 
 
 def permission(*perms):
@@ -57,3 +57,14 @@ def export_permission(view_func):
             return view_func(request, *args, **kwargs)
         raise PermissionDenied
     return wrapper
+
+
+def import_permission(view_func):
+    """Decorator to validate permissions for import"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        perm = IMPORT_PERMISSIONS.get(kwargs['dialog'])
+        if perm and request.user.permission(perm):
+            return view_func(request, *args, **kwargs)
+        raise PermissionDenied
+    return wrapper
@@ -23,6 +23,7 @@ import string
 
 # django imports
 from django import forms
+from django.forms.models import ModelChoiceIterator
 from django.core.exceptions import ValidationError
 from django.contrib.auth import authenticate
 from lab.models import UNIQUE_LENGTH, GENERATED_LENGTH, TIMES, \
@@ -41,6 +42,40 @@ log = logging.getLogger(__name__)
 COLOR_MANDATORY = '#FA5858'
 
 
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for record in self.field.records:
+            yield self.choice(record)
+
+    def __len__(self):
+        return len(self.field.records) + (self.field.empty_label is not None)
+
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """Model choice field of a reference table, choices and cleaning are served by the reference data cache."""
+    iterator = ReferenceChoiceIterator
+
+    def __init__(self, queryset, key=None, **kwargs):
+        # sort key of the choices, records are cached in the order of their id
+        self.key = key
+        super().__init__(queryset, **kwargs)
+
+    @property
+    def records(self):
+        _return = self.queryset.model.objects.cached
+        return sorted(_return, key=self.key) if self.key else _return
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        for record in self.records:
+            if str(record.pk) == str(value):
+                return record
+        raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
 def validate_unique_condition(value):
     if models.Conditions.objects.exist(value):
         raise ValidationError('Record already exists.')
@@ -195,9 +230,9 @@ class UsersFormNew(forms.Form):
                                    widget=forms.CheckboxInput(attrs={'class': 'form-control',
                                                                      'style': 'align: left'}),
                                    help_text='Select the active status.')
-    role = forms.ModelChoiceField(label='role', queryset=Roles.objects.all(), empty_label=None,
-                                  widget=forms.Select(attrs={'class': 'form-control'}),
-                                  help_text='Select a role.')
+    role = ReferenceChoiceField(label='role', queryset=Roles.objects.all(), empty_label=None,
+                                widget=forms.Select(attrs={'class': 'form-control'}),
+                                help_text='Select a role.')
 
     def clean(self):
         cleaned_data = super(UsersFormNew, self).clean()
@@ -219,9 +254,9 @@ class UsersFormEdit(forms.Form):
                                 widget=forms.TextInput(attrs={'class': 'form-control'}),
                                 help_text='Enter your last name.',
                                 validators=[validate_no_specials])
-    role = forms.ModelChoiceField(label='role', queryset=Roles.objects.all(), empty_label=None,
-                                  widget=forms.Select(attrs={'class': 'form-control'}),
-                                  help_text='Select a role.')
+    role = ReferenceChoiceField(label='role', queryset=Roles.objects.all(), empty_label=None,
+                                widget=forms.Select(attrs={'class': 'form-control'}),
+                                help_text='Select a role.')
 
 
 # locations
@@ -229,9 +264,9 @@ class LocationsFormNew(forms.Form):
     name = forms.CharField(label='name', max_length=UNIQUE_LENGTH,
                            widget=forms.TextInput(attrs={'class': 'form-control'}), required=False,
                            help_text='Enter a location name.')
-    condition = forms.ModelChoiceField(label='condition', queryset=Conditions.objects.all(), empty_label=None,
-                                       widget=forms.Select(attrs={'class': 'form-control'}),
-                                       help_text='Select a condition.')
+    condition = ReferenceChoiceField(label='condition', queryset=Conditions.objects.all(), empty_label=None,
+                                     widget=forms.Select(attrs={'class': 'form-control'}),
+                                     help_text='Select a condition.')
     max_boxes = forms.IntegerField(label='max boxes', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                    help_text='Enter an appropriate value for maximum box capacity.',
                                    validators=[validate_positive_number], required=False)
@@ -242,9 +277,9 @@ class LocationsFormEdit(forms.Form):
                                widget=forms.TextInput(attrs={'class': 'form-control', 'disabled': True}))
     name = forms.CharField(label='name', max_length=UNIQUE_LENGTH, help_text='Enter a location name.',
                            widget=forms.TextInput(attrs={'class': 'form-control'}), required=False)
-    condition = forms.ModelChoiceField(label='condition', queryset=Conditions.objects.all(), empty_label=None,
-                                       widget=forms.Select(attrs={'class': 'form-control'}),
-                                       help_text='Select a condition.')
+    condition = ReferenceChoiceField(label='condition', queryset=Conditions.objects.all(), empty_label=None,
+                                     widget=forms.Select(attrs={'class': 'form-control'}),
+                                     help_text='Select a condition.')
     max_boxes = forms.IntegerField(label='max boxes', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                    help_text='Enter an appropriate value for maximum box capacity.',
                                    validators=[validate_positive_number], required=False)
@@ -265,12 +300,12 @@ class TypesFormNew(forms.Form):
     affiliation = forms.CharField(label='affiliation', max_length=UNIQUE_LENGTH, help_text='Select an affiliation.',
                                   widget=forms.Select(choices=models.AFFILIATIONS,
                                                       attrs={'class': 'form-control manual'}))
-    storage_condition = forms.ModelChoiceField(label='storage condition', queryset=Conditions.objects.all(),
-                                               widget=forms.Select(attrs={'class': 'form-control'}), empty_label=None,
-                                               help_text='Select a storage condition.')
-    usage_condition = forms.ModelChoiceField(label='usage condition', queryset=Conditions.objects.all(), required=False,
-                                             widget=forms.Select(attrs={'class': 'form-control'}), empty_label='',
-                                             help_text='Select a usage condition. Optional for reagents.')
+    storage_condition = ReferenceChoiceField(label='storage condition', queryset=Conditions.objects.all(),
+                                             widget=forms.Select(attrs={'class': 'form-control'}), empty_label=None,
+                                             help_text='Select a storage condition.')
+    usage_condition = ReferenceChoiceField(label='usage condition', queryset=Conditions.objects.all(), required=False,
+                                           widget=forms.Select(attrs={'class': 'form-control'}), empty_label='',
+                                           help_text='Select a usage condition. Optional for reagents.')
 
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop('request', None)
@@ -299,12 +334,15 @@ class TypesFormEdit(TypesFormNew):
 class BoxesFormNew(forms.Form):
     name = forms.CharField(label='name', max_length=UNIQUE_LENGTH, help_text='Enter a box name.',
                            widget=forms.TextInput(attrs={'class': 'form-control'}), required=False)
-    box_type = forms.ModelChoiceField(label='box type', queryset=BoxTypes.objects.order_by('-default', 'id'),
-                                      empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
-                                      help_text='Select a box type.')
-    type = forms.ModelChoiceField(label='type', queryset=Types.objects.all(), empty_label='',
-                                  widget=forms.Select(attrs={'class': 'form-control'}), required=False,
-                                  help_text='Select a type. This field is optional.')
+    box_type = ReferenceChoiceField(label='box type', queryset=BoxTypes.objects.all(), key=lambda x: not x.default,
+                                    empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
+                                    help_text='Select a box type.')
+    type = ReferenceChoiceField(label='type', queryset=Types.objects.all(), empty_label='',
+                                widget=forms.Select(attrs={'class': 'form-control'}), required=False,
+                                help_text='Select a type. This field is optional.')
+    amount = forms.IntegerField(label='amount', min_value=1, max_value=100, initial=1, required=False,
+                                widget=forms.NumberInput(attrs={'class': 'form-control'}),
+                                help_text='Enter the number of boxes to create.')
 
 
 class BoxesFormEdit(forms.Form):
@@ -313,12 +351,12 @@ class BoxesFormEdit(forms.Form):
                                                         'disabled': True}))
     name = forms.CharField(label='name', max_length=UNIQUE_LENGTH, help_text='Enter a box name.',
                            widget=forms.TextInput(attrs={'class': 'form-control'}), required=False)
-    box_type = forms.ModelChoiceField(label='box type', queryset=BoxTypes.objects.all(), empty_label=None,
-                                      widget=forms.Select(attrs={'class': 'form-control',
-                                                                 'disabled': True}))
-    type = forms.ModelChoiceField(label='type', queryset=Types.objects.all(), empty_label='',
-                                  widget=forms.Select(attrs={'class': 'form-control'}), required=False,
-                                  help_text='Select a type. This field is optional.')
+    box_type = ReferenceChoiceField(label='box type', queryset=BoxTypes.objects.all(), empty_label=None,
+                                    widget=forms.Select(attrs={'class': 'form-control',
+                                                               'disabled': True}))
+    type = ReferenceChoiceField(label='type', queryset=Types.objects.all(), empty_label='',
+                                widget=forms.Select(attrs={'class': 'form-control'}), required=False,
+                                help_text='Select a type. This field is optional.')
 
 
 ###################
@@ -332,9 +370,9 @@ class TypeAttributesFormNew(forms.Form):
                              validators=[validate_unique_type_attributes,
                                          validation_no_space,
                                          validate_no_specials])
-    type = forms.ModelChoiceField(label='type', queryset=Types.objects.all(), empty_label=None,
-                                  widget=forms.Select(attrs={'class': 'form-control'}),
-                                  help_text='Select a type.')
+    type = ReferenceChoiceField(label='type', queryset=Types.objects.all(), empty_label=None,
+                                widget=forms.Select(attrs={'class': 'form-control'}),
+                                help_text='Select a type.')
     list_values = forms.CharField(label='list values', max_length=DEFAULT, required=False,
                                   help_text='Enter values separated by commas to generate a selectable drop down '
                                             'list. This field is optional.',
@@ -359,8 +397,8 @@ class TypeAttributesFormNew(forms.Form):
 class TypeAttributesFormEdit(TypeAttributesFormNew):
     column = forms.CharField(label='column', max_length=UNIQUE_LENGTH,
                              widget=forms.TextInput(attrs={'class': 'form-control', 'disabled': True}))
-    type = forms.ModelChoiceField(label='type', queryset=Types.objects.all(), empty_label=None,
-                                  widget=forms.Select(attrs={'class': 'form-control', 'disabled': True}))
+    type = ReferenceChoiceField(label='type', queryset=Types.objects.all(), empty_label=None,
+                                widget=forms.Select(attrs={'class': 'form-control', 'disabled': True}))
 
 
 #############
@@ -436,6 +474,9 @@ class SamplesFormEdit(forms.Form):
 class ReagentsFormNew(forms.Form):
     name = forms.CharField(label='name', max_length=UNIQUE_LENGTH, help_text='Enter a reagent name.',
                            widget=forms.TextInput(attrs={'class': 'form-control'}), required=False)
+    amount = forms.IntegerField(label='amount', min_value=1, max_value=100, initial=1, required=False,
+                                widget=forms.NumberInput(attrs={'class': 'form-control'}),
+                                help_text='Enter the number of reagents to create.')
 
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop('request', None)
@@ -444,7 +485,7 @@ class ReagentsFormNew(forms.Form):
 
     def clean(self):
         # TODO #61
-        for row in models.TypeAttributes.objects.filter(type=self.type).order_by('id'):
+        for row in models.TypeAttributes.objects.attributes(type=self.type):
             if row.mandatory:
                 if not self.request.POST.get(row.column):
                     raise forms.ValidationError('Field "{}" is mandatory.'.format(row.column))
@@ -463,7 +504,7 @@ class ReagentsFormEdit(forms.Form):
 
     def clean(self):
         # TODO #61
-        for row in models.TypeAttributes.objects.filter(type=self.type).order_by('id'):
+        for row in models.TypeAttributes.objects.attributes(type=self.type):
             if row.mandatory:
                 if not self.request.POST.get(row.column):
                     raise forms.ValidationError('Field "{}" is mandatory.'.format(row.column))
@@ -479,11 +520,17 @@ class MovementsForm(forms.Form):
     new_location = forms.ModelChoiceField(label='target location', queryset=Locations.objects.all(), empty_label=None,
                                           widget=forms.Select(attrs={'class': 'form-control'}),
                                           help_text='Select the target location.')
+    more_boxes = forms.CharField(label='further boxes', max_length=DEFAULT, required=False,
+                                 widget=forms.TextInput(attrs={'class': 'form-control'}),
+                                 help_text='Scan further boxes to move along, separated by spaces.')
 
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop('request', None)
         super(MovementsForm, self).__init__(*args, **kwargs)
 
+    def clean_more_boxes(self):
+        return [box[:7] for box in self.cleaned_data['more_boxes'].split()]
+
     def clean(self):
         cleaned_data = super(MovementsForm, self).clean()
         actual_location = str(cleaned_data.get('actual_location'))[:7]
@@ -491,11 +538,16 @@ class MovementsForm(forms.Form):
         unique = self.request.POST.get('unique')
         if actual_location == new_location:
             raise forms.ValidationError('Actual location is equal to new location.')
+        more_boxes = cleaned_data.get('more_boxes') or list()
+        existing = set(models.Boxes.objects.filter(box__in=more_boxes).values_list('box', flat=True))
+        invalid = [box for box in more_boxes if box[:1] != 'B' or box not in existing]
+        if invalid:
+            raise forms.ValidationError('Further boxes {} are not existing boxes.'.format(', '.join(invalid)))
         if unique[:1] == 'B':
-            boxed_objects = models.Overview.objects.filter(box=unique[:7])
-            for obj in boxed_objects:
-                if models.Locations.objects.condition(new_location) != models.Reagents.objects.condition(obj):
-                    raise forms.ValidationError('Target location has no suitable condition for {}.'.format(obj))
+            boxes = [unique[:7]] + more_boxes
+            unsuitable = models.Overview.objects.unsuitable(boxes=boxes, location=new_location)
+            if unsuitable:
+                raise forms.ValidationError('Target location has no suitable condition for {}.'.format(unsuitable[0]))
 
 
 class BoxingForm(forms.Form):
@@ -515,7 +567,7 @@ class BoxingForm(forms.Form):
         new_box = str(cleaned_data.get('new_box'))[:7]
         unique = self.request.POST.get('unique')
         if new_box != 'None':
-            if models.RTD.objects.validate_location(box=new_box, sample=unique):
+            if models.Overview.objects.location(unique=new_box) != models.Overview.objects.location(unique=unique):
                 raise forms.ValidationError('Sample and box must be in the same location.')
             if actual_box == new_box:
                 raise forms.ValidationError('Actual box is equal to new box.')
@@ -539,6 +591,13 @@ class OverviewBoxingForm(forms.Form):
                 raise ValidationError('No free position available.')
             if cleaned_data.get('box') != self.request.POST.get('target_box'):
                 raise ValidationError('Scanned box must match target box.')
+            if models.Boxes.objects.exist(cleaned_data.get('box')) and models.Boxes.objects.layout(
+                    cleaned_data.get('box')).index_of(self.request.POST.get('target_position')) is None:
+                raise ValidationError('Target position is not part of the box.')
+            holder = models.Reservations.objects.holder(box=cleaned_data.get('box'),
+                                                        position=self.request.POST.get('target_position'))
+            if holder not in (None, self.request.POST.get('unique')):
+                raise ValidationError('Target position is reserved for "{}".'.format(holder))
 
 
 class PasswordForm(forms.Form):
@@ -617,17 +676,17 @@ class FreezeTHawAccountsFormNew(forms.Form):
     account = forms.CharField(label='account', max_length=40, help_text='Enter an account name.',
                               widget=forms.TextInput(attrs={'class': 'form-control'}),
                               validators=[validate_unique_freeze_thaw_accounts])
-    freeze_condition = forms.ModelChoiceField(label='freeze condition', queryset=Conditions.objects.all(),
-                                              empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
-                                              help_text='Select a freeze condition.')
+    freeze_condition = ReferenceChoiceField(label='freeze condition', queryset=Conditions.objects.all(),
+                                            empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
+                                            help_text='Select a freeze condition.')
     freeze_time = forms.IntegerField(label='freeze time', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                      help_text='Enter a freeze time.')
     freeze_uom = forms.CharField(label='freeze uom', max_length=GENERATED_LENGTH,
                                  widget=forms.Select(choices=TIMES, attrs={'class': 'form-control manual'}),
                                  help_text='Select freeze time unit of measurement.')
-    thaw_condition = forms.ModelChoiceField(label='thaw condition', queryset=Conditions.objects.all(), empty_label=None,
-                                            widget=forms.Select(attrs={'class': 'form-control'}),
-                                            help_text='Select a thaw condition.')
+    thaw_condition = ReferenceChoiceField(label='thaw condition', queryset=Conditions.objects.all(), empty_label=None,
+                                          widget=forms.Select(attrs={'class': 'form-control'}),
+                                          help_text='Select a thaw condition.')
     thaw_time = forms.IntegerField(label='thaw time', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                    help_text='Enter a thaw time.')
     thaw_uom = forms.CharField(label='thaw uom', max_length=GENERATED_LENGTH,
@@ -641,17 +700,17 @@ class FreezeThawAccountsFormEdit(forms.Form):
     account = forms.CharField(label='account', max_length=40,
                               widget=forms.TextInput(attrs={'class': 'form-control',
                                                             'disabled': True}))
-    freeze_condition = forms.ModelChoiceField(label='freeze condition', queryset=Conditions.objects.all(),
-                                              empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
-                                              help_text='Select a freeze condition.')
+    freeze_condition = ReferenceChoiceField(label='freeze condition', queryset=Conditions.objects.all(),
+                                            empty_label=None, widget=forms.Select(attrs={'class': 'form-control'}),
+                                            help_text='Select a freeze condition.')
     freeze_time = forms.IntegerField(label='freeze time', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                      help_text='Enter a freeze time.')
     freeze_uom = forms.CharField(label='freeze uom', max_length=GENERATED_LENGTH,
                                  widget=forms.Select(choices=TIMES, attrs={'class': 'form-control manual'}),
                                  help_text='Select freeze time unit of measurement.')
-    thaw_condition = forms.ModelChoiceField(label='thaw condition', queryset=Conditions.objects.all(), empty_label=None,
-                                            widget=forms.Select(attrs={'class': 'form-control'}),
-                                            help_text='Select a thaw condition.')
+    thaw_condition = ReferenceChoiceField(label='thaw condition', queryset=Conditions.objects.all(), empty_label=None,
+                                          widget=forms.Select(attrs={'class': 'form-control'}),
+                                          help_text='Select a thaw condition.')
     thaw_time = forms.IntegerField(label='thaw time', widget=forms.NumberInput(attrs={'class': 'form-control'}),
                                    help_text='Enter a thaw time.')
     thaw_uom = forms.CharField(label='thaw uom', max_length=GENERATED_LENGTH,
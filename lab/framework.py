@@ -18,23 +18,31 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 # python imports
+import io
 import os
 import json
 import logging
 import svgwrite
+import itertools
 import datetime
-from passlib.hash import argon2
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPDF
+from reportlab.pdfgen import canvas
 
 
 # django imports
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import F, Q, Case, When, Value, CharField
+from django.urls import reverse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django.conf import settings
 
 # app imports
 import lab.models as models
 import lab.custom as custom
+import lab.barcodes as barcodes
+import lab.label_store as label_store
+import lab.checksums as checksums
 
 # define logger
 log = logging.getLogger(__name__)
@@ -44,14 +52,14 @@ SECRET = settings.SECRET
 
 
 class Labels(object):
+    # most labels rendered into one PDF file
+    batch_size = 500
+
     def __init__(self):
         self.dpi = 600
         self.margin = self.pixel(4)  # 3 mm margin top/bottom/left/right
         self.width = self.pixel(62)  # 62 mm width
         self.height = self.pixel(29)  # 29 mm height
-        self.json_b = self._get_json_b
-        self.json_c = self._get_json_c
-        self.json_inv_b = self._get_json_inv_b
         self._bar = 8
         self._code = str()
         self._font_size = '140px'
@@ -64,45 +72,9 @@ class Labels(object):
     def pixel(self, value):
         return round((self.dpi * value) / 25.4)
 
-    @property
-    def _get_json_b(self):
-        with open(settings.FILES_DIR + '/128B.json') as json_file:
-            return json.load(json_file)
-
-    @property
-    def _get_json_c(self):
-        with open(settings.FILES_DIR + '/128C.json') as json_file:
-            return json.load(json_file)
-
-    @property
-    def _get_json_inv_b(self):
-        _return = dict()
-        for x in self.json_b:
-            _return[self.json_b[x]["Value"]] = {"Character": x, "Pattern": self.json_b[x]["Pattern"]}
-        return _return
-
-    def pattern_json_b(self, digit):
-        return str(self.json_b[digit]["Pattern"])
-
-    def pattern_json_c(self, digit):
-        return str(self.json_c[digit]["Pattern"])
-
-    def value_json_b(self, digit):
-        return self.json_b[digit]["Value"]
-
-    def value_json_c(self, digit):
-        return self.json_c[digit]["Value"]
-
-    def value_json_inv_b(self, value):
-        return str(self.json_inv_b[value]["Pattern"])
-
-    @property
-    def stop(self):
-        return str(self.json_b["Stop"]["Pattern"]) + "11"
-
-    @property
-    def start(self):
-        return str(self.json_b["Start Code B"]["Pattern"]), self.json_b["Start Code B"]["Value"]
+    def point(self, value):
+        # pixel to PDF points
+        return value * 72 / self.dpi
 
     @property
     def bar(self):
@@ -158,31 +130,7 @@ class Labels(object):
 
     @code.setter
     def code(self, data):
-        # 0 - slice data into leading character and numbers
-        leading = data[0]
-        tmp = data[1:]
-        numbers = [tmp[i:i + 2] for i in range(0, len(tmp), 2)]
-        # 1 - get start pattern and value for code b
-        pattern, value = self.start
-        # 2 - add leading character in code b
-        pattern += self.pattern_json_b(leading)
-        value += self.value_json_b(leading)
-        # 3 - add start pattern and value for code c
-        weight = 2
-        pattern += self.pattern_json_b("Code C")
-        value += weight * self.value_json_b("Code C")
-        # 4 - process data input
-        for position in numbers:
-            weight += 1
-            pattern += self.pattern_json_c(position)
-            value += weight * self.value_json_c(position)
-
-        # 5 - check symbol (remainder mod 103)
-        remainder = value % 103
-        pattern += self.value_json_inv_b(remainder)
-        # 6 - stop symbol
-        pattern += self.stop
-        self._code = pattern
+        self._code = barcodes.encoder().encode(data)
 
     @property
     def exists(self):
@@ -266,67 +214,78 @@ class Labels(object):
         # validation
         if not isinstance(unique, str) or not isinstance(label, str) or not isinstance(version, str):
             raise TypeError('Argument of type string expected.')
+        return self.batch(items=[(unique, version)], label=label)
+
+    def batch(self, items, label):
+        """Function to create one PDF label with a page per record, the encoder is shared by all pages.
+
+            :param items: (unique, version) tuples
+            :type items: list
+            :param label: label object can be "location", "box" or "reagent"
+            :type label: str
+            :returns: flag + path for printing
+            :rtype: bool, str
+        """
         allowed = ['location', 'box', 'reagent']
         if label not in allowed:
             raise ValueError('Argument "label" must match "location", "box" or "reagent".')
-        # create .svg and .pdf paths and file names
-        self.svg = label + '/{}_v-{}.svg'.format(unique, version)
-        self.pdf = label + '/{}_v-{}.pdf'.format(unique, version)
-        self.pdf_url = label + '/{}_v-{}.pdf'.format(unique, version)
+        # same records in the same versions and the same design result in the same key
+        key = label_store.key(label, self.dpi, self.margin, self.width, self.height, self.bar, self.font_size,
+                              *('{}:{}'.format(*item) for item in items))
+        url = reverse('label pdf', kwargs={'key': key})
+        store = label_store.store()
 
         # check if label already exists
-        if self.exists:
-            log.info('PDF File for {} "{}" version "{}" already exists. Using existing PDF file for printing.'
-                     .format(label, unique, version))
-            return True, self.pdf_url
+        if store.get(key) is not None:
+            log.info('PDF label for {} {} labels already exists. Using existing PDF label for printing.'
+                     .format(len(items), label))
+            return True, url
+        try:
+            store.put(key, self.render(uniques=[unique for unique, version in items]))
+            message = 'PDF label "{}" for {} {} labels has successfully been created.'.format(key, len(items), label)
+            log.info(message)
+        except:
+            # raise error
+            message = 'Could not create PDF label for {} {} labels.'.format(len(items), label)
+            raise NameError(message)
         else:
-            # generate code
-            self.code = unique
-            # label design
-            dwg = svgwrite.Drawing(filename=self.svg, size=(self.width, self.height))
-            dwg.add(dwg.rect(insert=(0, 0), size=('100%', '100%'), fill='white'))
-            dwg.add(dwg.text(unique, insert=(self.margin + 50, self.margin + 100), font_size=self.font_size,
-                             font_family=self.font_family, font_weight="bold"))
+            return True, url
 
-            # determine barcode length
-            barcode_length = len(self.code) * self.bar
-            left = (self.width - barcode_length) / 2
+    def render(self, uniques):
+        """Function to draw labels into a PDF in memory, one page per label.
 
-            # barcode
-            for idx, y in enumerate(self.code):
-                if y is "0":
-                    stroke = "white"
-                else:
-                    stroke = "black"
-                dwg.add(dwg.line(start=(left + idx * self.bar, self.margin + 170),
-                                 end=(left + idx * self.bar, self.height - self.margin),
-                                 stroke=stroke, stroke_width=self.bar))
-
-            try:
-                # save SVG
-                dwg.save()
-                message = 'SVG label file "{}" for {} "{}" version "{}" has successfully been created.' \
-                    .format(self.svg, label, unique, version)
-                log.info(message)
-            except:
-                # raise error
-                message = 'Could not create SVG file for {} "{}" version "{}".'.format(label, unique, version)
-                raise NameError(message)
-            else:
-                try:
-                    # save raw PDF
-                    drawing = svg2rlg(self.svg)
-                    renderPDF.drawToFile(drawing, self.pdf)
-                    message = 'PDF label file "{}" for {} "{}" version "{}" has successfully been created.' \
-                        .format(self.pdf, label, unique, version)
-                    log.info(message)
-                except:
-                    # raise error
-                    message = 'Could not create PDF file for {} "{}" version "{}".' \
-                        .format(label, unique, version)
-                    raise NameError(message)
-                else:
-                    return True, self.pdf_url
+            :param uniques: unique label values
+            :type uniques: list
+            :returns: PDF content
+            :rtype: bytes
+        """
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=(self.point(self.width), self.point(self.height)))
+        for unique in uniques:
+            self.draw(pdf, unique)
+            pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+
+    def draw(self, pdf, unique):
+        """Function to draw a standard label on the current page of a PDF canvas.
+
+            :param pdf: PDF canvas
+            :type pdf: reportlab.pdfgen.canvas.Canvas
+            :param unique: unique label value
+            :type unique: str
+        """
+        # PDF coordinates start bottom left
+        pdf.setFont('Helvetica-Bold', self.point(int(self.font_size.rstrip('px'))))
+        pdf.drawString(self.point(self.margin + 50), self.point(self.height - self.margin - 100), unique)
+        # barcode, adjacent modules merged into one bar
+        self.code = unique
+        left = (self.width - len(self.code) * self.bar) / 2 - self.bar / 2
+        bottom = self.margin
+        top = self.height - self.margin - 170
+        for first, modules in barcodes.bars(self.code):
+            pdf.rect(self.point(left + first * self.bar), self.point(bottom), self.point(modules * self.bar),
+                     self.point(top - bottom), stroke=0, fill=1)
 
 
 class Master(object):
@@ -362,6 +321,20 @@ class Master(object):
             message = 'Could not query "{}" in table "{}".'.format(dic, self.table_name)
             raise NameError(message)
 
+    def allocate_ids(self, amount):
+        """Function to reserve primary keys from the table sequence in one query, for records written in bulk.
+
+            :param amount: number of primary keys
+            :type amount: int
+
+            :returns: primary keys
+            :rtype: list
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                           [self.table_name, amount])
+            return [row[0] for row in cursor.fetchall()]
+
     def record_version(self, unique):
         return self.table.objects.version(unique)
 
@@ -432,44 +405,149 @@ class GetStandard(Master):
     def order_by(self):
         return '-id'
 
-    def table_row_head(self, row=None):
-        if row is None or self.verify_checksum(row=row):
+    def table_row_head(self, valid=True):
+        if valid:
             return '<tr>'
         else:
             return '<tr style="color: red">'
 
-    def verify_checksum(self, row):
-        """Function to get standard table entries. 
+    @staticmethod
+    def to_verify(row, header):
+        """Build the string the checksum of a row has been generated for.
 
-            :param row: Django queryset
+            :param row: element of Django queryset
             :type row: dict
+            :param header: checksum relevant fields
+            :type header: list
 
-            :returns: flag
-            :rtype: bool
+            :returns: string including the secret
+            :rtype: str
         """
         to_verify = str()
-        for field in self.header:
+        for field in header:
             to_verify += '{}:{};'.format(field, row[field])
+        return to_verify + str(SECRET)
 
-        to_verify += str(SECRET)
-        checksum = row['checksum']
-        try:
-            result = argon2.verify(to_verify, checksum)
-            if not result:
-                # return false + log entry
+    def verify_checksums(self, rows):
+        """Verify the checksums of multiple table rows in one batch.
+
+            :param rows: evaluated Django queryset
+            :type rows: list
+
+            :returns: row id as key and success flag as value
+            :rtype: dict
+        """
+        header = self.header
+        items = [(row['id'], self.to_verify(row=row, header=header), row['checksum']) for row in rows]
+        _return = checksums.verify_rows(table=self.table_name, items=items)
+        for row in rows:
+            if not _return[row['id']]:
+                # log entry
                 message = 'Checksum for "{}" of table "{}" was not correct. Data integrity is at risk!'. \
                     format(row[self.unique], self.table_name)
                 log.warning(message)
-            return result
-        except ValueError or TypeError:
-            # return false + log entry
-            message = 'Checksum for "{}" of table "{}" was not correct. Data integrity is at risk!'.\
-                format(row[self.unique], self.table_name)
-            log.warning(message)
-            return False
+        return _return
+
+    def verify_checksum(self, row):
+        """Verify the checksum of a single table row.
+
+            :param row: element of Django queryset
+            :type row: dict
+
+            :returns: flag
+            :rtype: bool
+        """
+        return self.verify_checksums(rows=[row])[row['id']]
+
+    @property
+    def columns(self):
+        """Sortable field per rendered column, empty for columns not sortable."""
+        return self.header
+
+    def search_filter(self, search):
+        """Filter matching the search string in any text field of the table.
+
+            :param search: search string
+            :type search: str
+
+            :returns: filter
+            :rtype: django.db.models.Q
+        """
+        _filter = Q(pk__in=[])
+        for field in self.header:
+            if self.table._meta.get_field(field).get_internal_type() in ('CharField', 'TextField'):
+                _filter |= Q(**{'{}__icontains'.format(field): search})
+        return _filter
+
+    @staticmethod
+    def keyset(sort, value, unique, descending):
+        """Filter for the records after a (sort value, id) cursor, nulls sort first descending like in postgres.
+
+            :param sort: sort field
+            :type sort: str
+            :param value: sort value of the last record of the previous page
+            :type value: str/int/float/bool
+            :param unique: id of the last record of the previous page
+            :type unique: int
+            :param descending: sort direction
+            :type descending: bool
+
+            :returns: filter
+            :rtype: django.db.models.Q
+        """
+        after = 'lt' if descending else 'gt'
+        tie = Q(**{'id__{}'.format(after): unique})
+        if value is None:
+            _filter = Q(**{'{}__isnull'.format(sort): True}) & tie
+            if descending:
+                _filter |= Q(**{'{}__isnull'.format(sort): False})
+            return _filter
+        _filter = Q(**{'{}__{}'.format(sort, after): value}) | (Q(**{sort: value}) & tie)
+        if not descending:
+            _filter |= Q(**{'{}__isnull'.format(sort): True})
+        return _filter
+
+    def page(self, cursor=None, sort=None, descending=True, search=None, size=None, **dic):
+        """Function to get one page of verified table rows, only the rows of the page are verified.
+
+            :param cursor: sort value and id of the last record of the previous page
+            :type cursor: list
+            :param sort: sort field, falls back to the default order
+            :type sort: str
+            :param descending: sort direction
+            :type descending: bool
+            :param search: search string
+            :type search: str
+            :param size: records per page
+            :type size: int
+            :param dic: custom table fields
+            :type dic: str/int/float
+
+            :returns: rows + cursor for the next page (None for last page)
+            :rtype: list, list
+        """
+        size = size or settings.PAGE_SIZE
+        if sort not in self.header:
+            sort = self.order_by.lstrip('-')
+            descending = self.order_by.startswith('-')
+        query = self.table.objects.filter(**dic)
+        if search:
+            query = query.filter(self.search_filter(search))
+        if cursor:
+            query = query.filter(self.keyset(sort=sort, value=cursor[0], unique=cursor[1], descending=descending))
+        if descending:
+            order = (F(sort).desc(nulls_first=True), F('id').desc())
+        else:
+            order = (F(sort).asc(nulls_last=True), F('id').asc())
+        _query = list(query.order_by(*order).values()[:size + 1])
+        _cursor = None
+        if len(_query) > size:
+            _query = _query[:size]
+            _cursor = [_query[-1][sort], _query[-1]['id']]
+        return self.rows(_query), _cursor
 
     def get(self, **dic):
-        """Function to get standard table entries. 
+        """Function to get standard table entries.
 
             :param dic: custom table fields
             :type dic: str/int/float
@@ -477,11 +555,22 @@ class GetStandard(Master):
             :returns: flag + data
             :rtype: bool, list
         """
-        _query = self.query(order_by=self.order_by, **dic)
+        return self.rows(list(self.query(order_by=self.order_by, **dic)))
+
+    def rows(self, _query):
+        """Verify and render table rows.
+
+            :param _query: evaluated Django queryset
+            :type _query: list
+
+            :returns: html table rows
+            :rtype: list
+        """
+        _valid = self.verify_checksums(rows=_query)
         _list = list()
         for row in _query:
             # open table
-            tmp = self.table_row_head(row=row)
+            tmp = self.table_row_head(valid=_valid[row['id']])
             for field in self.header:
                 # tagging the unique field
                 if field == self.unique:
@@ -524,11 +613,10 @@ class GetStandard(Master):
 
     @property
     def export(self):
-        value_list = self.table.objects.values_list(*self.header)
-        _return = [tuple(custom.capitalize(self.header))]
-        for row in value_list:
-            _return.append(row)
-        return _return
+        # generator over a server side cursor, memory stays flat regardless of table size
+        yield tuple(custom.capitalize(self.header))
+        for row in self.table.objects.values_list(*self.header).iterator():
+            yield row
 
 
 class GetAuditTrail(GetStandard):
@@ -540,14 +628,14 @@ class GetAuditTrail(GetStandard):
         _header.remove('id_ref')
         return _header
 
-    def table_row_head(self, row=None):
-        if self.verify_checksum(row=row):
+    def table_row_head(self, valid=True):
+        if valid:
             return '<tr class="tmp_audit_trail">'
         else:
             return '<tr class="tmp_audit_trail" style="color: red">'
 
     def get(self, **dic):
-        """Function to get audit trail table entries. 
+        """Function to get audit trail table entries.
 
             :param dic: custom table fields (for audit trail mostly "id_ref")
             :type dic: str/int/float
@@ -555,11 +643,12 @@ class GetAuditTrail(GetStandard):
             :returns: flag + data
             :rtype: bool, list
         """
-        _query = self.query(order_by=self.order_by, **dic)
+        _query = list(self.query(order_by=self.order_by, **dic))
+        _valid = self.verify_checksums(rows=_query)
         _list = list()
         for row in _query:
             # open table
-            tmp = self.table_row_head(row=row)
+            tmp = self.table_row_head(valid=_valid[row['id']])
             for field in self.header:
                 # formatting the timestamp
                 if field == 'timestamp':
@@ -614,7 +703,9 @@ class GetView(GetStandard):
             :returns: flag + data
             :rtype: bool, list
         """
-        _query = self.query(order_by=self.order_by, **dic)
+        return self.rows(self.query(order_by=self.order_by, **dic))
+
+    def rows(self, _query):
         _list = list()
         for row in _query:
             # open table
@@ -673,17 +764,6 @@ class GetDynamic(GetStandard):
     def _table_header_dynamic(self):
         return [head.name for head in self.dynamic_table._meta.get_fields()]
 
-    def query_dynamic(self, id_main):
-        """Query dynamic table for main record id.
-
-            :param id_main: main record identifier id
-            :type id_main: int
-
-            :return: records for id_ref
-            :rtype: django.db.models.query.QuerySet
-        """
-        return self.dynamic_table.objects.filter(id_main=id_main).values()
-
     @property
     def header_dynamic(self):
         _header_dynamic = self._table_header_dynamic
@@ -705,61 +785,140 @@ class GetDynamic(GetStandard):
         _header.append('Version')
         return custom.capitalize(_header)
 
-    def table_row_head_total(self, row, query_dynamic):
-        if self.verify_checksum(row=row):
-            _success_list = list()
-            for row in query_dynamic:
-                if not self.verify_checksum_dynamic(row=row):
-                    _success_list.append(False)
-                else:
-                    _success_list.append(True)
-            if custom.check_equal(_success_list):
-                return '<tr>'
-            else:
-                return '<tr style="color: red">'
+    def table_row_head_total(self, valid=True):
+        if valid:
+            return '<tr>'
         else:
             return '<tr style="color: red">'
 
-    def verify_checksum_dynamic(self, row):
-        """Verify checksum of dynamic class table.
+    def main_id(self, row):
+        return row['id']
 
-            :param row: element of Django queryset
-            :type row: dict
+    def pivot_key(self, row):
+        return row['id']
 
-            :returns: success flag
-            :rtype: bool
+    def pivot_key_dynamic(self, row):
+        return row['id_main']
+
+    def query_pivot(self, rows):
+        """Query the dynamic records of multiple main records in one query.
+
+            :param rows: evaluated Django queryset of main records
+            :type rows: list
+
+            :return: main record key as key and list of dynamic records as value
+            :rtype: dict
         """
-        to_verify = str()
-        for field in self.header_dynamic:
-            to_verify += '{}:{};'.format(field, row[field])
+        _return = {self.pivot_key(row): list() for row in rows}
+        if not _return:
+            return _return
+        ids = {self.main_id(row) for row in rows}
+        # always the signed records, jsonb attributes only serve filters
+        query = self.dynamic_table.objects.filter(id_main__in=ids).order_by('id').values()
+        for row in query:
+            key = self.pivot_key_dynamic(row)
+            if key in _return:
+                _return[key].append(row)
+        return _return
 
-        to_verify += str(SECRET)
-        checksum = row['checksum']
-        try:
-            result = argon2.verify(to_verify, checksum)
-            if not result:
-                # return false + log entry
-                unique_main = models.Reagents.objects.filter(id=row['id_main'])[0].reagent
+    def verify_checksums_dynamic(self, rows, uniques):
+        """Verify the checksums of multiple dynamic class table rows in one batch.
+
+            :param rows: dynamic records
+            :type rows: list
+            :param uniques: main record id as key and unique value as value, for logging
+            :type uniques: dict
+
+            :returns: row id as key and success flag as value
+            :rtype: dict
+        """
+        header = self.header_dynamic
+        items = [(row['id'], self.to_verify(row=row, header=header), row['checksum']) for row in rows]
+        _return = checksums.verify_rows(table=self.dynamic_table_name, items=items)
+        for row in rows:
+            if not _return[row['id']]:
+                # log entry
                 message = 'Checksum for "{}" attribute "{}" with id "{}" of table "{}" was not correct. ' \
                           'Data integrity is at risk!'. \
-                    format(unique_main, row['type_attribute'], row[self.dynamic_table_unique], self.dynamic_table_name)
+                    format(uniques.get(row['id_main']), row['type_attribute'], row[self.dynamic_table_unique],
+                           self.dynamic_table_name)
                 log.warning(message)
-            return result
-        except ValueError or TypeError:
-            # return false + log entry
-            unique_main = models.Reagents.objects.filter(id=row['id_main'])[0].reagent
-            message = 'Checksum for "{}" attribute "{}" with id "{}" of table "{}" was not correct. ' \
-                      'Data integrity is at risk!'. \
-                format(unique_main, row['type_attribute'], row[self.dynamic_table_unique], self.dynamic_table_name)
-            log.warning(message)
-            return False
+        return _return
+
+    def verify_total(self, _query):
+        """Query the dynamic records of main records and verify all checksums in two batches.
+
+            :param _query: evaluated Django queryset of main records
+            :type _query: list
+
+            :returns: dynamic records per main record key, validity per main record key
+            :rtype: dict, dict
+        """
+        _pivot = self.query_pivot(rows=_query)
+        _valid = self.verify_checksums(rows=_query)
+        uniques = {self.main_id(row): row[self.unique] for row in _query}
+        _valid_dynamic = self.verify_checksums_dynamic(rows=[row for rows in _pivot.values() for row in rows],
+                                                       uniques=uniques)
+        mismatched = set()
+        if self.dynamic_table is models.DynamicReagents and models.ReagentAttributes.objects.enabled:
+            # filters read the jsonb attributes, they must match the signed records
+            mismatched = models.ReagentAttributes.objects.mismatched(
+                ids=list(uniques), rows=[row for rows in _pivot.values() for row in rows])
+            for id_main in mismatched:
+                message = 'Attributes of "{}" in table "reagent_attributes" do not match the dynamic records. ' \
+                          'Data integrity is at risk!'.format(uniques[id_main])
+                log.warning(message)
+        _valid_total = dict()
+        for row in _query:
+            key = self.pivot_key(row)
+            _valid_total[key] = _valid[row['id']] and self.main_id(row) not in mismatched and \
+                all(_valid_dynamic[row_dynamic['id']] for row_dynamic in _pivot[key])
+        return _pivot, _valid_total
+
+    @staticmethod
+    def values_dynamic(rows):
+        return {row['type_attribute']: row['value'] for row in rows}
+
+    @property
+    def columns(self):
+        return self.header_start + [''] * len(self.type_attributes) + ['version']
+
+    def attribute_filter(self, type_attribute, value):
+        """Filter of main records with an attribute value, an indexed lookup with jsonb attribute storage.
+
+            :param type_attribute: type attribute
+            :type type_attribute: str
+            :param value: exact attribute value
+            :type value: str
+
+            :returns: filter of main records
+            :rtype: Q
+        """
+        if self.dynamic_table is models.DynamicReagents and models.ReagentAttributes.objects.enabled:
+            return Q(id__in=models.ReagentAttributes.objects.matching(type_attribute=type_attribute, value=value))
+        return Q(id__in=self.dynamic_table.objects.filter(type_attribute=type_attribute, value=value)
+                 .values('id_main'))
+
+    def search_filter(self, search):
+        # "attribute=value" searches one attribute for an exact value
+        type_attribute, separator, value = search.partition('=')
+        if separator and type_attribute.strip() in self.type_attributes:
+            return self.attribute_filter(type_attribute=type_attribute.strip(), value=value.strip())
+        _filter = super().search_filter(search)
+        return _filter | Q(id__in=self.dynamic_table.objects.filter(value__icontains=search).values('id_main'))
+
+    def page(self, **kwargs):
+        return super().page(type=self.type, **kwargs)
 
     def get(self, **dic):
-        _query = self.query(order_by=self.order_by, type=self.type)
+        return self.rows(list(self.query(order_by=self.order_by, type=self.type, **dic)))
+
+    def rows(self, _query):
+        _pivot, _valid = self.verify_total(_query)
         _list = list()
         for row in _query:
-            _query_dynamic = self.query_dynamic(row['id'])
-            tmp = self.table_row_head_total(row=row, query_dynamic=_query_dynamic)
+            values = self.values_dynamic(_pivot[self.pivot_key(row)])
+            tmp = self.table_row_head_total(valid=_valid[self.pivot_key(row)])
             # adding all tds for builder_header_start
             for field in self.header_start:
                 # tagging the unique field
@@ -769,12 +928,7 @@ class GetDynamic(GetStandard):
                     tmp += '<td class="gui">{}</td>'.format(row[field])
             # adding all tds for builder_header_dynamic
             for field in self.type_attributes:
-                if field not in self.dynamic_table.objects.list_of_type_attributes(id_main=row['id']):
-                    tmp += '<td class="gui"></td>'
-                else:
-                    for row_dynamic in _query_dynamic:
-                        if field == row_dynamic['type_attribute']:
-                            tmp += '<td class="gui">{}</td>'.format(row_dynamic['value'])
+                tmp += '<td class="gui">{}</td>'.format(values.get(field, ''))
             # adding all tds for builder_header_end
             tmp += '<td>{}</td>'.format(row['version'])
             # close table
@@ -785,29 +939,19 @@ class GetDynamic(GetStandard):
 
     @property
     def export(self):
-        _query = self.query(order_by=self.order_by, type=self.type)
-        _list = list()
-        for row in _query:
-            _query_dynamic = self.query_dynamic(row['id'])
-            _tuple = tuple()
-            for field in self.header_start:
-                _tuple += (row[field], )
-
-            for field in self.type_attributes:
-                if field not in self.dynamic_table.objects.list_of_type_attributes(id_main=row['id']):
-                    _tuple += ('', )
-                else:
-                    for row_dynamic in _query_dynamic:
-                        if field == row_dynamic['type_attribute']:
-                            _tuple += (row_dynamic['value'], )
-            _tuple += (row['version'], )
-            _list.append(_tuple)
-        _return = [tuple(custom.capitalize(self.header_start)) +
-                   tuple(custom.capitalize(self.type_attributes)) +
-                   ('Version', )]
-        for row in _list:
-            _return.append(row)
-        return _return
+        # generator over a server side cursor, dynamic records are pivoted per chunk of main records
+        yield tuple(custom.capitalize(self.header_start)) + tuple(custom.capitalize(self.type_attributes)) + \
+            ('Version', )
+        _query = self.query(order_by=self.order_by, type=self.type).iterator()
+        while True:
+            chunk = list(itertools.islice(_query, settings.EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            _pivot = self.query_pivot(rows=chunk)
+            for row in chunk:
+                values = self.values_dynamic(_pivot[self.pivot_key(row)])
+                yield tuple(row[field] for field in self.header_start) + \
+                    tuple(values.get(field, '') for field in self.type_attributes) + (row['version'], )
 
 
 class GetDynamicAuditTrail(GetDynamic):
@@ -817,20 +961,6 @@ class GetDynamicAuditTrail(GetDynamic):
             self.dt = datetime.timedelta(seconds=int(dt) * 60)
             self.utc_offset = custom.fill_up_time_delta(dt)
 
-    def query_dynamic_at(self, id_main, version):
-        """Query dynamic table for main record id.
-
-            :param id_main: main record identifier id
-            :type id_main: int
-
-            :param version: version of the audit trail record stored in id_ref
-            :type version: int
-
-            :return: records for id_ref
-            :rtype: django.db.models.query.QuerySet
-        """
-        return self.dynamic_table.objects.filter(id_main=id_main, id_ref=version).values()
-
     @property
     def header(self):
         _header = self._table_header
@@ -868,40 +998,57 @@ class GetDynamicAuditTrail(GetDynamic):
         _header.append('timestamp')
         return custom.capitalize(_header)
 
-    def table_row_head_total(self, row, query_dynamic):
-        if self.verify_checksum(row=row):
-            _success_list = list()
-            for row in query_dynamic:
-                if not self.verify_checksum_dynamic(row=row):
-                    _success_list.append(False)
-                else:
-                    _success_list.append(True)
-            if custom.check_equal(_success_list):
-                return '<tr class="tmp_audit_trail">'
-            else:
-                return '<tr class="tmp_audit_trail" style="color: red">'
+    def table_row_head_total(self, valid=True):
+        if valid:
+            return '<tr class="tmp_audit_trail">'
         else:
             return '<tr class="tmp_audit_trail" style="color: red">'
 
+    def main_id(self, row):
+        return row['id_ref']
+
+    def pivot_key(self, row):
+        return row['id_ref'], row['version']
+
+    def pivot_key_dynamic(self, row):
+        # id_ref of dynamic audit trail records holds the version of the main record
+        return row['id_main'], row['id_ref']
+
+    def values_history(self, _query, _pivot):
+        """Attribute values per version, only changed attributes are audited and the others are taken over from
+        the previous version.
+
+            :param _query: evaluated Django queryset of main audit trail records
+            :type _query: list
+            :param _pivot: dynamic audit trail records per main audit trail record key
+            :type _pivot: dict
+
+            :returns: attribute values per main audit trail record key
+            :rtype: dict
+        """
+        _return = dict()
+        last = dict()
+        for row in sorted(_query, key=lambda x: (x['id_ref'], x['version'])):
+            key = self.pivot_key(row)
+            _return[key] = dict(last.get(row['id_ref'], dict()), **self.values_dynamic(_pivot[key]))
+            last[row['id_ref']] = _return[key]
+        return _return
+
     def get(self, **dic):
-        _query = self.query(order_by=self.order_by, type=self.type, **dic)
+        _query = list(self.query(order_by=self.order_by, type=self.type, **dic))
+        _pivot, _valid = self.verify_total(_query)
+        _values = self.values_history(_query, _pivot)
         _list = list()
         for row in _query:
-            _query_dynamic = self.query_dynamic_at(id_main=row['id_ref'], version=row['version'])
-            tmp = self.table_row_head_total(row=row, query_dynamic=_query_dynamic)
+            values = _values[self.pivot_key(row)]
+            tmp = self.table_row_head_total(valid=_valid[self.pivot_key(row)])
             # adding all tds for builder_header_start
             for field in self.header_start:
                 # only payload
                 tmp += '<td>{}</td>'.format(row[field])
             # adding all tds for builder_header_dynamic
             for field in self.type_attributes:
-                if field not in self.dynamic_table.objects.list_of_type_attributes(id_main=row['id_ref'],
-                                                                                   version=row['version']):
-                    tmp += '<td></td>'
-                else:
-                    for row_dynamic in _query_dynamic:
-                        if field == row_dynamic['type_attribute']:
-                            tmp += '<td>{}</td>'.format(row_dynamic['value'])
+                tmp += '<td>{}</td>'.format(values.get(field, ''))
             # adding all tds for builder_header_end
             tmp += '<td>{}</td>'.format(row['version'])
             tmp += '<td>{}</td>'.format(row['action'])
@@ -916,6 +1063,37 @@ class GetDynamicAuditTrail(GetDynamic):
         return True, _list
 
 
+def checksum_tables():
+    """Tables verified by the user interface: master data, logs, dynamic attributes and audit trails.
+
+        :returns: django models
+        :rtype: list
+    """
+    _return = [models.DynamicReagents]
+    for model in list(models.TABLES.values()) + list(apps.get_app_config('lab').get_models()):
+        # derived tables like the overview carry no checksum
+        if model in _return or not model._meta.managed or \
+                'checksum' not in [field.name for field in model._meta.get_fields()]:
+            continue
+        if model in models.TABLES.values() or model.__name__.endswith('AuditTrail'):
+            _return.append(model)
+    return _return
+
+
+def get_checksum_table(model):
+    """Return the table class building the verification strings of a checksum table.
+
+        :param model: django model
+        :type model: django.db.models.Model
+
+        :returns: table class
+        :rtype: GetStandard, GetAuditTrail
+    """
+    if model.__name__.endswith('AuditTrail'):
+        return GetAuditTrail(table=model)
+    return GetStandard(table=model)
+
+
 class TableManipulation(Master):
     def __init__(self, table, table_audit_trail=None):
         super().__init__(table)
@@ -988,14 +1166,14 @@ class TableManipulation(Master):
         _header.remove('checksum')
         return _header
 
-    def parsing(self, **kwargs):
-        """Function to parse passed dict to generate json string, generate checksum and result dict for return. 
+    def serialize(self, **kwargs):
+        """Function to parse passed dict to generate json string and result dict.
 
-            :param kwargs: custom table fields 
+            :param kwargs: custom table fields
             :type kwargs: str/int/float
 
-            :returns: checksum
-            :rtype: str
+            :returns: result dict, json string
+            :rtype: dict, str
         """
         # declare empty dictionary and string to fill by parser
         _dict = dict()
@@ -1017,19 +1195,31 @@ class TableManipulation(Master):
         if self.version is not None:
             _dict['version'] = self.version
             _json += 'version:{};'.format(self.version)
-        self.json = _json
-        self.dict = _dict
+        return _dict, _json
+
+    def parsing(self, **kwargs):
+        """Function to parse passed dict to generate json string, generate checksum and result dict for return. 
+
+            :param kwargs: custom table fields 
+            :type kwargs: str/int/float
+
+            :returns: checksum
+            :rtype: str
+        """
+        self.dict, self.json = self.serialize(**kwargs)
         # add secret to json string
-        to_hash = _json + str(SECRET)
+        to_hash = self.json + str(SECRET)
         # generate checksum
-        checksum = custom.generate_checksum(to_hash=to_hash)
+        checksum = checksums.generate(to_hash=to_hash)
         return checksum
 
-    def new(self, user, **kwargs):
+    def new(self, user, table_id=None, **kwargs):
         """Function to create new standard table records. 
 
             :param user: user id/name
             :type user: str
+            :param table_id: primary key allocated before insert, generated by the database if not passed
+            :type table_id: int
             :param kwargs: custom table fields 
             :type kwargs: str/int/float
 
@@ -1043,9 +1233,13 @@ class TableManipulation(Master):
             self.version = 1
             checksum = self.parsing(**kwargs)
             try:
-                entry = self.table.objects.create(**self.dict, checksum=checksum)
+                if table_id is None:
+                    entry = self.table.objects.create(**self.dict, checksum=checksum)
+                else:
+                    entry = self.table.objects.create(id=table_id, **self.dict, checksum=checksum)
                 self.timestamp = timezone.now()
                 self.id = entry.id
+                self.table.objects.forget(unique=self.unique_value)
                 # success message + log entry
                 message = 'Record "{}" has been created.'.format(kwargs[self.unique])
                 log.info(message)
@@ -1105,9 +1299,12 @@ class TableManipulation(Master):
         self.unique_value = '{} - {}'.format(identifier, kwargs['type_attribute'])
         checksum = self.parsing(**kwargs)
         try:
-            self.table.objects.create(**self.dict, checksum=checksum)
-            self.timestamp = timestamp
-            self.id = main_version
+            # derived attributes are written with the record or not at all
+            with transaction.atomic():
+                self.table.objects.create(**self.dict, checksum=checksum)
+                self.timestamp = timestamp
+                self.id = main_version
+                self.index_dynamic(identifier=identifier, id_main=kwargs['id_main'])
             # success message + log entry
             message = 'Record "{}" has been created.'.format(self.unique_value)
             log.info(message)
@@ -1118,9 +1315,149 @@ class TableManipulation(Master):
         else:
             return True, message
 
+    def index_dynamic(self, identifier, id_main):
+        # attribute values are searched as part of the reagent document
+        if self.table is models.DynamicReagents:
+            models.Search.objects.index(model=models.Reagents, unique=identifier)
+            models.ReagentAttributes.objects.refresh(ids=[id_main])
+
     def new_boxing(self, **kwargs):
         return self.new_log(text='boxing', unique='box', **kwargs)
 
+    def new_log_bulk(self, records, text='log'):
+        """Function to create many log records at once, checksums are generated as one batch.
+
+            :param records: log records as dicts of the table fields
+            :type records: list
+            :param text: log name for messages
+            :type text: str
+
+            :return: flag
+            :rtype: bool
+        """
+        parsed = [self.serialize(**record) for record in records]
+        _checksums = checksums.engine().generate_many([_json + str(SECRET) for _dict, _json in parsed])
+        try:
+            self.table.objects.bulk_create([self.table(**_dict, checksum=checksum)
+                                            for (_dict, _json), checksum in zip(parsed, _checksums)])
+            # success message + log entry
+            message = '{} {} records have been created.'.format(len(records), text)
+            log.info(message)
+        except:
+            # raise error
+            message = 'Could not create {} {} records.'.format(len(records), text)
+            raise NameError(message)
+        else:
+            return True
+
+    def new_boxing_bulk(self, records):
+        return self.new_log_bulk(records=records, text='boxing')
+
+    def checksums_bulk(self, parsed, action='Create'):
+        """Function to generate the checksums of records and their audit trail records as one batch.
+
+            :param parsed: result dicts and json strings of serialize
+            :type parsed: list
+            :param action: audit trail action ("Create" / "Update" / "Delete")
+            :type action: str
+
+            :returns: record checksums, audit trail checksums
+            :rtype: list, list
+        """
+        to_hash = [_json + str(SECRET) for _dict, _json in parsed]
+        to_hash += ['{}action:{};user:{};timestamp:{};{}'.format(_json, action, self.user, self.timestamp, SECRET)
+                    for _dict, _json in parsed]
+        _checksums = checksums.engine().generate_many(to_hash)
+        return _checksums[:len(parsed)], _checksums[len(parsed):]
+
+    def new_identifier_bulk(self, user, prefix, records, timestamp=None):
+        """Function to create many records with generated identifiers and their audit trail at once.
+
+            :param user: user id/name
+            :type user: str
+            :param prefix: identifier prefix "S" / "B" / "L" / "R"
+            :type prefix: str
+            :param records: custom table fields except the identifier per record
+            :type records: list
+            :param timestamp: timestamp of all records
+            :type timestamp: datetime
+
+            :returns: created records as dicts with primary key
+            :rtype: list
+        """
+        if prefix not in ('S', 'B', 'L', 'R'):
+            # raise error
+            message = 'Could not generate identifier. Prefix did not match "S" / "B" / "L" / "R".'
+            raise NameError(message)
+        self.user = user
+        self.version = 1
+        self.timestamp = timestamp or timezone.now()
+        table_ids = self.allocate_ids(len(records))
+        parsed = [self.serialize(**dict(record, **{self.unique: custom.identifier(prefix=prefix, table_id=table_id)}))
+                  for table_id, record in zip(table_ids, records)]
+        _checksums, _checksums_audit = self.checksums_bulk(parsed)
+        try:
+            with transaction.atomic():
+                self.table.objects.bulk_create([self.table(id=table_id, **_dict, checksum=checksum) for
+                                                table_id, (_dict, _json), checksum in
+                                                zip(table_ids, parsed, _checksums)])
+                self.table_audit_trail.objects.bulk_create([
+                    self.table_audit_trail(**_dict, id_ref=table_id, action='Create', user=self.user,
+                                           timestamp=self.timestamp, checksum=checksum)
+                    for table_id, (_dict, _json), checksum in zip(table_ids, parsed, _checksums_audit)])
+                if self.table in models.OVERVIEW_AFFILIATIONS:
+                    models.Overview.objects.register_many(items=[(_dict[self.unique], _dict.get('type', ''))
+                                                                 for _dict, _json in parsed],
+                                                          affiliation=models.OVERVIEW_AFFILIATIONS[self.table])
+            # success message + log entry
+            message = '{} records have been created.'.format(len(records))
+            log.info(message)
+        except:
+            # raise error
+            message = 'Could not create {} records.'.format(len(records))
+            raise NameError(message)
+        return [dict(_dict, id=table_id) for table_id, (_dict, _json) in zip(table_ids, parsed)]
+
+    def new_dynamic_bulk(self, user, records, main_version, timestamp):
+        """Function to create many dynamic table records and their audit trail at once.
+
+            :param user: user id/name
+            :type user: str
+            :param records: custom table fields per record
+            :type records: list
+            :param main_version: version of the main objects
+            :rtype main_version: int
+            :param timestamp: timestamp of the main objects
+            :rtype timestamp: datetime object
+
+            :returns: flag
+            :rtype: bool
+        """
+        self.user = user
+        self.timestamp = timestamp
+        parsed = [self.serialize(**record) for record in records]
+        _checksums, _checksums_audit = self.checksums_bulk(parsed)
+        try:
+            with transaction.atomic():
+                self.table.objects.bulk_create([self.table(**_dict, checksum=checksum)
+                                                for (_dict, _json), checksum in zip(parsed, _checksums)])
+                # id_ref of dynamic audit trail records holds the version of the main record
+                self.table_audit_trail.objects.bulk_create([
+                    self.table_audit_trail(**_dict, id_ref=main_version, action='Create', user=self.user,
+                                           timestamp=self.timestamp, checksum=checksum)
+                    for (_dict, _json), checksum in zip(parsed, _checksums_audit)])
+                if self.table is models.DynamicReagents:
+                    models.ReagentAttributes.objects.refresh(ids=[record['id_main'] for record in records])
+            # success message + log entry
+            message = '{} dynamic records have been created.'.format(len(records))
+            log.info(message)
+        except:
+            # raise error
+            message = 'Could not create {} dynamic records.'.format(len(records))
+            raise NameError(message)
+        else:
+            return True
+
     def clear_boxing(self, **kwargs):
         """Dedicated function to clear boxing records. WARNING, does not suit framework!
 
@@ -1132,6 +1469,8 @@ class TableManipulation(Master):
             checksum = self.parsing(**kwargs)
             self.table.objects.filter(box=kwargs['box'],
                                       position=kwargs['position']).update(**self.dict, checksum=checksum)
+            models.Overview.objects.clear(box=kwargs['box'], position=kwargs['position'])
+            models.FreePositions.objects.refresh(box=kwargs['box'])
             # success message + log entry
             message = 'Boxing record for "{}" has been cleared.'.format(kwargs['object'])
             log.info(message)
@@ -1158,6 +1497,7 @@ class TableManipulation(Master):
                 }
                 checksum = self.parsing(**old_kwargs)
                 self.table.objects.filter(object=old.object).update(**self.dict, checksum=checksum)
+                models.FreePositions.objects.refresh(box=old.box)
                 # success message + log entry
                 message = 'Boxing record for "{}" has been updated.'.format(old.object)
                 log.info(message)
@@ -1165,6 +1505,10 @@ class TableManipulation(Master):
             checksum = self.parsing(**kwargs)
             self.table.objects.filter(box=kwargs['box'],
                                       position=kwargs['position']).update(**self.dict, checksum=checksum)
+            models.Overview.objects.set_box(unique=kwargs['object'], box=kwargs['box'],
+                                            position=kwargs['position'])
+            models.FreePositions.objects.refresh(box=kwargs['box'])
+            models.Reservations.objects.release(object=kwargs['object'])
             # success message + log entry
             message = 'Boxing record for "{}" has been created.'.format(kwargs['object'])
             log.info(message)
@@ -1198,6 +1542,14 @@ class TableManipulation(Master):
                 self.table.objects.filter(**filter_dic).update(**self.dict, checksum=checksum)
                 self.timestamp = timezone.now()
                 self.id = self.record_id(self.unique_value)
+                checksums.forget(table=self.table_name, uniques=[self.id])
+                if self.table in models.OVERVIEW_AFFILIATIONS:
+                    models.Overview.objects.set_type(unique=self.unique_value, type=self.dict['type'])
+                if self.table in models.SEARCH_TABLES:
+                    models.Search.objects.index(model=self.table, unique=self.unique_value)
+                if self.table is models.Boxes:
+                    models.FreePositions.objects.set_type(box=self.unique_value, type=self.dict['type'])
+                self.table.objects.forget(unique=self.unique_value)
                 # success message + log entry
                 message = 'Record "{}" has been updated.'.format(kwargs[self.unique])
                 log.info(message)
@@ -1223,9 +1575,12 @@ class TableManipulation(Master):
             checksum = self.parsing(**kwargs)
             # self.version = main_version
             try:
-                self.table.objects.filter(**filter_dic).update(**self.dict, checksum=checksum)
-                self.timestamp = timestamp
-                self.id = main_version
+                # derived attributes are written with the record or not at all
+                with transaction.atomic():
+                    self.table.objects.filter(**filter_dic).update(**self.dict, checksum=checksum)
+                    self.timestamp = timestamp
+                    self.id = main_version
+                    self.index_dynamic(identifier=identifier, id_main=kwargs['id_main'])
                 # success message + log entry
                 message = 'Record "{}" has been updated.'.format(self.unique_value)
                 log.info(message)
@@ -1243,6 +1598,69 @@ class TableManipulation(Master):
                                                timestamp=timestamp, **kwargs)
             return result, message
 
+    def edit_dynamic_bulk(self, user, identifier, id_main, main_version, timestamp, values):
+        """Function to update the changed dynamic table records of one main object at once.
+
+            :param user: user id/name
+            :type user: str
+            :param identifier: identifier of main object
+            :rtype identifier: str
+            :param id_main: id of the main object
+            :rtype id_main: int
+            :param main_version: version of the main object
+            :rtype main_version: int
+            :param timestamp: timestamp from external
+            :rtype timestamp: datetime object
+            :param values: attribute values by type attribute
+            :type values: dict
+
+            :returns: flag + message
+            :rtype: bool, str
+        """
+        self.user = user
+        self.timestamp = timestamp
+        current = {row['type_attribute']: row for row in
+                   self.table.objects.filter(id_main=id_main).values('id', 'type_attribute', 'value')}
+        parsed = list()
+        for type_attribute, value in values.items():
+            _dict, _json = self.serialize(id_main=id_main, type_attribute=type_attribute, value=value)
+            # unchanged attributes are neither rewritten nor audited
+            if type_attribute in current and current[type_attribute]['value'] == _dict['value']:
+                continue
+            parsed.append((_dict, _json))
+        if not parsed:
+            return True, 'Attributes of "{}" have not changed.'.format(identifier)
+        _checksums, _checksums_audit = self.checksums_bulk(parsed, action='Update')
+        updates = [(current[_dict['type_attribute']]['id'], _dict['value'], checksum)
+                   for (_dict, _json), checksum in zip(parsed, _checksums) if _dict['type_attribute'] in current]
+        try:
+            with transaction.atomic():
+                if updates:
+                    # one statement for all changed attributes
+                    self.table.objects.filter(id__in=[_id for _id, value, checksum in updates]).update(
+                        value=Case(*[When(id=_id, then=Value(value)) for _id, value, checksum in updates],
+                                   output_field=CharField()),
+                        checksum=Case(*[When(id=_id, then=Value(checksum)) for _id, value, checksum in updates],
+                                      output_field=CharField()))
+                # attributes added to the type after the main object has been created
+                self.table.objects.bulk_create([self.table(**_dict, checksum=checksum) for (_dict, _json), checksum
+                                                in zip(parsed, _checksums) if _dict['type_attribute'] not in current])
+                # id_ref of dynamic audit trail records holds the version of the main record
+                self.table_audit_trail.objects.bulk_create([
+                    self.table_audit_trail(**_dict, id_ref=main_version, action='Update', user=self.user,
+                                           timestamp=self.timestamp, checksum=checksum)
+                    for (_dict, _json), checksum in zip(parsed, _checksums_audit)])
+                self.index_dynamic(identifier=identifier, id_main=id_main)
+            # success message + log entry
+            message = '{} attributes of "{}" have been updated.'.format(len(parsed), identifier)
+            log.info(message)
+        except:
+            # raise error
+            message = 'Could not update attributes of "{}".'.format(identifier)
+            raise NameError(message)
+        else:
+            return True, message
+
     def new_at(self, user, **kwargs):
         result, message = self.new(user=user, **kwargs)
         if result:
@@ -1269,36 +1687,41 @@ class TableManipulation(Master):
         else:
             return result, message
 
-    def new_identifier_at(self, user, prefix, **kwargs):
-        result, message = self.new(user=user, **kwargs)
+    def new_identifier_at(self, user, prefix, table_id=None, **kwargs):
+        """Function to create a new record with an identifier generated from its primary key.
+
+            :param user: user id/name
+            :type user: str
+            :param prefix: identifier prefix "S" / "B" / "L" / "R"
+            :type prefix: str
+            :param table_id: primary key allocated before, e.g. as block for bulk operations
+            :type table_id: int
+            :param kwargs: custom table fields except the identifier
+            :type kwargs: str/int/float
+
+            :returns: flag + identifier or message
+            :rtype: bool, str
+        """
+        if prefix not in ('S', 'B', 'L', 'R'):
+            # raise error
+            message = 'Could not generate identifier. Prefix did not match "S" / "B" / "L" / "R".'
+            raise NameError(message)
+        # primary key from the table sequence before insert, one write and one checksum per record
+        if table_id is None:
+            table_id = self.allocate_ids(1)[0]
+        kwargs[self.unique] = custom.identifier(prefix=prefix, table_id=table_id)
+        result, message = self.new(user=user, table_id=table_id, **kwargs)
         if result:
-            # generate identifier for new table entry
-            _identifier = custom.identifier(prefix=prefix, table_id=self.id)
-            if prefix == 'S' or prefix == 'B' or prefix == 'L' or prefix == 'R':
-                # generate new json string with new unique value generated by identifier
-                self.json = '{}:{};{}'.format(self.unique, _identifier, self.json.split(';', 1)[1])
-                self.dict[self.unique] = _identifier
-            else:
-                # raise error
-                message = 'Could not generate identifier for id "{}". Prefix did not match "S" / "B" / "L".' \
-                    .format(self.id)
-                raise NameError(message)
-            # add secret to json string
-            to_hash_new = self.json + str(SECRET)
-            # generate checksum
-            checksum_new = custom.generate_checksum(to_hash=to_hash_new)
             try:
-                # generate arguments for update
-                _dict = {self.unique: _identifier}
-                self.table.objects.filter(id=self.id).update(checksum=checksum_new, **_dict)
-                # return true and success message + log entry
-                message = 'Entry for "{}" has automatically been updated to "{}".'.format(self.unique_value,
-                                                                                          _identifier)
-                log.info(message)
-                self.unique_value = _identifier
+                if self.table in models.OVERVIEW_AFFILIATIONS:
+                    models.Overview.objects.register(unique=self.unique_value,
+                                                     affiliation=models.OVERVIEW_AFFILIATIONS[self.table],
+                                                     type=self.dict['type'])
+                if self.table in models.SEARCH_TABLES:
+                    models.Search.objects.index(model=self.table, unique=self.unique_value)
             except:
                 # raise error
-                message = 'Could not automatically update entry for "{}".'.format(self.unique_value)
+                message = 'Could not register entry "{}".'.format(self.unique_value)
                 raise NameError(message)
             if self.audit_trail(action='Create'):
                 return True, self.unique_value
@@ -1317,7 +1740,7 @@ class TableManipulation(Master):
         # create json string
         to_hash = '{}action:{};user:{};timestamp:{};{}'.format(self.json, action, self.user, self.timestamp, SECRET)
         # generate checksum
-        checksum = custom.generate_checksum(to_hash=to_hash)
+        checksum = checksums.generate(to_hash=to_hash)
         try:
             self.table_audit_trail.objects.create(**self.dict, id_ref=self.id, action=action, user=self.user,
                                                   timestamp=self.timestamp, checksum=checksum)
@@ -1380,6 +1803,14 @@ class TableManipulation(Master):
             try:
                 self.table.objects.filter(**_dic).delete()
                 self.timestamp = timezone.now()
+                checksums.forget(table=self.table_name, uniques=[self.id])
+                if self.table in models.OVERVIEW_AFFILIATIONS:
+                    models.Overview.objects.remove(unique=record)
+                if self.table in models.SEARCH_TABLES:
+                    models.Search.objects.remove(unique=record)
+                if self.table is models.Boxes:
+                    models.FreePositions.objects.remove(box=record)
+                self.table.objects.forget(unique=record)
                 # log entry
                 message = 'Record "{}" has been deleted.'.format(record)
                 log.info(message)
@@ -1414,17 +1845,17 @@ class TableManipulation(Master):
         return True
 
     def movement(self, user, unique, new_location):
-        # get actual information
-        initial_location = '' if models.RTD.objects.location(unique=unique) is None else models.RTD.objects.location(
-            unique=unique)
+        # get actual information, the overview holds one row per object
+        initial_location = models.Overview.objects.location(unique=unique)
         # define user
         self.user = user
         # create movement log entry
         self.timestamp = timezone.now()
-        method = models.RTD.objects.method(unique=unique)
+        method = models.Overview.objects.affiliation(unique=unique)
         # only proceed if log record was written
         if self.new_log(user=user, object=unique, type=method, initial_location=initial_location,
                         new_location=new_location, timestamp=self.timestamp):
+            models.Overview.objects.set_location(unique=unique, location=new_location)
             # define new object to manipulate table times
             manipulation = TableManipulation(table=models.Times)
             # check if first move, then just move
@@ -1496,8 +1927,10 @@ class TableManipulation(Master):
                     return True, message
 
     def move(self, user, obj, method, initial_location, new_location, timestamp):
-        return self.new_log(user=user, object=obj, method=method, initial_location=initial_location,
-                            new_location=new_location, timestamp=timestamp)
+        if self.new_log(user=user, object=obj, method=method, initial_location=initial_location,
+                        new_location=new_location, timestamp=timestamp):
+            models.Overview.objects.set_location(unique=str(obj), location=new_location)
+            return True
 
 
 def new_login_log(username, action, method='manual', active=None):
@@ -1525,6 +1958,183 @@ def new_login_log(username, action, method='manual', active=None):
         models.Users.objects.set_is_active(username=username, operation_user=username, is_active=False)
 
 
+def print_labels(table, uniques, label, user):
+    """Function to print labels of many records as one PDF file, all label log records are created at once.
+
+        :param table: table of the records
+        :type table: Locations, Boxes, Reagents
+        :param uniques: unique values of the records
+        :type uniques: list
+        :param label: label object can be "location", "box" or "reagent"
+        :type label: str
+        :param user: user id/name
+        :type user: str
+
+        :returns: flag + path for printing or message
+        :rtype: bool, str
+    """
+    uniques = list(dict.fromkeys(uniques))
+    if not uniques or len(uniques) > Labels.batch_size:
+        return False, 'Select between 1 and {} records for label printing.'.format(Labels.batch_size)
+    unique = table.objects.unique
+    versions = dict(table.objects.filter(**{'{}__in'.format(unique): uniques}).values_list(unique, 'version'))
+    for item in uniques:
+        if item not in versions:
+            return False, 'Record "{}" does not exist.'.format(item)
+    items = [(item, str(versions[item])) for item in uniques]
+    response, pdf_url = Labels().batch(items=items, label=label)
+    timestamp = timezone.now()
+    TableManipulation(table=models.LabelLog).new_log_bulk(
+        records=[{'label': '{}_v-{}.pdf'.format(*item), 'user': user, 'action': 'print attempt',
+                  'timestamp': timestamp} for item in items], text='label')
+    log.info('Label print for {} {} labels was requested.'.format(len(items), label))
+    return response, pdf_url
+
+
+def move_boxes(user, boxes, new_location):
+    """Function to move boxes with their contents, all movement log records are created in one transaction.
+
+        :param user: user id/name
+        :type user: str
+        :param boxes: boxes to move
+        :type boxes: list
+        :param new_location: target location
+        :type new_location: str
+
+        :returns: flag + message
+        :rtype: bool, str
+    """
+    boxes = list(dict.fromkeys(boxes))
+    unsuitable = models.Overview.objects.unsuitable(boxes=boxes, location=new_location)
+    if unsuitable:
+        return False, 'Target location has no suitable condition for {}.'.format(unsuitable[0])
+    query = list(models.Overview.objects.filter(Q(object__in=boxes) | Q(box__in=boxes))
+                 .values_list('object', 'box', 'location', 'affiliation'))
+    # reagents or samples are not moved as boxes
+    locations = {obj: location or '' for obj, box, location, affiliation in query
+                 if obj in boxes and affiliation == 'box'}
+    query = [(obj, box, location) for obj, box, location, affiliation in query]
+    for box in boxes:
+        if box not in locations:
+            return False, 'Box "{}" does not exist.'.format(box)
+        if locations[box] == new_location:
+            return False, 'Actual location of "{}" is equal to new location.'.format(box)
+    timestamp = timezone.now()
+    # boxes first, then their contents moved by the box
+    records = [{'object': box, 'method': 'manual', 'initial_location': locations[box],
+                'new_location': new_location, 'user': user, 'timestamp': timestamp} for box in boxes]
+    records += [{'object': obj, 'method': box, 'initial_location': locations[box], 'new_location': new_location,
+                 'user': user, 'timestamp': timestamp} for obj, box, location in query if box in locations]
+    with transaction.atomic():
+        TableManipulation(table=models.MovementLog).new_log_bulk(records=records, text='movement')
+        models.Overview.objects.set_locations(boxes=boxes, location=new_location)
+    message = '{} boxes with {} objects have been moved to "{}".'.format(len(boxes), len(records) - len(boxes),
+                                                                       new_location)
+    log.info(message)
+    return True, message
+
+
+def new_boxes(user, amount, name, box_type, type):
+    """Function to create new boxes of one box type with their empty boxing records in one transaction.
+
+        :param user: user id/name
+        :type user: str
+        :param amount: number of boxes
+        :type amount: int
+        :param name: box name
+        :type name: str
+        :param box_type: box type
+        :type box_type: BoxTypes
+        :param type: type
+        :type type: Types
+
+        :returns: flag + created boxes
+        :rtype: bool, list
+    """
+    positions = models.BoxTypes.objects.layout(box_type.box_type).positions
+    manipulation = TableManipulation(table=models.Boxes, table_audit_trail=models.BoxesAuditTrail)
+    try:
+        with transaction.atomic():
+            created = manipulation.new_identifier_bulk(user=user, prefix='B', records=[
+                {'name': name, 'box_type': box_type, 'type': type}] * amount)
+            models.FreePositions.objects.register_many(items=[(record['box'], record['type']) for record in created],
+                                                       free=len(positions))
+            TableManipulation(table=models.Boxing).new_boxing_bulk(records=[
+                {'object': '', 'box': record['box'], 'position': position}
+                for record in created for position in positions])
+            models.Search.objects.index_many(model=models.Boxes, records=created)
+    except NameError as error:
+        return False, str(error)
+    return True, [record['box'] for record in created]
+
+
+def new_reagents(user, amount, type, name, values):
+    """Function to create reagents of one type with their attributes in one transaction.
+
+        :param user: user id/name
+        :type user: str
+        :param amount: number of reagents
+        :type amount: int
+        :param type: reagent type
+        :type type: str
+        :param name: reagent name
+        :type name: str
+        :param values: attribute values by column
+        :type values: dict
+
+        :returns: flag + created reagents
+        :rtype: bool, list
+    """
+    columns = models.TypeAttributes.objects.columns_as_list(type=type)
+    manipulation = TableManipulation(table=models.Reagents, table_audit_trail=models.ReagentsAuditTrail)
+    dynamic = TableManipulation(table=models.DynamicReagents, table_audit_trail=models.DynamicReagentsAuditTrail)
+    try:
+        with transaction.atomic():
+            created = manipulation.new_identifier_bulk(user=user, prefix='R',
+                                                       records=[{'name': name, 'type': type}] * amount)
+            records = [{'id_main': record['id'], 'type_attribute': column, 'value': values.get(column)}
+                       for record in created for column in columns]
+            if records:
+                dynamic.new_dynamic_bulk(user=user, records=records, main_version=manipulation.version,
+                                         timestamp=manipulation.timestamp)
+            models.Search.objects.index_many(model=models.Reagents, records=created)
+    except NameError as error:
+        return False, str(error)
+    return True, [record['reagent'] for record in created]
+
+
+def get_dialog(dialog, reagent=None, dt=None):
+    """Return the table class rendering the rows of a dialog.
+
+        :param dialog: dialog name as used for export
+        :type dialog: str
+        :param reagent: reagent type for dialog "reagents"
+        :type reagent: str
+        :param dt: client timezone offset
+        :type dt: str
+
+        :returns: table class
+        :rtype: GetStandard
+    """
+    if dialog == 'home':
+        return GetView(table=models.RTD)
+    elif dialog == 'overview':
+        return GetView(table=models.Overview)
+    elif dialog == 'reagents':
+        return GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type=reagent)
+    elif dialog.endswith('_log'):
+        return GetLog(table=models.TABLES[dialog], dt=dt)
+    return GetStandard(table=models.TABLES[dialog], dt=dt)
+
+
+def first_page(context, get_standard):
+    # first page of verified rows, further pages are loaded by the browser
+    context['query'], cursor = get_standard.page()
+    context['cursor'] = json.dumps(cursor, cls=DjangoJSONEncoder)
+    context['columns'] = json.dumps(get_standard.columns)
+    return context
+
+
 def html_and_data(context, get_standard, get_audit_trail, form_render_new, form_render_edit):
     # html data
     context['modal_js_get'] = get_standard.js_get
@@ -1534,7 +2144,7 @@ def html_and_data(context, get_standard, get_audit_trail, form_render_new, form_
     context['header'] = get_standard.html_header
     context['header_audit_trail'] = get_audit_trail.html_header
     # pass verified query
-    context['query'] = get_standard.get()
-    context['reagents'] = models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True)
-    context['samples'] = models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)
+    context = first_page(context=context, get_standard=get_standard)
+    context['reagents'] = models.Types.objects.types(affiliation='Reagents')
+    context['samples'] = models.Types.objects.types(affiliation='Samples')
     return context
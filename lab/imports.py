@@ -0,0 +1,275 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import abc
+import csv
+import logging
+import itertools
+
+# django imports
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.cache import cache
+
+# app imports
+import lab.models as models
+import lab.framework as framework
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+def progress_key(user, token):
+    return 'import:{}:{}'.format(user, token)
+
+
+def progress(user, token):
+    """Return the progress of an import.
+
+        :param user: user id/name
+        :type user: str
+        :param token: token of the import passed by the client
+        :type token: str
+
+        :returns: imported rows, finished flag and errors or None for unknown imports
+        :rtype: dict
+    """
+    return cache.get(progress_key(user, token))
+
+
+class Import(metaclass=abc.ABCMeta):
+    """Streaming CSV import of master data records with generated identifiers.
+
+    Rows are read, validated and written in chunks within one transaction, a file with invalid rows is not
+    imported at all. Checksums of records and audit trail records are generated as one batch per chunk.
+    """
+    prefix = None
+    table = None
+    table_audit_trail = None
+    # invalid rows reported before the import stops
+    max_errors = 50
+
+    def __init__(self, user, token=None):
+        self.user = user
+        self.token = token
+        self.manipulation = framework.TableManipulation(table=self.table, table_audit_trail=self.table_audit_trail)
+        self.unique = self.manipulation.unique
+        self.rows = 0
+        self.errors = list()
+
+    @property
+    def fields(self):
+        # csv fields, the identifier is generated
+        return [field for field in self.manipulation.header if field != self.unique]
+
+    @abc.abstractmethod
+    def clean(self, row):
+        """Validate one csv row.
+
+            :param row: csv values by lower case column name
+            :type row: dict
+
+            :returns: table fields
+            :rtype: dict
+        """
+
+    def write(self, records, timestamp):
+        """Write one chunk of validated records with their audit trail.
+
+            :param records: table fields per record
+            :type records: list
+            :param timestamp: timestamp of all records
+            :type timestamp: datetime
+
+            :returns: written records with primary key
+            :rtype: list
+        """
+        return self.manipulation.new_identifier_bulk(user=self.user, prefix=self.prefix, records=records,
+                                                     timestamp=timestamp)
+
+    def index(self, records):
+        if self.table in models.SEARCH_TABLES:
+            models.Search.objects.index_many(model=self.table, records=records)
+
+    def report(self, finished=False):
+        if self.token:
+            cache.set(progress_key(self.user, self.token),
+                      {'rows': self.rows, 'finished': finished, 'errors': self.errors}, timeout=3600)
+
+    @staticmethod
+    def read(reader, size):
+        """Read rows of the csv file, undecodable or malformed content is reported like an invalid row.
+
+            :param reader: csv reader
+            :type reader: _csv.reader
+            :param size: number of rows
+            :type size: int
+
+            :returns: rows
+            :rtype: list
+        """
+        try:
+            return list(itertools.islice(reader, size))
+        except UnicodeDecodeError:
+            # decoded in blocks, the line is unknown
+            raise ValueError('File is not UTF-8 encoded.')
+        except csv.Error as error:
+            raise ValueError('Line {}: {}'.format(reader.line_num, error))
+
+    def failed(self):
+        self.rows = 0
+        self.report(finished=True)
+        message = 'File has not been imported, {} invalid rows.'.format(len(self.errors))
+        log.info(message)
+        return False, message
+
+    def run(self, stream):
+        """Import a csv file.
+
+            :param stream: text stream of the csv file, semicolon separated with a header line
+            :type stream: io.TextIOBase
+
+            :returns: flag + message
+            :rtype: bool, str
+        """
+        reader = csv.reader(stream, delimiter=';')
+        try:
+            first = self.read(reader, 1)
+        except ValueError as error:
+            self.errors.append(str(error))
+            return self.failed()
+        if not first:
+            return False, 'File is empty.'
+        # column names like in exports
+        header = [column.strip().lower().replace(' ', '_') for column in first[0]]
+        missing = [field for field in self.fields if field not in header]
+        if missing:
+            return False, 'Column "{}" is missing.'.format(missing[0])
+        timestamp = timezone.now()
+        line = 1
+        with transaction.atomic():
+            while True:
+                try:
+                    chunk = self.read(reader, settings.IMPORT_CHUNK_SIZE)
+                except ValueError as error:
+                    self.errors.append(str(error))
+                    break
+                if not chunk:
+                    break
+                records = list()
+                for values in chunk:
+                    line += 1
+                    try:
+                        # short rows are filled up with empty values
+                        records.append(self.clean(dict(zip(header, values + [''] * (len(header) - len(values))))))
+                    except ValueError as error:
+                        self.errors.append('Line {}: {}'.format(line, error))
+                if len(self.errors) >= self.max_errors:
+                    break
+                # keep validating the file, but do not write anything once a row is invalid
+                if not self.errors:
+                    self.index(self.write(records=records, timestamp=timestamp))
+                    self.rows += len(records)
+                self.report()
+            if self.errors:
+                transaction.set_rollback(True)
+        if self.errors:
+            return self.failed()
+        self.report(finished=True)
+        message = '{} records have been imported to "{}" by "{}".'.format(self.rows, self.manipulation.table_name,
+                                                                          self.user)
+        log.info(message)
+        return True, message
+
+
+class LocationsImport(Import):
+    prefix = 'L'
+    table = models.Locations
+    table_audit_trail = models.LocationsAuditTrail
+
+    def __init__(self, user, token=None):
+        super().__init__(user=user, token=token)
+        # reference data read once per import
+        self.conditions = {row.condition for row in models.Conditions.objects.cached}
+
+    def clean(self, row):
+        name = row['name'].strip()
+        if len(name) > models.UNIQUE_LENGTH:
+            raise ValueError('Name exceeds {} characters.'.format(models.UNIQUE_LENGTH))
+        if row['condition'] not in self.conditions:
+            raise ValueError('Condition "{}" does not exist.'.format(row['condition']))
+        max_boxes = row['max_boxes'].strip()
+        if max_boxes and (not max_boxes.isdigit() or int(max_boxes) < 1):
+            raise ValueError('Max boxes must be a positive number.')
+        return {'name': name, 'condition': row['condition'], 'max_boxes': max_boxes}
+
+
+class ReagentsImport(Import):
+    prefix = 'R'
+    table = models.Reagents
+    table_audit_trail = models.ReagentsAuditTrail
+
+    def __init__(self, user, token=None, type=None):
+        super().__init__(user=user, token=token)
+        if models.Types.objects.get_affiliation(type=type) != 'Reagents':
+            raise ValueError('Reagent type "{}" does not exist.'.format(type))
+        self.type = type
+        # reference data read once per import
+        self.attributes = models.TypeAttributes.objects.attributes(type=type)
+        self.dynamic = framework.TableManipulation(table=models.DynamicReagents,
+                                                   table_audit_trail=models.DynamicReagentsAuditTrail)
+
+    @property
+    def fields(self):
+        return ['name'] + [attribute.column for attribute in self.attributes if attribute.mandatory]
+
+    def clean(self, row):
+        name = row['name'].strip()
+        if len(name) > models.UNIQUE_LENGTH:
+            raise ValueError('Name exceeds {} characters.'.format(models.UNIQUE_LENGTH))
+        values = dict()
+        for attribute in self.attributes:
+            value = (row.get(attribute.column) or '').strip() or attribute.default_value
+            if attribute.mandatory and not value:
+                raise ValueError('Field "{}" is mandatory.'.format(attribute.column))
+            if value and attribute.list_values and value not in attribute.list_values.split(','):
+                raise ValueError('Value "{}" is not allowed for field "{}".'.format(value, attribute.column))
+            if len(value) > models.DEFAULT:
+                raise ValueError('Field "{}" exceeds {} characters.'.format(attribute.column, models.DEFAULT))
+            values[attribute.column] = value
+        return {'name': name, 'type': self.type, 'values': values}
+
+    def write(self, records, timestamp):
+        values = [record.pop('values') for record in records]
+        written = super().write(records=records, timestamp=timestamp)
+        records = [{'id_main': record['id'], 'type_attribute': attribute.column, 'value': _values[attribute.column]}
+                   for record, _values in zip(written, values) for attribute in self.attributes]
+        if records:
+            self.dynamic.new_dynamic_bulk(user=self.user, records=records, main_version=self.manipulation.version,
+                                          timestamp=timestamp)
+        return written
+
+
+# dialogs with an import
+IMPORTS = {
+    'locations': LocationsImport,
+    'reagents': ReagentsImport,
+}
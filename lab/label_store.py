@@ -0,0 +1,178 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# django imports
+from django.conf import settings
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+def key(*parameters):
+    """Key of a label from all parameters its content depends on.
+
+        :param parameters: render parameters
+        :type parameters: str/int
+
+        :returns: hex digest
+        :rtype: str
+    """
+    return hashlib.sha256(';'.join(str(x) for x in parameters).encode()).hexdigest()
+
+
+class LabelStore(object):
+    """PDF labels stored by key on disk, evicted by age and total size. Hot labels are kept in memory."""
+    # seconds between two evictions started by storing labels
+    sweep_interval = 60
+
+    def __init__(self, path, size, age, memory):
+        self.path = path
+        self.size = size
+        self.age = age
+        self.memory = memory
+        self._hot = OrderedDict()
+        self._hot_size = 0
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+
+    def file(self, _key):
+        # two character sub directories keep directory listings short
+        return os.path.join(self.path, _key[:2], '{}.pdf'.format(_key))
+
+    def get(self, _key):
+        """Return a stored label.
+
+            :param _key: label key
+            :type _key: str
+
+            :returns: PDF content or None if not stored
+            :rtype: bytes
+        """
+        path = self.file(_key)
+        with self._lock:
+            data = self._hot.get(_key)
+            if data is not None:
+                self._hot.move_to_end(_key)
+        if data is not None:
+            # other processes only see the file, its last use decides eviction
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # evicted meanwhile, restore it for the url handed out to other processes
+                self.write(path, data)
+            return data
+        try:
+            with open(path, 'rb') as pdf_file:
+                data = pdf_file.read()
+            # last use decides eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self.remember(_key, data)
+        return data
+
+    def put(self, _key, data):
+        """Store a label.
+
+            :param _key: label key
+            :type _key: str
+            :param data: PDF content
+            :type data: bytes
+        """
+        self.write(self.file(_key), data)
+        self.remember(_key, data)
+        if time.monotonic() - self._swept > self.sweep_interval:
+            self.evict()
+
+    @staticmethod
+    def write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # readers never see half written files
+        temp = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temp, 'wb') as pdf_file:
+            pdf_file.write(data)
+        os.replace(temp, path)
+
+    def remember(self, _key, data):
+        if len(data) > self.memory:
+            return
+        with self._lock:
+            if _key in self._hot:
+                self._hot.move_to_end(_key)
+                return
+            self._hot[_key] = data
+            self._hot_size += len(data)
+            while self._hot_size > self.memory:
+                old_key, old_data = self._hot.popitem(last=False)
+                self._hot_size -= len(old_data)
+
+    def evict(self):
+        """Delete labels unused for longer than the maximum age, then the least recently used above the maximum size.
+
+            :returns: number of deleted labels
+            :rtype: int
+        """
+        self._swept = time.monotonic()
+        files = list()
+        for root, dirs, names in os.walk(self.path):
+            for name in names:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for mtime, size, path in files)
+        expired = time.time() - self.age
+        deleted = 0
+        for mtime, size, path in files:
+            if mtime > expired and total <= self.size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        if deleted:
+            log.info('{} labels have been evicted from the label store.'.format(deleted))
+        return deleted
+
+
+@lru_cache(maxsize=None)
+def store():
+    """Return the label store configured in the settings, one per process.
+
+        :returns: label store
+        :rtype: LabelStore
+    """
+    return LabelStore(path=settings.LABEL_STORE_DIR, size=settings.LABEL_STORE_SIZE * 1024 * 1024,
+                      age=settings.LABEL_STORE_AGE, memory=settings.LABEL_STORE_MEMORY * 1024 * 1024)
@@ -0,0 +1,83 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import time
+
+# django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# app imports
+import lab.models as models
+import lab.checksums as checksums
+import lab.framework as framework
+
+
+class Command(BaseCommand):
+    help = 'Compare per row checksum verification with the batch verification engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', nargs='?', help='Table to benchmark, e.g. "locations".')
+        parser.add_argument('--rows', type=int, default=0,
+                            help='Benchmark the passed number of generated rows instead of a table.')
+        parser.add_argument('--workers', type=int, default=settings.CHECKSUM_WORKERS,
+                            help='Worker processes of the batch engine (0 for cpu count).')
+
+    def pairs(self, table, rows):
+        if rows:
+            _return = list()
+            for x in range(rows):
+                to_hash = 'field:{};{}'.format(x, settings.SECRET)
+                _return.append((to_hash, checksums.generate(to_hash=to_hash)))
+            return _return
+        if table not in models.TABLES:
+            raise CommandError('Table "{}" does not exist. Choose one of: {}.'
+                               .format(table, ', '.join(sorted(models.TABLES))))
+        get_standard = framework.GetStandard(table=models.TABLES[table])
+        header = get_standard.header
+        return [(get_standard.to_verify(row=row, header=header), row['checksum']) for row in get_standard.query()]
+
+    def handle(self, *args, **options):
+        if not options['table'] and not options['rows']:
+            raise CommandError('Pass a table or the number of generated rows.')
+        pairs = self.pairs(table=options['table'], rows=options['rows'])
+        if not pairs:
+            raise CommandError('Nothing to benchmark.')
+
+        # current path: one verification call per row
+        start = time.perf_counter()
+        per_row = [checksums.verify(to_verify=to_verify, checksum=checksum) for to_verify, checksum in pairs]
+        duration_per_row = time.perf_counter() - start
+
+        # batch path: one call for all rows spread over the process pool
+        engine = checksums.ProcessEngine(workers=options['workers'])
+        # start the pool before measuring
+        engine.verify_many(pairs[:engine.threshold])
+        start = time.perf_counter()
+        batch = engine.verify_many(pairs)
+        duration_batch = time.perf_counter() - start
+
+        if per_row != batch:
+            raise CommandError('Batch verification result differs from per row verification.')
+        for name, duration in (('per row', duration_per_row), ('batch', duration_batch)):
+            self.stdout.write('{:<8} {:>8} rows {:>9.3f} s {:>10.1f} rows/s'.format(
+                name, len(pairs), duration, len(pairs) / duration if duration else 0))
+        self.stdout.write('speedup {:.1f}x with {} workers, {} invalid rows'.format(
+            duration_per_row / duration_batch if duration_batch else 0, engine.workers, per_row.count(False)))
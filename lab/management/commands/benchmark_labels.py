@@ -0,0 +1,84 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import time
+import tempfile
+import svgwrite
+from svglib.svglib import svg2rlg
+from reportlab.graphics import renderPDF
+from reportlab.pdfgen import canvas
+
+# django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# app imports
+import lab.barcodes as barcodes
+import lab.framework as framework
+
+
+class Command(BaseCommand):
+    help = 'Compare label rendering via SVG with drawing the PDF directly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--labels', type=int, default=200, help='Number of labels to render.')
+
+    def legacy(self, label, unique, path):
+        # code tables read per label, one SVG line per module, SVG converted to PDF
+        label._code = barcodes.Code128(settings.FILES_DIR).encode(unique)
+        svg = os.path.join(path, '{}.svg'.format(unique))
+        dwg = svgwrite.Drawing(filename=svg, size=(label.width, label.height))
+        dwg.add(dwg.rect(insert=(0, 0), size=('100%', '100%'), fill='white'))
+        dwg.add(dwg.text(unique, insert=(label.margin + 50, label.margin + 100), font_size=label.font_size,
+                         font_family=label.font_family, font_weight="bold"))
+        left = (label.width - len(label.code) * label.bar) / 2
+        for idx, y in enumerate(label.code):
+            dwg.add(dwg.line(start=(left + idx * label.bar, label.margin + 170),
+                             end=(left + idx * label.bar, label.height - label.margin),
+                             stroke='white' if y == '0' else 'black', stroke_width=label.bar))
+        dwg.save()
+        renderPDF.drawToFile(svg2rlg(svg), os.path.join(path, '{}_legacy.pdf'.format(unique)))
+
+    def direct(self, label, unique, path):
+        pdf = canvas.Canvas(os.path.join(path, '{}.pdf'.format(unique)),
+                            pagesize=(label.point(label.width), label.point(label.height)))
+        label.draw(pdf, unique)
+        pdf.showPage()
+        pdf.save()
+
+    def handle(self, *args, **options):
+        if options['labels'] < 1:
+            raise CommandError('Number of labels must be positive.')
+        uniques = ['B{:06d}'.format(x) for x in range(options['labels'])]
+        label = framework.Labels()
+        # load the encoder before measuring
+        barcodes.encoder()
+        durations = list()
+        with tempfile.TemporaryDirectory() as path:
+            for render in (self.legacy, self.direct):
+                start = time.perf_counter()
+                for unique in uniques:
+                    render(label, unique, path)
+                durations.append(time.perf_counter() - start)
+        for name, duration in zip(('svg', 'direct'), durations):
+            self.stdout.write('{:<8} {:>8} labels {:>9.3f} s {:>10.1f} labels/s'.format(
+                name, len(uniques), duration, len(uniques) / duration if duration else 0))
+        self.stdout.write('speedup {:.1f}x'.format(durations[0] / durations[1] if durations[1] else 0))
@@ -0,0 +1,39 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import logging
+
+# django imports
+from django.core.management.base import BaseCommand
+
+# app imports
+import lab.label_store as label_store
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Evict labels from the label store by age and total size.'
+
+    def handle(self, *args, **options):
+        message = '{} labels have been evicted.'.format(label_store.store().evict())
+        log.info(message)
+        self.stdout.write(message)
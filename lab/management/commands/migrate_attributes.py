@@ -0,0 +1,44 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import logging
+
+# django imports
+from django.core.management.base import BaseCommand
+
+# app imports
+import lab.models as models
+from lab.management.commands.rebuild_overview import execute_script
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Create the jsonb attributes of all reagents from their dynamic records and the gin index.'
+
+    def handle(self, *args, **options):
+        execute_script('attributes.sql')
+        message = 'Attributes of {} reagents have been migrated to jsonb.'.format(
+            models.ReagentAttributes.objects.count())
+        log.info(message)
+        self.stdout.write(message)
+        if not models.ReagentAttributes.objects.enabled:
+            self.stdout.write('Set ATTRIBUTE_STORAGE to "jsonb" to read and filter reagent attributes from jsonb.')
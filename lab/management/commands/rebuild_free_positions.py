@@ -0,0 +1,41 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import logging
+
+# django imports
+from django.core.management.base import BaseCommand
+
+# app imports
+import lab.models as models
+from lab.management.commands.rebuild_overview import execute_script
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Re-derive the free positions per box from boxes and boxing.'
+
+    def handle(self, *args, **options):
+        execute_script('free_positions_rebuild.sql')
+        message = 'Free positions have been rebuilt for {} boxes.'.format(models.FreePositions.objects.count())
+        log.info(message)
+        self.stdout.write(message)
@@ -0,0 +1,57 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import logging
+
+# django imports
+from django.conf import settings
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+
+# app imports
+import lab.models as models
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+def execute_script(file_name):
+    """Execute a script of the postgres directory in one transaction.
+
+        :param file_name: script file name
+        :type file_name: str
+    """
+    with open(os.path.join(settings.BASE_DIR, 'postgres', file_name)) as sql:
+        statements = [statement for statement in sql.read().split(';\n') if statement.strip()]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+class Command(BaseCommand):
+    help = 'Re-derive the overview table from master data, movement log and boxing.'
+
+    def handle(self, *args, **options):
+        execute_script('overview_rebuild.sql')
+        message = 'Overview has been rebuilt with {} records.'.format(models.Overview.objects.count())
+        log.info(message)
+        self.stdout.write(message)
@@ -0,0 +1,57 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import logging
+
+# django imports
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+
+# app imports
+import lab.models as models
+from lab.management.commands.rebuild_overview import execute_script
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Create the search indexes and re-derive all search documents from master data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=1000, help='Records indexed per batch.')
+
+    def handle(self, *args, **options):
+        if options['chunk'] < 1:
+            raise CommandError('Chunk size must be positive.')
+        execute_script('search.sql')
+        with transaction.atomic():
+            models.Search.objects.all().delete()
+            for model in models.SEARCH_TABLES:
+                last_id = 0
+                while True:
+                    records = list(model.objects.filter(id__gt=last_id).order_by('id').values()[:options['chunk']])
+                    if not records:
+                        break
+                    last_id = records[-1]['id']
+                    models.Search.objects.bulk_create(models.Search.objects.documents(model=model, records=records))
+        message = 'Search index has been rebuilt with {} documents.'.format(models.Search.objects.count())
+        log.info(message)
+        self.stdout.write(message)
@@ -0,0 +1,97 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import time
+import logging
+
+# django imports
+from django.conf import settings
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+
+# app imports
+import lab.checksums as checksums
+import lab.framework as framework
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Re-sign the checksums of all tables with the configured checksum algorithm.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', default=settings.CHECKSUM_ALGORITHM,
+                            help='Target algorithm, one of: {}.'.format(', '.join(sorted(checksums.ALGORITHMS))))
+        parser.add_argument('--chunk', type=int, default=1000, help='Rows re-signed per transaction.')
+        parser.add_argument('--workers', type=int, default=settings.CHECKSUM_WORKERS,
+                            help='Worker processes verifying the old checksums (0 for cpu count).')
+
+    def resign(self, model, target, engine, chunk):
+        """Re-sign all rows of a table not yet signed with the target algorithm.
+
+            :returns: re-signed rows, invalid rows as (id, unique) tuples
+            :rtype: int, list
+        """
+        table = model._meta.db_table
+        get = framework.get_checksum_table(model)
+        header = get.header
+        last_id = 0
+        rows = 0
+        invalid = list()
+        while True:
+            query = list(model.objects.filter(id__gt=last_id).order_by('id').values()[:chunk])
+            if not query:
+                break
+            last_id = query[-1]['id']
+            query = [row for row in query if not row['checksum'].startswith(target.prefix)]
+            items = [(get.to_verify(row=row, header=header), row['checksum']) for row in query]
+            results = engine.verify_many(items)
+            with transaction.atomic():
+                for row, item, result in zip(query, items, results):
+                    # tampered rows keep their checksum, a new signature would hide the tampering
+                    if not result:
+                        invalid.append((row['id'], row[get.unique]))
+                        continue
+                    model.objects.filter(id=row['id']).update(checksum=target.generate(to_hash=item[0]))
+                    rows += 1
+            checksums.forget(table=table, uniques=[row['id'] for row in query])
+        return rows, invalid
+
+    def handle(self, *args, **options):
+        if options['algorithm'] not in checksums.ALGORITHMS:
+            raise CommandError('Algorithm "{}" does not exist. Choose one of: {}.'
+                               .format(options['algorithm'], ', '.join(sorted(checksums.ALGORITHMS))))
+        if options['chunk'] < 1:
+            raise CommandError('Chunk size must be positive.')
+        target = checksums.ALGORITHMS[options['algorithm']]
+        engine = checksums.ProcessEngine(workers=options['workers'])
+        for model in framework.checksum_tables():
+            start = time.perf_counter()
+            rows, invalid = self.resign(model=model, target=target, engine=engine, chunk=options['chunk'])
+            duration = time.perf_counter() - start
+            self.stdout.write('{:<40} {:>9} re-signed {:>6} invalid {:>10.1f} rows/s'.format(
+                model._meta.db_table, rows, len(invalid), rows / duration if duration else 0))
+            for id_ref, unique in invalid:
+                message = 'Checksum for "{}" of table "{}" was not correct and has not been re-signed.'. \
+                    format(unique, model._meta.db_table)
+                log.warning(message)
+                self.stderr.write(message)
+        log.info('Checksums have been re-signed with algorithm "{}".'.format(target.name))
@@ -0,0 +1,135 @@
+"""
+turtle-lab.org
+Copyright (C) 2017  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+# python imports
+import os
+import time
+import logging
+
+# django imports
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+# app imports
+import lab.models as models
+import lab.checksums as checksums
+import lab.framework as framework
+
+# define logger
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Verify the checksums of all tables in chunks and store the result per row.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=1000, help='Rows verified per batch.')
+        parser.add_argument('--workers', type=int, default=settings.CHECKSUM_WORKERS,
+                            help='Worker processes for verification (0 for cpu count).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Start from the first row instead of resuming an interrupted sweep.')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and start a new sweep every passed number of seconds.')
+
+    def sweep(self, model, engine, chunk, restart):
+        """Verify one table from the last swept row on.
+
+            :returns: verified rows, invalid rows as (id, unique) tuples
+            :rtype: int, list
+        """
+        table = model._meta.db_table
+        get = framework.get_checksum_table(model)
+        header = get.header
+        cursor, created = models.IntegritySweeps.objects.get_or_create(table=table,
+                                                                       defaults={'started': timezone.now()})
+        if restart or cursor.finished:
+            cursor.last_id = 0
+            cursor.started = timezone.now()
+            cursor.finished = None
+            cursor.save()
+
+        rows = 0
+        invalid = list()
+        while True:
+            query = list(model.objects.filter(id__gt=cursor.last_id).order_by('id').values()[:chunk])
+            if not query:
+                break
+            items = [(row['id'], get.to_verify(row=row, header=header), row['checksum']) for row in query]
+            results = engine.verify_many([(to_verify, checksum) for unique, to_verify, checksum in items])
+            timestamp = timezone.now()
+            records = list()
+            for row, item, result in zip(query, items, results):
+                records.append(models.Integrity(table=table, id_ref=row['id'], valid=result, timestamp=timestamp,
+                                                digest=checksums.digest(to_verify=item[1], checksum=item[2])))
+                if not result:
+                    invalid.append((row['id'], row[get.unique]))
+            with transaction.atomic():
+                models.Integrity.objects.filter(table=table, id_ref__in=[row['id'] for row in query]).delete()
+                models.Integrity.objects.bulk_create(records)
+                cursor.last_id = query[-1]['id']
+                cursor.save()
+            rows += len(query)
+        cursor.finished = timezone.now()
+        cursor.save()
+        return rows, invalid
+
+    def report(self, lines):
+        path = os.path.join(settings.LOG_DIR, 'integrity_{}.log'.format(timezone.now().strftime('%Y%m%d_%H%M%S')))
+        with open(path, 'w') as report:
+            report.write('\n'.join(lines) + '\n')
+        return path
+
+    def run(self, options):
+        engine = checksums.ProcessEngine(workers=options['workers'])
+        lines = ['Integrity sweep started {}.'.format(timezone.now())]
+        total_rows = 0
+        total_start = time.perf_counter()
+        for model in framework.checksum_tables():
+            start = time.perf_counter()
+            rows, invalid = self.sweep(model=model, engine=engine, chunk=options['chunk'],
+                                       restart=options['restart'])
+            duration = time.perf_counter() - start
+            total_rows += rows
+            line = '{:<40} {:>9} rows {:>6} invalid {:>10.1f} rows/s'.format(
+                model._meta.db_table, rows, len(invalid), rows / duration if duration else 0)
+            self.stdout.write(line)
+            lines.append(line)
+            for id_ref, unique in invalid:
+                message = 'Checksum for "{}" of table "{}" was not correct. Data integrity is at risk!'. \
+                    format(unique, model._meta.db_table)
+                log.warning(message)
+                lines.append('    id {}: {}'.format(id_ref, message))
+        duration = time.perf_counter() - total_start
+        line = 'Verified {} rows in {:.1f} s, {:.1f} rows/s with {} workers.'.format(
+            total_rows, duration, total_rows / duration if duration else 0, engine.workers)
+        self.stdout.write(line)
+        lines.append(line)
+        self.stdout.write('Report written to "{}".'.format(self.report(lines)))
+        log.info(line)
+
+    def handle(self, *args, **options):
+        if options['chunk'] < 1:
+            raise CommandError('Chunk size must be positive.')
+        self.run(options)
+        while options['interval']:
+            time.sleep(options['interval'])
+            options['restart'] = False
+            self.run(options)
@@ -18,18 +18,25 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 # python imports
+import copy
+import time
 import logging
+import datetime
 
 # django imports
-from django.db import models
+from django.db import models, connection, transaction, IntegrityError
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
 from django.contrib.auth.models import PermissionsMixin
+from django.contrib.postgres.fields import JSONField
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 
 # app imports
 import lab.custom as custom
+import lab.checksums as checksums
 
 # secret key
 SECRET = settings.SECRET
@@ -53,6 +60,10 @@ DEFAULT = 255
 
 
 class GlobalManager(models.Manager):
+    def forget(self, unique):
+        """Invalidate cached data derived from a record, called after the record has been written."""
+        pass
+
     def version(self, unique):
         dic = {self.unique: unique}
         return self.filter(**dic)[0].version
@@ -70,6 +81,77 @@ class GlobalManager(models.Manager):
         return self.filter(**dic)[0].checksum
 
 
+class ReferenceData(object):
+    """In-process cache of small, rarely changing reference tables, shared by all requests of a process.
+
+    Cached data is valid as long as the generation counter in the shared cache is unchanged. Writes to a reference
+    table bump the counter, so every process reloads the reference tables on its next read.
+    """
+    key = 'reference_data:generation'
+
+    def __init__(self):
+        self.generation = None
+        self.data = dict()
+
+    def current(self):
+        generation = cache.get(self.key)
+        if generation is None:
+            # counter lost with the shared cache, start from the clock to never repeat a generation
+            cache.add(self.key, int(time.time() * 1000), timeout=None)
+            generation = cache.get(self.key)
+        return generation
+
+    def get(self, name, load):
+        """Data of a reference table, loaded once per generation.
+
+            :param name: name of the data
+            :type name: str
+            :param load: function loading the data from the database
+            :type load: function
+
+            :returns: data
+        """
+        generation = self.current()
+        if generation is None:
+            # no shared cache, nothing can be invalidated
+            return load()
+        if generation != self.generation:
+            self.data = dict()
+            self.generation = generation
+        if name in self.data:
+            return self.data[name]
+        _return = load()
+        # data read in a transaction may not be committed
+        if not connection.in_atomic_block:
+            self.data[name] = _return
+        return _return
+
+    def bump(self):
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            self.current()
+
+    def changed(self):
+        # bump again after commit, other processes may have reloaded the uncommitted state in between
+        self.bump()
+        transaction.on_commit(self.bump)
+
+
+reference_data = ReferenceData()
+
+
+class ReferenceManager(GlobalManager):
+    """Manager of a reference table, records are read from the reference data cache."""
+    @property
+    def cached(self):
+        # all records ordered by id
+        return reference_data.get(self.model.__name__, lambda: list(self.order_by('id')))
+
+    def forget(self, unique):
+        reference_data.changed()
+
+
 class GlobalAuditTrailManager(models.Manager):
     def checksum(self, unique):
         return self.filter(id=unique)[0].checksum
@@ -84,7 +166,7 @@ class GlobalAuditTrailManager(models.Manager):
 ###############
 
 # manager
-class ConditionsManager(GlobalManager):
+class ConditionsManager(ReferenceManager):
     @property
     def unique(self):
         return 'condition'
@@ -211,7 +293,7 @@ AFFILIATIONS = (('Reagents', 'Reagents'),
 
 
 # manager
-class TypesManager(GlobalManager):
+class TypesManager(ReferenceManager):
     @property
     def unique(self):
         return 'type'
@@ -224,17 +306,20 @@ class TypesManager(GlobalManager):
     def samples(self):
         return self.filter(affiliation='Samples')
 
+    def types(self, affiliation):
+        return [row.type for row in self.cached if row.affiliation == affiliation]
+
     def get_affiliation(self, type):
-        try:
-            return self.filter(type=type)[0].affiliation
-        except IndexError:
-            return False
+        for row in self.cached:
+            if row.type == type:
+                return row.affiliation
+        return False
 
     def storage_condition(self, type):
-        try:
-            return self.filter(type=type)[0].storage_condition
-        except IndexError:
-            return False
+        for row in self.cached:
+            if row.type == type:
+                return row.storage_condition
+        return False
 
 
 # table
@@ -286,26 +371,24 @@ class TypesAuditTrail(models.Model):
 ###################
 
 # manager
-class TypeAttributesManager(GlobalManager):
+class TypeAttributesManager(ReferenceManager):
     @property
     def unique(self):
         return 'column'
 
+    def attributes(self, type):
+        # cached records, shared by all requests and not to be modified
+        return [row for row in self.cached if row.type == type]
+
     def columns_as_list(self, type):
-        try:
-            return list(self.filter(type=type).order_by('id').values_list('column', flat=True))
-        except IndexError:
-            return list()
+        return [row.column for row in self.attributes(type=type)]
 
     def all_list_exchanged(self, type):
-        try:
-            query = list(self.filter(type=type).order_by('id'))
-            for row in query:
-                if row.list_values:
-                    row.list_values = row.list_values.split(',')
-            return query
-        except IndexError:
-            return list()
+        query = [copy.copy(row) for row in self.attributes(type=type)]
+        for row in query:
+            if row.list_values:
+                row.list_values = row.list_values.split(',')
+        return query
 
 
 # table
@@ -413,6 +496,78 @@ class DynamicReagentsAuditTrail(models.Model):
     objects = DynamicReagentsAuditTrailManager()
 
 
+# manager
+class ReagentAttributesManager(GlobalManager):
+    @property
+    def unique(self):
+        return 'id_main'
+
+    @property
+    def enabled(self):
+        return settings.ATTRIBUTE_STORAGE == 'jsonb'
+
+    def refresh(self, ids):
+        """Re-derive the jsonb attributes of reagents from their dynamic records, if jsonb storage is enabled. Runs
+        in the transaction writing the dynamic records.
+
+            :param ids: reagent ids
+            :type ids: list
+        """
+        if not self.enabled:
+            return
+        # concurrent edits of the same reagents derive one after another, each from committed records
+        list(Reagents.objects.select_for_update().filter(id__in=set(ids)).order_by('id').values_list('id', flat=True))
+        _return = {id_main: self.model(id_main=id_main, attributes=dict(), rows=dict()) for id_main in set(ids)}
+        for row in DynamicReagents.objects.filter(id_main__in=list(_return)).order_by('id').values():
+            _return[row['id_main']].attributes[row['type_attribute']] = row['value']
+            _return[row['id_main']].rows[row['type_attribute']] = [row['id'], row['checksum']]
+        self.filter(id_main__in=list(_return)).delete()
+        self.bulk_create(_return.values())
+
+    def mismatched(self, ids, rows):
+        """Reagents whose jsonb attributes differ from their signed dynamic records, a missing document of a reagent
+        with dynamic records included.
+
+            :param ids: reagent ids
+            :type ids: list
+            :param rows: dynamic records of the reagents as dicts like DynamicReagents values
+            :type rows: list
+
+            :returns: reagent ids
+            :rtype: set
+        """
+        expected = {id_main: (dict(), dict()) for id_main in ids}
+        for row in rows:
+            expected[row['id_main']][0][row['type_attribute']] = row['value']
+            expected[row['id_main']][1][row['type_attribute']] = [row['id'], row['checksum']]
+        stored = {id_main: (attributes, _rows) for id_main, attributes, _rows in
+                  self.filter(id_main__in=list(expected)).values_list('id_main', 'attributes', 'rows')}
+        return {id_main for id_main, document in expected.items() if stored.get(id_main, (dict(), dict())) != document}
+
+    def matching(self, type_attribute, value):
+        # containment lookup, served by the gin index of postgres/attributes.sql
+        return self.filter(attributes__contains={type_attribute: value}).values('id_main')
+
+
+# table
+class ReagentAttributes(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    id_main = models.IntegerField(unique=True)
+    # attribute values by type attribute, derived from the dynamic records
+    attributes = JSONField(default=dict)
+    # id and checksum of the dynamic record per type attribute, to verify without reading the dynamic records
+    rows = JSONField(default=dict)
+    # manager
+    objects = ReagentAttributesManager()
+
+    class Meta:
+        db_table = 'reagent_attributes'
+
+    def __str__(self):
+        return str(self.id_main)
+
+
 #############
 # BOX TYPES #
 #############
@@ -423,7 +578,7 @@ BOX_ALIGNMENT = (('Horizontal', 'Horizontal'),
 
 
 # manager
-class BoxTypesManager(GlobalManager):
+class BoxTypesManager(ReferenceManager):
     @property
     def unique(self):
         return 'box_type'
@@ -433,11 +588,29 @@ class BoxTypesManager(GlobalManager):
         dic = {'default': True}
         return self.filter(**dic)
 
+    def layout(self, unique):
+        """Layout of a box type, cached until the box type is edited or deleted.
+
+            :param unique: box type
+            :type unique: str
+
+            :returns: box layout
+            :rtype: custom.BoxLayout
+        """
+        key = 'box_layout:{}'.format(unique)
+        figures = cache.get(key)
+        if figures is None:
+            dic = {self.unique: unique}
+            figures = self.filter(**dic).values_list('alignment', 'columns', 'rows')[0]
+            cache.set(key, figures, timeout=settings.LAYOUT_CACHE_TIMEOUT)
+        return custom.box_layout(*figures)
+
+    def forget(self, unique):
+        super().forget(unique)
+        cache.delete('box_layout:{}'.format(unique))
+
     def max(self, unique):
-        dic = {self.unique: unique}
-        rows = custom.transform_box_type_figures(self.filter(**dic)[0].rows)
-        columns = custom.transform_box_type_figures(self.filter(**dic)[0].columns)
-        return rows * columns
+        return self.layout(unique).size
 
 
 # table
@@ -503,6 +676,10 @@ class BoxesManager(GlobalManager):
         except IndexError:
             return 0
 
+    def layout(self, unique):
+        dic = {self.unique: unique}
+        return BoxTypes.objects.layout(self.filter(**dic)[0].box_type)
+
     def box_by_type(self, type, count=0):
         try:
             return self.filter(type=type).order_by('box')[count].__str__()
@@ -788,6 +965,9 @@ class MovementLog(models.Model):
     # manager
     objects = MovementLogManager()
 
+    class Meta:
+        indexes = [models.Index(fields=['object', '-timestamp'])]
+
     def __str__(self):
         return self.object
 
@@ -803,22 +983,6 @@ class RTDManager(GlobalManager):
     def unique(self):
         return 'object'
 
-    def location(self, unique):
-        try:
-            return Locations.objects.filter(location=self.filter(object=unique)[0].location)[0].__str__()
-        except IndexError:
-            return '---'
-
-    def method(self, unique):
-        return self.filter(object=unique)[0].type
-
-    def box(self, unique):
-        return self.filter(object=unique)[0].box
-
-    def validate_location(self, box, sample):
-        if self.filter(object=box)[0].location != self.filter(object=sample)[0].location:
-            return True
-
 
 # table
 class RTD(models.Model):
@@ -885,22 +1049,65 @@ class OverviewManager(GlobalManager):
         except IndexError:
             return False
 
+    # write paths keeping the table in line with movement and boxing logs
+    def register(self, unique, affiliation, type):
+        self.create(object=unique, affiliation=affiliation, type=type)
+
+    def register_many(self, items, affiliation):
+        # (unique, type) tuples of records created in bulk
+        self.bulk_create([self.model(object=unique, affiliation=affiliation, type=type) for unique, type in items])
+
+    def set_type(self, unique, type):
+        self.filter(object=unique).update(type=type)
+
+    def set_location(self, unique, location):
+        # boxed objects travel with their box
+        self.filter(models.Q(object=unique) | models.Q(box=unique)).update(location=location)
+
+    def set_locations(self, boxes, location):
+        # boxes with their contents
+        self.filter(models.Q(object__in=boxes) | models.Q(box__in=boxes)).update(location=location)
+
+    def unsuitable(self, boxes, location):
+        """Objects in boxes whose type requires another storage condition than the location, one query.
+
+            :param boxes: boxes
+            :type boxes: list
+            :param location: target location
+            :type location: str
+
+            :returns: unsuitable objects
+            :rtype: list
+        """
+        condition = Locations.objects.filter(location=location).values('condition')[:1]
+        suitable = Types.objects.filter(storage_condition=models.Subquery(condition)).values('type')
+        return list(self.filter(box__in=boxes).exclude(type__in=suitable).values_list('object', flat=True))
+
+    def set_box(self, unique, box, position):
+        location = self.filter(object=box).values('location')[:1]
+        self.filter(object=unique).update(box=box, position=position, location=models.Subquery(location))
+
+    def clear(self, box, position):
+        self.filter(box=box, position=position).update(box=None, position=None)
+
+    def remove(self, unique):
+        self.filter(object=unique).delete()
+
 
 # table
 class Overview(models.Model):
-    id = models.BigIntegerField(primary_key=True)
-    object = models.CharField(max_length=UNIQUE_LENGTH)
+    id = models.BigAutoField(primary_key=True)
+    object = models.CharField(max_length=UNIQUE_LENGTH, unique=True)
     affiliation = models.CharField(max_length=UNIQUE_LENGTH)
     type = models.CharField(max_length=UNIQUE_LENGTH)
-    location = models.CharField(max_length=UNIQUE_LENGTH)
-    box = models.CharField(max_length=UNIQUE_LENGTH)
-    position = models.CharField(max_length=UNIQUE_LENGTH)
+    location = models.CharField(max_length=UNIQUE_LENGTH, null=True, db_index=True)
+    box = models.CharField(max_length=UNIQUE_LENGTH, null=True, db_index=True)
+    position = models.CharField(max_length=UNIQUE_LENGTH, null=True)
 
     # manager
     objects = OverviewManager()
 
     class Meta:
-        managed = False
         db_table = 'overview'
 
     def __str__(self):
@@ -985,6 +1192,174 @@ class Boxing(models.Model):
     # manager
     objects = BoxingManager()
 
+    class Meta:
+        indexes = [models.Index(fields=['box', 'object'])]
+
+    def __str__(self):
+        return self.object
+
+
+# manager
+class FreePositionsManager(GlobalManager):
+    @property
+    def unique(self):
+        return 'box'
+
+    def register(self, box, type, free):
+        self.create(box=box, type=type, free=free)
+
+    def register_many(self, items, free):
+        # boxes created in bulk, (box, type) tuples
+        self.bulk_create([self.model(box=box, type=type, free=free) for box, type in items])
+
+    def set_type(self, box, type):
+        self.filter(box=box).update(type=type)
+
+    def refresh(self, box):
+        self.filter(box=box).update(free=Boxing.objects.filter(box=box, object='').count())
+
+    def remove(self, box):
+        self.filter(box=box).delete()
+
+    def next_positions(self, type, amount=1, lock=False):
+        """Next free and unreserved positions for objects of a type, dedicated boxes first, then mixed boxes.
+
+            :param type: type of the object to box
+            :type type: str
+            :param amount: number of positions
+            :type amount: int
+            :param lock: lock the boxing rows of the positions, rows locked by others are skipped
+            :type lock: bool
+
+            :returns: positions with boxing id, box, box name, position, location and location name
+            :rtype: list
+        """
+        sql = """SELECT x.id, x.box, b.name, x.position, l.location, l.name
+            FROM {free} f
+                JOIN {boxing} x ON x.box = f.box AND x.object = ''
+                JOIN {boxes} b ON b.box = f.box
+                LEFT JOIN overview o ON o.object = f.box
+                LEFT JOIN {locations} l ON l.location = o.location
+            WHERE f.type IN (%(type)s, '') AND f.free > 0
+                AND NOT EXISTS (SELECT 1 FROM {reservations} r WHERE r.boxing = x.id AND r.expires > %(now)s)
+            ORDER BY f.type = '', f.box, x.id
+            LIMIT %(amount)s""".format(free=self.model._meta.db_table, boxing=Boxing._meta.db_table,
+                                       boxes=Boxes._meta.db_table, locations=Locations._meta.db_table,
+                                       reservations=Reservations._meta.db_table)
+        if lock:
+            sql += ' FOR UPDATE OF x SKIP LOCKED'
+        keys = ['boxing', 'box', 'box_name', 'position', 'location', 'location_name']
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'type': type or '', 'amount': amount, 'now': timezone.now()})
+            return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+# table
+class FreePositions(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    # custom fields
+    box = models.CharField(max_length=UNIQUE_LENGTH, unique=True)
+    # type of the box, empty for mixed boxes
+    type = models.CharField(max_length=UNIQUE_LENGTH)
+    free = models.IntegerField()
+    # manager
+    objects = FreePositionsManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['type', 'box'])]
+
+    def __str__(self):
+        return self.box
+
+
+# manager
+class ReservationsManager(GlobalManager):
+    # attempts after colliding with a concurrent reservation
+    attempts = 3
+
+    @property
+    def unique(self):
+        return 'boxing'
+
+    def active(self):
+        return self.filter(expires__gt=timezone.now())
+
+    def reserve(self, type, object, user, amount=1):
+        """Hold the next free positions for an object until the reservation expires.
+
+            Positions are taken from the free positions index, their boxing rows are locked with FOR UPDATE SKIP
+            LOCKED, concurrent reservations take the next rows instead of waiting. The unique boxing id of a
+            reservation catches rows read before a concurrent reservation has been committed, the reservation is
+            retried then.
+
+            :param type: type of the object to box
+            :type type: str
+            :param object: object to box
+            :type object: str
+            :param user: user id/name
+            :type user: str
+            :param amount: number of positions
+            :type amount: int
+
+            :returns: reservations, dedicated boxes first, then mixed boxes
+            :rtype: list
+        """
+        for attempt in range(self.attempts):
+            try:
+                with transaction.atomic():
+                    now = timezone.now()
+                    self.filter(expires__lte=now).delete()
+                    expires = now + datetime.timedelta(seconds=settings.RESERVATION_TIMEOUT)
+                    return [self.create(boxing=slot['boxing'], box=slot['box'], position=slot['position'],
+                                        object=object, user=user, expires=expires)
+                            for slot in FreePositions.objects.next_positions(type=type, amount=amount, lock=True)]
+            except IntegrityError:
+                log.info('Reservation for "{}" collided, attempt {}.'.format(object, attempt + 1))
+        return list()
+
+    def held(self, object):
+        """Active reservations of an object on positions that are still free. Boxing without the overview ignores
+        reservations, holds on positions occupied meanwhile are released.
+
+            :param object: reserving object
+            :type object: str
+
+            :returns: reservations
+            :rtype: list
+        """
+        held = list(self.active().filter(object=object).order_by('id'))
+        free = set(Boxing.objects.filter(id__in=[reservation.boxing for reservation in held], object='')
+                   .values_list('id', flat=True))
+        stale = [reservation.id for reservation in held if reservation.boxing not in free]
+        if stale:
+            self.filter(id__in=stale).delete()
+        return [reservation for reservation in held if reservation.boxing in free]
+
+    def holder(self, box, position):
+        try:
+            return self.active().filter(box=box, position=position)[0].object
+        except IndexError:
+            return None
+
+    def release(self, object):
+        self.filter(object=object).delete()
+
+
+# table
+class Reservations(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    # custom fields
+    boxing = models.IntegerField(unique=True)
+    box = models.CharField(max_length=UNIQUE_LENGTH)
+    position = models.CharField(max_length=UNIQUE_LENGTH)
+    object = models.CharField(max_length=UNIQUE_LENGTH, db_index=True)
+    user = models.CharField(max_length=UNIQUE_LENGTH)
+    expires = models.DateTimeField(db_index=True)
+    # manager
+    objects = ReservationsManager()
+
     def __str__(self):
         return self.object
 
@@ -1045,19 +1420,36 @@ PERMISSIONS = (
 
 
 # manager
-class RolesManager(GlobalManager):
+class RolesManager(ReferenceManager):
     @property
     def unique(self):
         return 'role'
 
     def permission(self, role, permission):
-        if permission in self.filter(role=role)[0].permissions.split(','):
-            return True
-        else:
-            return False
+        return permission in self.permissions(role=role)
 
     def permissions(self, role):
-        return self.filter(role=role)[0].permissions.split(',')
+        """Permissions of a role, cached until the role is edited or deleted.
+
+            :param role: role
+            :type role: str
+
+            :returns: permissions
+            :rtype: frozenset
+        """
+        key = 'permissions:{}'.format(role)
+        _return = cache.get(key)
+        if _return is None:
+            try:
+                _return = frozenset(self.filter(role=role).values_list('permissions', flat=True)[0].split(','))
+            except IndexError:
+                _return = frozenset()
+            cache.set(key, _return, timeout=settings.PERMISSIONS_CACHE_TIMEOUT)
+        return _return
+
+    def forget(self, unique):
+        super().forget(unique)
+        cache.delete('permissions:{}'.format(unique))
 
 
 # table
@@ -1127,7 +1519,7 @@ class UsersManager(BaseUserManager, GlobalManager):
             to_hash = 'username:{};first_name:{};last_name:{};role:{};is_active:{};' \
                       'initial_password:{};password:{};version:{};{}'\
                 .format(username, first_name, last_name, role, is_active, True, user.password, 1, SECRET)
-            user.checksum = custom.generate_checksum(to_hash)
+            user.checksum = checksums.generate(to_hash)
             user.save(using=self._db)
             # success message + log entry
             message = 'Record "{}" has been created.'.format(username)
@@ -1167,7 +1559,7 @@ class UsersManager(BaseUserManager, GlobalManager):
                       'initial_password:{};password:{};version:{};{}'\
                 .format(username, first_name, last_name, role, is_active,
                         initial_password, user.password, version, SECRET)
-            user.checksum = custom.generate_checksum(to_hash)
+            user.checksum = checksums.generate(to_hash)
             user.save(using=self._db)
             # success message + log entry
             message = 'Record "{}" has been updated.'.format(username)
@@ -1258,9 +1650,10 @@ class Users(AbstractBaseUser):
         return '{}'.format(self.username)
 
     def permission(self, permission):
-        return Roles.objects.permission(role=self.role, permission=permission)
+        return permission in self.permissions
 
-    @property
+    # resolved once per request, request.user is loaded for every request
+    @cached_property
     def permissions(self):
         return Roles.objects.permissions(role=self.role)
 
@@ -1274,7 +1667,7 @@ class UserAuditTrailManager(GlobalAuditTrailManager):
                   'initial_password:{};version:{};action:{};user:{};timestamp:{};{}'.format(
                    username, first_name, last_name, role, is_active, initial_password, version, action, user,
                    timestamp, SECRET)
-        checksum = custom.generate_checksum(to_hash)
+        checksum = checksums.generate(to_hash)
         try:
             record = self.model(
                 id_ref=id_ref,
@@ -1413,6 +1806,181 @@ class BoxingLog(models.Model):
     # manager
     objects = BoxingLogManager()
 
+    class Meta:
+        indexes = [models.Index(fields=['object', '-timestamp'])]
+
+
+#############
+# INTEGRITY #
+#############
+
+# manager
+class IntegrityManager(GlobalManager):
+    @property
+    def unique(self):
+        return 'id'
+
+
+# table
+class Integrity(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    # custom fields
+    table = models.CharField(max_length=UNIQUE_LENGTH)
+    id_ref = models.IntegerField()
+    digest = models.CharField(max_length=64)
+    valid = models.BooleanField()
+    timestamp = models.DateTimeField()
+    # manager
+    objects = IntegrityManager()
+
+    class Meta:
+        unique_together = ('table', 'id_ref')
+
+
+# manager
+class IntegritySweepsManager(GlobalManager):
+    @property
+    def unique(self):
+        return 'table'
+
+
+# table
+class IntegritySweeps(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    # custom fields
+    table = models.CharField(max_length=UNIQUE_LENGTH, unique=True)
+    last_id = models.IntegerField(default=0)
+    started = models.DateTimeField()
+    finished = models.DateTimeField(null=True)
+    # manager
+    objects = IntegritySweepsManager()
+
+    def __str__(self):
+        return self.table
+
+
+##########
+# SEARCH #
+##########
+
+# manager
+class SearchManager(GlobalManager):
+    @property
+    def unique(self):
+        return 'object'
+
+    def documents(self, model, records):
+        """Build the search documents of master data records.
+
+            :param model: table of the records
+            :type model: Reagents, Boxes, Locations
+            :param records: records as dicts
+            :type records: list
+
+            :returns: unsaved search documents
+            :rtype: list
+        """
+        values = dict()
+        if model is Reagents:
+            for id_main, value in DynamicReagents.objects.filter(
+                    id_main__in=[record['id'] for record in records]).values_list('id_main', 'value'):
+                values.setdefault(id_main, list()).append(value)
+        _return = list()
+        for record in records:
+            words = [str(value) for key, value in record.items() if key not in ('id', 'version', 'checksum')]
+            words += values.get(record['id'], list())
+            _return.append(self.model(object=record[model.objects.unique], dialog=SEARCH_TABLES[model],
+                                      type=record.get('type', ''), text=' '.join(word for word in words if word)))
+        return _return
+
+    def index_many(self, model, records):
+        # search documents of records created in bulk
+        self.bulk_create(self.documents(model=model, records=records))
+
+    def index(self, model, unique):
+        """Create or refresh the search document of a master data record.
+
+            :param model: table of the record
+            :type model: Reagents, Boxes, Locations
+            :param unique: identifier of the record
+            :type unique: str
+        """
+        dic = {model.objects.unique: unique}
+        records = list(model.objects.filter(**dic).values())
+        if not records:
+            return self.remove(unique=unique)
+        document = self.documents(model=model, records=records)[0]
+        self.update_or_create(object=unique, defaults={'dialog': document.dialog, 'type': document.type,
+                                                       'text': document.text})
+
+    def remove(self, unique):
+        self.filter(object=unique).delete()
+
+    def find(self, term, dialogs, limit=20):
+        """Ranked search, identifier prefix matches first, then by trigram word similarity and full text rank.
+
+            :param term: search term
+            :type term: str
+            :param dialogs: dialogs the user is allowed to read
+            :type dialogs: list
+            :param limit: maximum number of results
+            :type limit: int
+
+            :returns: results with object, dialog, type, location, box and position
+            :rtype: list
+        """
+        prefix = term.upper().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        sql = """SELECT s.object, s.dialog, s.type, o.location, o.box, o.position
+            FROM search s LEFT JOIN overview o ON o.object = s.object
+            WHERE s.dialog = ANY(%(dialogs)s)
+                AND (upper(s.object) LIKE %(prefix)s
+                    OR %(term)s <%% s.text
+                    OR to_tsvector('simple', s.text) @@ plainto_tsquery('simple', %(term)s))
+            ORDER BY (upper(s.object) LIKE %(prefix)s) DESC,
+                word_similarity(%(term)s, s.text) + ts_rank(to_tsvector('simple', s.text),
+                                                             plainto_tsquery('simple', %(term)s)) DESC,
+                s.object
+            LIMIT %(limit)s"""
+        keys = ['object', 'dialog', 'type', 'location', 'box', 'position']
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'term': term, 'prefix': prefix, 'dialogs': list(dialogs), 'limit': limit})
+            return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+# table
+class Search(models.Model):
+    # id
+    id = models.AutoField(primary_key=True)
+    # custom fields
+    object = models.CharField(max_length=UNIQUE_LENGTH, unique=True)
+    dialog = models.CharField(max_length=UNIQUE_LENGTH)
+    type = models.CharField(max_length=UNIQUE_LENGTH)
+    # identifier, names and attribute values, indexed by postgres/search.sql
+    text = models.TextField()
+    # manager
+    objects = SearchManager()
+
+    class Meta:
+        db_table = 'search'
+
+    def __str__(self):
+        return self.object
+
+
+# master data tables listed in the overview and their affiliation
+OVERVIEW_AFFILIATIONS = {
+    Boxes: 'box',
+    Reagents: 'reagent',
+}
+
+# master data tables in the search index and the dialog listing them
+SEARCH_TABLES = {
+    Reagents: 'reagents',
+    Boxes: 'boxes',
+    Locations: 'locations',
+}
 
 # tables for export/import
 TABLES = {
@@ -1454,3 +2022,8 @@ EXPORT_PERMISSIONS = {
     'overview': 'overview',
     'type_attributes': 'ta_r'
 }
+
+IMPORT_PERMISSIONS = {
+    'locations': 'lo_w',
+    'reagents': 're_w',
+}
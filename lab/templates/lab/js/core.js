@@ -54,21 +54,23 @@ function enable_all() {
 }
 
 function disable_all(del) {
+    // delete and label print work on multiple records
     if (!del) {
        button_delete.addClass('disabled').removeClass('btn-danger').addClass('btn-default');
+       button_barcode.addClass('disabled').removeClass('btn-info').addClass('btn-default');
     }
     button_edit.addClass('disabled').removeClass('btn-primary').addClass('btn-default');
     button_duplicate.addClass('disabled').removeClass('btn-success').addClass('btn-default');
     button_log_record.addClass('disabled').removeClass('btn-warning').addClass('btn-default');
     button_movement.addClass('disabled').removeClass('btn-info').addClass('btn-default');
     button_boxing.addClass('disabled').removeClass('btn-primary').addClass('btn-default');
-    button_barcode.addClass('disabled').removeClass('btn-info').addClass('btn-default');
     button_password.addClass('disabled').removeClass('btn-info').addClass('btn-default');
     button_active.addClass('disabled').removeClass('btn-success').addClass('btn-default');
 }
 
 // click handling
-$(table).find('tbody tr').mousedown (function(event) {
+// delegated, rows of further pages are loaded later
+$(table).on('mousedown', 'tbody tr', function(event) {
     count_selected = $('.selected').length;
     event.preventDefault();
     document.getSelection().removeAllRanges();
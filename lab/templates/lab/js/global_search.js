@@ -0,0 +1,69 @@
+/*
+turtle-lab.org
+Copyright (C) 2018  Henrik Baran
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+
+var id_global_search = $('#id_global_search');
+var id_global_search_results = $('#id_global_search_results');
+var global_search_timer;
+var global_search_request;
+
+id_global_search.keyup(function() {
+    // wait for the user to stop typing before asking the server
+    clearTimeout(global_search_timer);
+    global_search_timer = setTimeout(global_search, 200);
+});
+
+id_global_search.blur(function() {
+    // keep the results open long enough to follow a click
+    setTimeout(function() {
+        id_global_search_results.hide();
+    }, 200);
+});
+
+function global_search() {
+    var term = id_global_search.val().trim();
+    if (global_search_request) {
+        global_search_request.abort();
+    }
+    if (term.length < 2) {
+        id_global_search_results.hide();
+        return;
+    }
+    global_search_request = $.ajax({
+        method: 'GET',
+        url: '/search/',
+        data: {'term': term},
+        success: function(data) {
+            id_global_search_results.empty();
+            if (data.results.length === 0) {
+                id_global_search_results.append($('<li class="disabled"><a>no records have been found ...</a></li>'));
+            }
+            $.each(data.results, function(index, result) {
+                var text = result.object + ' (' + result.dialog + ')';
+                if (result.location) {
+                    text += ' - ' + result.location;
+                }
+                if (result.box) {
+                    text += ' - ' + result.box + ' ' + result.position;
+                }
+                id_global_search_results.append($('<li>').append($('<a>').attr('href', result.url).text(text)));
+            });
+            id_global_search_results.show();
+        }
+    });
+}
@@ -18,53 +18,105 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 var id_search = $('#id_search');
+var table_body = $('#id_table > tbody');
+var data_url = "/data/{{ content }}/{% if content_dynamic %}{{ content_dynamic }}/{% endif %}";
+// sortable field per column, empty if not sortable
+var columns = {{ columns|default:"[]"|safe }};
+var cursor = {{ cursor|default:"null"|safe }};
+var sort = null;
+var order = 'desc';
+var loading = false;
+// number of the latest request, responses of older requests are dropped
+var request = 0;
+var pending = null;
+var search_timer;
+
+// take over the search passed by the global search
+var search_param = new URLSearchParams(window.location.search).get('search');
+if (search_param) {
+    id_search.val(search_param);
+}
 
 // perform search if search box not empty
 if (id_search.val().length > 0) {
-    search(id_search, "init");
+    search(true);
 }
 
 id_search.focus().keyup(function() {
-    search(this, "regular");
+    // wait for the user to stop typing before asking the server
+    clearTimeout(search_timer);
+    search_timer = setTimeout(function() {
+        search(true);
+    }, 300);
 });
 
-function search(id_search, call) {
-    var td, i, x, finder, keyword;
-    var row = $('#id_table > tbody > tr');
-    var th_count = $('#id_table_head > thead > tr > th').length;
+// sort by column
+$('#id_table_head > thead > tr > th').click(function() {
+    var column = columns[$(this).index()];
+    if (!column) {
+        return;
+    }
+    if (sort === column) {
+        order = order === 'desc' ? 'asc' : 'desc';
+    } else {
+        sort = column;
+        order = 'desc';
+    }
+    search(true);
+});
 
-    // for loop for rows
-    for (i = 0; i < row.length; i++) {
-        finder = 0;
-        //for loop for column
-        for (x = 0; x < th_count; x++) {
-            // define field
-            td = row[i].getElementsByTagName("td")[x];
-            if (td) {
-                if (call === "init") {
-                    keyword = id_search.val();
-                } else {
-                    keyword = id_search.value;
-                }
-                if (td.innerHTML.indexOf(keyword) > -1) {
-                    finder++;
-                }
-            }
-        }
-        // hide if no hit
-        if (finder > 0) {
-            row[i].style.display = "";
-            $('#id_search_error').hide();
-        } else {
-            row[i].style.display = "none";
-        }
+// load next page when scrolled to the bottom
+$(window).scroll(function() {
+    if (cursor !== null && $(window).scrollTop() + $(window).height() > $(document).height() - 200) {
+        search(false);
     }
+});
 
-    var count = row.filter(function() {
-        return $(this).css('display') !== 'none';
-    }).length;
-    if (count === 0) {
-        window.scrollTo(0, 0);
-        $('#id_search_error').show();
+function search(reset) {
+    if (loading && !reset) {
+        return;
     }
+    if (reset && pending) {
+        // a page still loading belongs to the previous search
+        pending.abort();
+    }
+    loading = true;
+    var current = ++request;
+    var parameters = {'search': id_search.val(), 'order': order};
+    if (sort) {
+        parameters['sort'] = sort;
+    }
+    if (!reset) {
+        parameters['cursor'] = JSON.stringify(cursor);
+    }
+    pending = $.ajax({
+        method: 'GET',
+        url: data_url,
+        data: parameters,
+        success: function(data) {
+            if (current !== request) {
+                return;
+            }
+            if (reset) {
+                table_body.empty();
+                disable_all();
+            }
+            table_body.append(data.rows.join(''));
+            cursor = data.cursor;
+            loading = false;
+            pending = null;
+            if (table_body.children('tr').length === 0) {
+                window.scrollTo(0, 0);
+                $('#id_search_error').show();
+            } else {
+                $('#id_search_error').hide();
+            }
+        },
+        error: function() {
+            if (current === request) {
+                loading = false;
+                pending = null;
+            }
+        }
+    });
 }
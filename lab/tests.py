@@ -17,10 +17,31 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 
+# python imports
+import io
+import os
+import json
+import tempfile
+import datetime
+import threading
+
+# app imports
+import lab.forms as forms
 import lab.custom as custom
+import lab.barcodes as barcodes
+import lab.label_store as label_store
+import lab.models as models
+import lab.imports as imports
+import lab.checksums as checksums
+import lab.framework as framework
+import lab.views as views
 
 # import django test module to interact with test database
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class TestCheckEqual(TestCase):
@@ -159,3 +180,670 @@ class TestDetermineBoxPosition(TestCase):
             custom.determine_box_position('Horizontal', '4', '4', dict())
             custom.determine_box_position('Horizontal', '4', '4', tuple())
             custom.determine_box_position('Horizontal', '4', '4', object())
+
+    def test_box_positions(self):
+        positions = custom.box_positions('Horizontal', 'D', '4')
+        self.assertEqual(len(positions), 16)
+        self.assertEqual(positions[11], custom.determine_box_position('Horizontal', 'D', '4', 12))
+        self.assertIs(custom.box_positions('Horizontal', 'D', '4'), positions)
+
+    def test_box_layout(self):
+        layout = custom.box_layout('Vertical', '4', 'D')
+        self.assertEqual((layout.columns, layout.rows, layout.size), (4, 4, 16))
+        self.assertEqual(layout.positions[5], 'B2')
+        self.assertEqual(layout.index_of('B2'), 5)
+        self.assertIsNone(layout.index_of('Z9'))
+        with self.assertRaises(AttributeError):
+            layout.rows = 8
+        with self.assertRaises(TypeError):
+            layout.indices['B2'] = 0
+        self.assertEqual(custom.box_layout('Vertical', '4', 'D').index_of('B2'), 5)
+
+
+class TestBarcodes(TestCase):
+    def test_encode(self):
+        code = barcodes.encoder().encode('B000001')
+        self.assertEqual(code, '11010010000100010110001011101111011011001100110110011001100110110011000110110'
+                               '1100011101011')
+        self.assertIs(barcodes.encoder(), barcodes.encoder())
+
+    def test_bars(self):
+        self.assertEqual(barcodes.bars('110100111'), [(0, 2), (3, 1), (6, 3)])
+        self.assertEqual(barcodes.bars('000'), [])
+
+
+class TestPrintLabels(TestCase):
+    def setUp(self):
+        self.path = tempfile.TemporaryDirectory()
+        label_store.store.cache_clear()
+
+    def tearDown(self):
+        label_store.store.cache_clear()
+        self.path.cleanup()
+
+    def test_batch(self):
+        for box in ('B000001', 'B000002', 'B000003'):
+            models.Boxes.objects.create(box=box, name='box', box_type='9x9', type='', version=1, checksum='checksum')
+        with override_settings(LABEL_STORE_DIR=self.path.name):
+            response, pdf = framework.print_labels(table=models.Boxes, uniques=['B000001', 'B000002', 'B000003'],
+                                                   label='box', user='user')
+            self.assertTrue(response)
+            self.assertTrue(pdf.startswith('/label/'))
+            self.assertEqual(framework.print_labels(table=models.Boxes, uniques=['B000001', 'B000002', 'B000003'],
+                                                    label='box', user='user')[1], pdf)
+            response, message = framework.print_labels(table=models.Boxes, uniques=['B000004'], label='box',
+                                                        user='user')
+            self.assertFalse(response)
+        self.assertEqual(list(models.LabelLog.objects.order_by('id').values_list('label', flat=True)[:3]),
+                         ['B000001_v-1.pdf', 'B000002_v-1.pdf', 'B000003_v-1.pdf'])
+
+    def test_items(self):
+        for items in (None, 'B000001', '"B000001"', '[]', '{"B000001": 1}', '[1]'):
+            data = {} if items is None else {'items': items}
+            request = RequestFactory().post('/boxes/labels/', data=data)
+            self.assertEqual(views.print_labels(request, table=models.Boxes, label='box').status_code, 400)
+
+
+class TestLabelStore(TestCase):
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as path:
+            store = label_store.LabelStore(path=path, size=25, age=3600, memory=20)
+            keys = [label_store.key('box', x) for x in range(3)]
+            for _key in keys:
+                store.put(_key, b'0123456789')
+            # only the two most recent labels fit into memory
+            self.assertEqual(list(store._hot), keys[1:])
+            self.assertEqual(label_store.LabelStore(path=path, size=25, age=3600, memory=20).get(keys[0]),
+                             b'0123456789')
+            # the oldest label exceeds the size
+            os.utime(store.file(keys[0]), (0, 0))
+            self.assertEqual(store.evict(), 1)
+            self.assertFalse(os.path.exists(store.file(keys[0])))
+            store.age = -60
+            self.assertEqual(store.evict(), 2)
+
+    def test_processes(self):
+        with tempfile.TemporaryDirectory() as path:
+            worker = label_store.LabelStore(path=path, size=25, age=3600, memory=20)
+            other = label_store.LabelStore(path=path, size=25, age=3600, memory=20)
+            keys = [label_store.key('box', x) for x in range(3)]
+            for number, _key in enumerate(keys[:2]):
+                worker.put(_key, b'0123456789')
+                os.utime(worker.file(_key), (number, number))
+            # labels used from memory are not the first ones evicted by other processes
+            self.assertEqual(worker.get(keys[0]), b'0123456789')
+            worker.put(keys[2], b'0123456789')
+            self.assertEqual(other.evict(), 1)
+            self.assertTrue(os.path.exists(worker.file(keys[0])))
+            self.assertFalse(os.path.exists(worker.file(keys[1])))
+            # labels evicted meanwhile are restored from memory for other processes
+            os.remove(worker.file(keys[0]))
+            self.assertEqual(worker.get(keys[0]), b'0123456789')
+            self.assertEqual(other.get(keys[0]), b'0123456789')
+
+
+class TestVerificationEngines(TestCase):
+    def test_verify_many(self):
+        pairs = list()
+        for x in range(25):
+            to_hash = 'field:{};secret'.format(x)
+            pairs.append((to_hash, custom.generate_checksum(to_hash)))
+        # tampered data and broken checksum
+        pairs.append(('field:tampered;secret', pairs[0][1]))
+        pairs.append(('field:0;secret', 'no checksum'))
+        expected = [True] * 25 + [False, False]
+        self.assertEqual(checksums.SerialEngine().verify_many(pairs), expected)
+        self.assertEqual(checksums.ProcessEngine(workers=2).verify_many(pairs), expected)
+        self.assertEqual(checksums.ProcessEngine(workers=2).verify_many(pairs[:3]), expected[:3])
+
+
+class TestVerificationCache(TestCase):
+    def test_verify_rows(self):
+        to_hash = 'field:value;secret'
+        checksum = custom.generate_checksum(to_hash)
+        self.assertEqual(checksums.verify_rows('test', [(1, to_hash, checksum)]), {1: True})
+        self.assertEqual(checksums.cache.get(checksums.cache_key('test', 1)),
+                         checksums.digest(to_hash, checksum))
+        # tampered row with a cached verification is still flagged
+        self.assertEqual(checksums.verify_rows('test', [(1, 'field:tampered;secret', checksum)]), {1: False})
+        checksums.forget('test', [1])
+        self.assertIsNone(checksums.cache.get(checksums.cache_key('test', 1)))
+
+    def test_verify_rows_swept(self):
+        to_hash = 'field:value;secret'
+        # the sweeper result is taken over as long as data and checksum are unchanged
+        models.Integrity.objects.create(table='test', id_ref=2, valid=True, timestamp=timezone.now(),
+                                        digest=checksums.digest(to_hash, 'no checksum'))
+        self.assertEqual(checksums.verify_rows('test', [(2, to_hash, 'no checksum')]), {2: True})
+        self.assertEqual(checksums.verify_rows('test', [(2, 'field:tampered;secret', 'no checksum')]), {2: False})
+
+
+class TestChecksumAlgorithms(TestCase):
+    def test_dispatch(self):
+        to_hash = 'field:value;secret'
+        argon2_checksum = checksums.ALGORITHMS['argon2'].generate(to_hash)
+        hmac_checksum = checksums.ALGORITHMS['hmac-sha256'].generate(to_hash)
+        self.assertTrue(hmac_checksum.startswith('$hmac-sha256$v=1$'))
+        self.assertIs(checksums.algorithm(argon2_checksum), checksums.ALGORITHMS['argon2'])
+        self.assertIs(checksums.algorithm(hmac_checksum), checksums.ALGORITHMS['hmac-sha256'])
+        # both formats verify side by side
+        for checksum in (argon2_checksum, hmac_checksum):
+            self.assertEqual(checksums.verify(to_hash, checksum), True)
+            self.assertEqual(checksums.verify('field:tampered;secret', checksum), False)
+        self.assertEqual(checksums.verify(to_hash, 'no checksum'), False)
+
+
+class TestChecksumCommands(TestCase):
+    def test_all_tables(self):
+        box_type = models.BoxTypes.objects.create(box_type='2x1', alignment='Horizontal', rows='1', columns='B',
+                                                  default=True, version=1, checksum='checksum')
+        framework.new_boxes(user='user', amount=1, name='', box_type=box_type, type=None)
+        self.assertTrue(models.Overview.objects.exists())
+        self.assertNotIn(models.Overview, framework.checksum_tables())
+        with tempfile.TemporaryDirectory() as path, override_settings(LOG_DIR=path):
+            call_command('sweep_integrity', stdout=io.StringIO())
+        self.assertTrue(models.Integrity.objects.filter(table=models.Boxes._meta.db_table, valid=True).exists())
+        call_command('resign_checksums', algorithm='hmac-sha256', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertTrue(models.Boxes.objects.get().checksum.startswith('$hmac-sha256$'))
+
+
+class TestGetDynamic(TestCase):
+    def create(self, amount):
+        for x in range(amount):
+            reagent = models.Reagents.objects.create(reagent='R{}'.format(x), name='name', type='buffer', version=1,
+                                                     checksum='checksum')
+            for column in ('ph', 'lot'):
+                models.DynamicReagents.objects.create(id_main=reagent.id, type_attribute=column, value=x,
+                                                      checksum='checksum')
+
+    def test_queries(self):
+        models.Types.objects.create(type='buffer', affiliation='Reagents', storage_condition='RT',
+                                    usage_condition='RT', version=1, checksum='checksum')
+        for column in ('ph', 'lot', 'empty'):
+            models.TypeAttributes.objects.create(column=column, type='buffer', list_values='', default_value='',
+                                                 mandatory=False, version=1, checksum='checksum')
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='buffer')
+        self.create(2)
+        # main records, dynamic records and sweeper results of both tables independent of the record count
+        with self.assertNumQueries(4):
+            rows = get.get()
+        self.create(20)
+        with self.assertNumQueries(4):
+            rows = get.get()
+        self.assertEqual(len(rows), 22)
+        self.assertIn('<td class="gui">0</td><td class="gui">0</td><td class="gui"></td>', rows[-1])
+        self.assertTrue(rows[-1].startswith('<tr style="color: red">'))
+
+    def test_export(self):
+        models.Types.objects.create(type='buffer', affiliation='Reagents', storage_condition='RT',
+                                    usage_condition='RT', version=1, checksum='checksum')
+        for column in ('ph', 'lot'):
+            models.TypeAttributes.objects.create(column=column, type='buffer', list_values='', default_value='',
+                                                 mandatory=False, version=1, checksum='checksum')
+        self.create(5)
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='buffer')
+        # one query for the main records, one per chunk for the dynamic records
+        with override_settings(EXPORT_CHUNK_SIZE=2), self.assertNumQueries(4):
+            rows = list(get.export)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][-3:], ('4', '4', 1))
+
+
+class TestOverview(TestCase):
+    def snapshot(self):
+        return list(models.Overview.objects.order_by('object').values_list(
+            'object', 'affiliation', 'type', 'location', 'box', 'position'))
+
+    def test_write_paths_match_rebuild(self):
+        models.Boxes.objects.create(box='B000001', name='', type='', box_type='3x3', version=1, checksum='checksum')
+        models.Reagents.objects.create(reagent='R000001', name='name', type='buffer', version=1, checksum='checksum')
+        models.Overview.objects.register(unique='B000001', affiliation='box', type='')
+        models.Overview.objects.register(unique='R000001', affiliation='reagent', type='buffer')
+        boxing = framework.TableManipulation(table=models.Boxing)
+        boxing.new_boxing(object='', box='B000001', position='A1')
+        movement = framework.TableManipulation(table=models.MovementLog)
+        movement.move(user='user', obj='B000001', method='manual', initial_location='', new_location='L000001',
+                      timestamp=timezone.now())
+        boxing.edit_boxing(box='B000001', object='R000001', position='A1')
+        self.assertEqual(self.snapshot()[1], ('R000001', 'reagent', 'buffer', 'L000001', 'B000001', 'A1'))
+        # boxed reagent travels with its box
+        movement.move(user='user', obj='B000001', method='manual', initial_location='L000001',
+                      new_location='L000002', timestamp=timezone.now())
+        self.assertEqual(self.snapshot()[1][3], 'L000002')
+        snapshot = self.snapshot()
+        call_command('rebuild_overview', stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), snapshot)
+        boxing.clear_boxing(object='', box='B000001', position='A1')
+        self.assertEqual(self.snapshot()[1][4:], (None, None))
+
+
+class TestCurrentState(TestCase):
+    def test_latest(self):
+        models.Locations.objects.create(location='L000001', name='', condition='-80', max_boxes='10', version=1,
+                                        checksum='checksum')
+        models.Locations.objects.create(location='L000002', name='', condition='-80', max_boxes='10', version=1,
+                                        checksum='checksum')
+        models.Overview.objects.register(unique='B000001', affiliation='box', type='')
+        models.Overview.objects.register(unique='R000001', affiliation='reagent', type='buffer')
+        movement = framework.TableManipulation(table=models.MovementLog)
+        for location in ('L000001', 'L000002'):
+            movement.move(user='user', obj='B000001', method='manual', initial_location='', new_location=location,
+                          timestamp=timezone.now())
+        # the current location is read from the overview, not from the log
+        self.assertEqual(models.Overview.objects.location('B000001'), 'L000002')
+        self.assertEqual(models.Overview.objects.location('B000002'), '')
+        models.Overview.objects.set_box(unique='R000001', box='B000001', position='A1')
+        self.assertEqual((models.Overview.objects.box('R000001'), models.Overview.objects.position('R000001')),
+                         ('B000001', 'A1'))
+
+
+class TestPage(TestCase):
+    def pages(self, get, **kwargs):
+        _return = list()
+        rows, cursor = get.page(size=2, **kwargs)
+        _return += rows
+        while cursor:
+            rows, cursor = get.page(size=2, cursor=json.loads(json.dumps(cursor, cls=DjangoJSONEncoder)), **kwargs)
+            _return += rows
+        return _return
+
+    def test_keyset(self):
+        for condition in ('delta', 'bravo', 'echo', 'alpha', 'charlie'):
+            models.Conditions.objects.create(condition=condition, version=1, checksum='checksum')
+        get = framework.GetStandard(table=models.Conditions)
+        self.assertEqual(len(self.pages(get)), 5)
+        rows = self.pages(get, sort='condition', descending=False)
+        self.assertEqual([row.split('</td>')[0].split('>')[-1] for row in rows],
+                         ['alpha', 'bravo', 'charlie', 'delta', 'echo'])
+        self.assertEqual(len(self.pages(get, search='HA')), 2)
+
+    def test_keyset_nulls(self):
+        for x in range(5):
+            models.Overview.objects.create(object='R00000{}'.format(x), affiliation='reagent', type='buffer',
+                                           location='L000001' if x % 2 else None)
+        get = framework.GetView(table=models.Overview)
+        for descending in (True, False):
+            rows = self.pages(get, sort='location', descending=descending)
+            self.assertEqual(len(set(rows)), 5)
+
+
+class TestSearch(TestCase):
+    def test_write_paths(self):
+        manipulation = framework.TableManipulation(table=models.Locations,
+                                                   table_audit_trail=models.LocationsAuditTrail)
+        response, location = manipulation.new_identifier_at(user='user', prefix='L', name='freezer',
+                                                            condition='-80', max_boxes='10')
+        self.assertIn('freezer', models.Search.objects.get(object=location).text)
+        manipulation.edit_at(user='user', location=location, name='fridge', condition='4', max_boxes='10')
+        self.assertIn('fridge', models.Search.objects.get(object=location).text)
+        manipulation.delete_at(user='user', record=location)
+        self.assertFalse(models.Search.objects.filter(object=location).exists())
+
+    def test_dynamic_values(self):
+        reagent = models.Reagents.objects.create(reagent='R000001', name='name', type='buffer', version=1,
+                                                 checksum='checksum')
+        dynamic = framework.TableManipulation(table=models.DynamicReagents,
+                                              table_audit_trail=models.DynamicReagentsAuditTrail)
+        dynamic.new_dynamic(user='user', identifier='R000001', main_version=1, timestamp=timezone.now(),
+                            id_main=reagent.id, type_attribute='lot', value='lot4711')
+        document = models.Search.objects.get(object='R000001')
+        self.assertEqual((document.dialog, document.type), ('reagents', 'buffer'))
+        self.assertIn('lot4711', document.text)
+        call_command('rebuild_search', stdout=io.StringIO())
+        self.assertEqual(models.Search.objects.get(object='R000001').text, document.text)
+
+
+class TestPermissions(TestCase):
+    def test_resolved_once(self):
+        manipulation = framework.TableManipulation(table=models.Roles, table_audit_trail=models.RolesAuditTrail)
+        manipulation.new_at(user='user', role='lab', permissions='co_r,lo_r')
+        user = models.Users(username='user', role='lab')
+        with self.assertNumQueries(1):
+            self.assertTrue(user.permission('co_r'))
+            self.assertFalse(user.permission('co_w'))
+            self.assertIn('lo_r', user.permissions)
+        # other requests take the cached role permissions
+        with self.assertNumQueries(0):
+            self.assertTrue(models.Users(username='user', role='lab').permission('lo_r'))
+        manipulation.edit_at(user='user', role='lab', permissions='co_w')
+        self.assertTrue(models.Users(username='user', role='lab').permission('co_w'))
+        manipulation.delete_at(user='user', record='lab')
+        self.assertEqual(models.Users(username='user', role='lab').permissions, frozenset())
+
+
+class TestReferenceData(TransactionTestCase):
+    def tearDown(self):
+        # records of the flushed database must not be served to other tests
+        models.reference_data.changed()
+
+    def test_generation(self):
+        manipulation = framework.TableManipulation(table=models.Types, table_audit_trail=models.TypesAuditTrail)
+        manipulation.new_at(user='user', type='buffer', affiliation='Reagents', storage_condition='-80',
+                            usage_condition='RT')
+        self.assertEqual(models.Types.objects.types(affiliation='Reagents'), ['buffer'])
+        field = forms.ReferenceChoiceField(queryset=models.Types.objects.all(), empty_label=None)
+        with self.assertNumQueries(0):
+            self.assertEqual(models.Types.objects.get_affiliation(type='buffer'), 'Reagents')
+            self.assertEqual([label for value, label in field.choices], ['buffer'])
+            self.assertEqual(field.clean(str(manipulation.id)).type, 'buffer')
+        # writes bump the generation, all processes reload
+        manipulation.edit_at(user='user', type='buffer', affiliation='Samples', storage_condition='-80',
+                             usage_condition='RT')
+        self.assertEqual(models.Types.objects.types(affiliation='Reagents'), [])
+        self.assertEqual(models.Types.objects.types(affiliation='Samples'), ['buffer'])
+
+
+class TestNewIdentifier(TestCase):
+    def test_allocated_before_insert(self):
+        manipulation = framework.TableManipulation(table=models.Locations,
+                                                   table_audit_trail=models.LocationsAuditTrail)
+        response, location = manipulation.new_identifier_at(user='user', prefix='L', name='freezer',
+                                                            condition='-80', max_boxes='10')
+        row = models.Locations.objects.filter(location=location).values()[0]
+        self.assertEqual(location, custom.identifier(prefix='L', table_id=row['id']))
+        self.assertTrue(framework.GetStandard(table=models.Locations).verify_checksum(row))
+        self.assertEqual(models.LocationsAuditTrail.objects.get(id_ref=row['id']).location, location)
+        # identifiers of a pre-allocated block
+        table_id = manipulation.allocate_ids(3)[-1]
+        response, location = framework.TableManipulation(
+            table=models.Locations, table_audit_trail=models.LocationsAuditTrail).new_identifier_at(
+            user='user', prefix='L', table_id=table_id, name='fridge', condition='4', max_boxes='')
+        self.assertEqual(location, custom.identifier(prefix='L', table_id=table_id))
+
+
+class TestNewBoxes(TestCase):
+    def test_bulk(self):
+        box_type = models.BoxTypes.objects.create(box_type='3x3', alignment='Horizontal', rows='3', columns='C',
+                                                  default=True, version=1, checksum='checksum')
+        response, created = framework.new_boxes(user='user', amount=2, name='', box_type=box_type, type=None)
+        self.assertTrue(response)
+        self.assertEqual(len(created), 2)
+        self.assertEqual(models.Boxing.objects.filter(box__in=created).count(), 18)
+        self.assertEqual(models.BoxesAuditTrail.objects.filter(action='Create').count(), 2)
+        self.assertEqual(models.Search.objects.filter(object__in=created).count(), 2)
+        get = framework.GetStandard(table=models.Boxes)
+        self.assertEqual(set(get.verify_checksums(list(models.Boxes.objects.values())).values()), {True})
+        boxing = models.Boxing.objects.filter(box=created[0]).order_by('id')[0]
+        self.assertEqual(boxing.position, 'A1')
+        get = framework.GetStandard(table=models.Boxing)
+        self.assertTrue(checksums.verify(get.to_verify(row=models.Boxing.objects.filter(id=boxing.id).values()[0],
+                                                       header=get.header), boxing.checksum))
+
+    def test_failure(self):
+        box_type = models.BoxTypes.objects.create(box_type='3x3', alignment='Horizontal', rows='3', columns='C',
+                                                  default=True, version=1, checksum='checksum')
+        # the identifier of the second box is taken
+        table_id = framework.Master(table=models.Boxes).allocate_ids(1)[0]
+        # explicit primary key, the sequence is not advanced
+        models.Boxes.objects.create(id=table_id + 100, box=custom.identifier(prefix='B', table_id=table_id + 2),
+                                    name='', box_type='3x3', type='', version=1, checksum='checksum')
+        response, message = framework.new_boxes(user='user', amount=2, name='', box_type=box_type, type=None)
+        self.assertFalse(response)
+        self.assertEqual(models.Boxes.objects.count(), 1)
+        self.assertFalse(models.BoxesAuditTrail.objects.exists())
+        self.assertFalse(models.FreePositions.objects.exists())
+        self.assertFalse(models.Boxing.objects.exists())
+
+    def test_layout_invalidation(self):
+        manipulation = framework.TableManipulation(table=models.BoxTypes,
+                                                   table_audit_trail=models.BoxTypesAuditTrail)
+        manipulation.new_at(user='user', box_type='grid', alignment='Horizontal', rows='2', columns='2',
+                            default=False)
+        self.assertEqual(models.BoxTypes.objects.max('grid'), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(models.BoxTypes.objects.layout('grid').size, 4)
+        manipulation.edit_at(user='user', box_type='grid', alignment='Horizontal', rows='3', columns='3',
+                             default=False)
+        self.assertEqual(models.BoxTypes.objects.max('grid'), 9)
+
+
+class TestNewReagents(TestCase):
+    def test_bulk(self):
+        models.TypeAttributes.objects.create(column='lot', type='buffer', list_values='', default_value='',
+                                             mandatory=True, version=1, checksum='checksum')
+        response, created = framework.new_reagents(user='user', amount=3, type='buffer', name='tris',
+                                                   values={'lot': 'lot1'})
+        self.assertTrue(response)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(models.DynamicReagents.objects.filter(type_attribute='lot', value='lot1').count(), 3)
+        self.assertEqual(models.ReagentsAuditTrail.objects.filter(action='Create').count(), 3)
+        self.assertEqual(models.DynamicReagentsAuditTrail.objects.filter(id_ref=1).count(), 3)
+        self.assertEqual(models.Search.objects.count(), 3)
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='buffer')
+        self.assertNotIn('color: red', ''.join(get.get()))
+
+
+class TestEditDynamic(TestCase):
+    def setUp(self):
+        for column in ('lot', 'ph', 'supplier'):
+            models.TypeAttributes.objects.create(column=column, type='buffer', list_values='', default_value='',
+                                                 mandatory=False, version=1, checksum='checksum')
+        response, created = framework.new_reagents(user='user', amount=1, type='buffer', name='tris',
+                                                   values={'lot': 'lot1', 'ph': '7', 'supplier': 'acme'})
+        self.reagent = created[0]
+
+    def test_changed_only(self):
+        manipulation = framework.TableManipulation(table=models.Reagents, table_audit_trail=models.ReagentsAuditTrail)
+        manipulation.edit_at(user='user', reagent=self.reagent, name='tris', type='buffer')
+        dynamic = framework.TableManipulation(table=models.DynamicReagents,
+                                              table_audit_trail=models.DynamicReagentsAuditTrail)
+        response, message = dynamic.edit_dynamic_bulk(user='user', identifier=self.reagent, id_main=manipulation.id,
+                                                      main_version=manipulation.version,
+                                                      timestamp=manipulation.timestamp,
+                                                      values={'lot': 'lot2', 'ph': '7', 'supplier': 'acme'})
+        self.assertTrue(response)
+        self.assertEqual(models.DynamicReagentsAuditTrail.objects.filter(action='Update').count(), 1)
+        self.assertEqual(models.DynamicReagents.objects.get(type_attribute='lot').value, 'lot2')
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='buffer')
+        self.assertNotIn('color: red', ''.join(get.get()))
+        # unchanged attributes are shown with their previous value in the audit trail
+        get = framework.GetDynamicAuditTrail(table=models.ReagentsAuditTrail,
+                                             dynamic_table=models.DynamicReagentsAuditTrail, type='buffer', dt='0')
+        response, rows = get.get(id_ref=manipulation.id)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all('acme' in row and 'color: red' not in row for row in rows))
+
+
+class TestReagentAttributes(TestCase):
+    def setUp(self):
+        models.TypeAttributes.objects.create(column='clone', type='antibody', list_values='', default_value='',
+                                             mandatory=False, version=1, checksum='checksum')
+
+    @override_settings(ATTRIBUTE_STORAGE='jsonb')
+    def test_jsonb(self):
+        framework.new_reagents(user='user', amount=2, type='antibody', name='cd4', values={'clone': 'x1'})
+        framework.new_reagents(user='user', amount=1, type='antibody', name='cd8', values={'clone': 'x2'})
+        self.assertEqual(models.ReagentAttributes.objects.count(), 3)
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='antibody')
+        rows = get.get()
+        self.assertEqual(sum('x1' in row for row in rows), 2)
+        self.assertNotIn('color: red', ''.join(rows))
+        self.assertEqual(models.Reagents.objects.filter(get.search_filter('clone=x2')).count(), 1)
+        # a changed or missing copy of the signed records is not valid
+        cd8 = models.Reagents.objects.get(name='cd8').id
+        models.ReagentAttributes.objects.filter(id_main=cd8).update(attributes={'clone': 'x1'})
+        self.assertEqual(sum('color: red' in row for row in get.get()), 1)
+        models.ReagentAttributes.objects.filter(id_main=cd8).delete()
+        self.assertEqual(sum('color: red' in row for row in get.get()), 1)
+        models.ReagentAttributes.objects.refresh(ids=[cd8])
+        self.assertNotIn('color: red', ''.join(get.get()))
+
+    def test_eav(self):
+        framework.new_reagents(user='user', amount=2, type='antibody', name='cd4', values={'clone': 'x1'})
+        self.assertFalse(models.ReagentAttributes.objects.exists())
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='antibody')
+        self.assertEqual(models.Reagents.objects.filter(get.search_filter('clone=x1')).count(), 2)
+
+
+class TestFreePositions(TestCase):
+    def test_next_positions(self):
+        box_type = models.BoxTypes.objects.create(box_type='2x1', alignment='Horizontal', rows='1', columns='B',
+                                                  default=True, version=1, checksum='checksum')
+        response, mixed = framework.new_boxes(user='user', amount=1, name='', box_type=box_type, type=None)
+        response, dedicated = framework.new_boxes(user='user', amount=1, name='', box_type=box_type, type='buffer')
+        with self.assertNumQueries(1):
+            slots = models.FreePositions.objects.next_positions(type='buffer', amount=3)
+        self.assertEqual([(slot['box'], slot['position']) for slot in slots],
+                         [(dedicated[0], 'A1'), (dedicated[0], 'B1'), (mixed[0], 'A1')])
+        boxing = framework.TableManipulation(table=models.Boxing)
+        models.Overview.objects.register(unique='R000001', affiliation='reagent', type='buffer')
+        boxing.edit_boxing(box=dedicated[0], object='R000001', position='A1')
+        self.assertEqual(models.FreePositions.objects.get(box=dedicated[0]).free, 1)
+        self.assertEqual(models.FreePositions.objects.next_positions(type='other')[0]['box'], mixed[0])
+        snapshot = list(models.FreePositions.objects.order_by('box').values_list('box', 'type', 'free'))
+        call_command('rebuild_free_positions', stdout=io.StringIO())
+        self.assertEqual(list(models.FreePositions.objects.order_by('box').values_list('box', 'type', 'free')),
+                         snapshot)
+        boxing.clear_boxing(object='', box=dedicated[0], position='A1')
+        self.assertEqual(models.FreePositions.objects.get(box=dedicated[0]).free, 2)
+
+
+class TestReservations(TransactionTestCase):
+    def setUp(self):
+        box_type = models.BoxTypes.objects.create(box_type='3x3', alignment='Horizontal', rows='3', columns='C',
+                                                  default=True, version=1, checksum='checksum')
+        framework.new_boxes(user='user', amount=2, name='', box_type=box_type, type='buffer')
+
+    def test_expired(self):
+        held = models.Reservations.objects.reserve(type='buffer', object='R000001', user='user')
+        # reserved positions are not proposed again
+        self.assertNotEqual(models.FreePositions.objects.next_positions(type='buffer')[0]['boxing'], held[0].boxing)
+        self.assertEqual(models.Reservations.objects.holder(box=held[0].box, position=held[0].position), 'R000001')
+        self.assertNotEqual(models.Reservations.objects.reserve(type='buffer', object='R000002', user='user')[0].boxing,
+                            held[0].boxing)
+        models.Reservations.objects.update(expires=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(models.Reservations.objects.reserve(type='buffer', object='R000003', user='user')[0].boxing,
+                         held[0].boxing)
+
+    def test_occupied(self):
+        held = models.Reservations.objects.reserve(type='buffer', object='R000001', user='user')
+        self.assertEqual(models.Reservations.objects.held(object='R000001'), held)
+        # boxed by another object without the overview
+        models.Overview.objects.register(unique='R000002', affiliation='reagent', type='buffer')
+        framework.TableManipulation(table=models.Boxing).edit_boxing(box=held[0].box, object='R000002',
+                                                                     position=held[0].position)
+        self.assertEqual(models.Reservations.objects.held(object='R000001'), list())
+        self.assertFalse(models.Reservations.objects.exists())
+
+    def test_concurrent(self):
+        reserved = list()
+        errors = list()
+
+        def worker(x):
+            try:
+                for reservation in models.Reservations.objects.reserve(type='buffer', object='R{:06d}'.format(x),
+                                                                       user='user', amount=2):
+                    reserved.append(reservation.boxing)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(x,)) for x in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, list())
+        # 24 requested positions for 18 free slots, none handed out twice
+        self.assertEqual(len(reserved), len(set(reserved)))
+        self.assertLessEqual(len(reserved), 18)
+        self.assertEqual(models.Reservations.objects.count(), len(reserved))
+
+
+class TestMoveBoxes(TestCase):
+    def setUp(self):
+        models.Locations.objects.create(location='L000001', name='', condition='-80', max_boxes='10', version=1,
+                                        checksum='checksum')
+        models.Types.objects.create(type='buffer', affiliation='Reagents', storage_condition='-80',
+                                    usage_condition='RT', version=1, checksum='checksum')
+        models.Types.objects.create(type='enzyme', affiliation='Reagents', storage_condition='-20',
+                                    usage_condition='RT', version=1, checksum='checksum')
+        for box in ('B000001', 'B000002'):
+            models.Overview.objects.register(unique=box, affiliation='box', type='')
+        models.Overview.objects.register(unique='R000001', affiliation='reagent', type='buffer')
+        models.Overview.objects.filter(object='R000001').update(box='B000001', position='A1')
+
+    def test_move(self):
+        response, message = framework.move_boxes(user='user', boxes=['B000001', 'B000002'], new_location='L000001')
+        self.assertTrue(response)
+        self.assertEqual(list(models.MovementLog.objects.order_by('id').values_list('object', 'method')),
+                         [('B000001', 'manual'), ('B000002', 'manual'), ('R000001', 'B000001')])
+        self.assertEqual(models.Overview.objects.filter(location='L000001').count(), 3)
+        get = framework.GetStandard(table=models.MovementLog)
+        self.assertEqual(set(get.verify_checksums(list(models.MovementLog.objects.values())).values()), {True})
+        response, message = framework.move_boxes(user='user', boxes=['B000002'], new_location='L000001')
+        self.assertFalse(response)
+
+    def test_no_box(self):
+        response, message = framework.move_boxes(user='user', boxes=['B000001', 'R000001'], new_location='L000001')
+        self.assertEqual((response, message), (False, 'Box "R000001" does not exist.'))
+        models.Boxes.objects.create(box='B000002', name='box', box_type='9x9', type='', version=1, checksum='checksum')
+        request = RequestFactory().post('/overview/move/', data={'unique': 'B000001'})
+        form = forms.MovementsForm({'new_location': models.Locations.objects.get(location='L000001').id,
+                                    'more_boxes': 'B000002 R000001 B000009'}, request=request)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ['Further boxes R000001, B000009 are not existing boxes.'])
+
+    def test_unsuitable(self):
+        models.Overview.objects.register(unique='R000002', affiliation='reagent', type='enzyme')
+        models.Overview.objects.filter(object='R000002').update(box='B000002', position='A1')
+        self.assertEqual(models.Overview.objects.unsuitable(boxes=['B000001', 'B000002'], location='L000001'),
+                         ['R000002'])
+        response, message = framework.move_boxes(user='user', boxes=['B000001', 'B000002'], new_location='L000001')
+        self.assertFalse(response)
+        self.assertFalse(models.MovementLog.objects.exists())
+
+
+class TestImport(TestCase):
+    def setUp(self):
+        models.Conditions.objects.create(condition='-80', version=1, checksum='checksum')
+        models.Types.objects.create(type='buffer', affiliation='Reagents', storage_condition='-80',
+                                    usage_condition='RT', version=1, checksum='checksum')
+        models.TypeAttributes.objects.create(column='lot', type='buffer', list_values='', default_value='',
+                                             mandatory=True, version=1, checksum='checksum')
+        models.TypeAttributes.objects.create(column='ph', type='buffer', list_values='7,8', default_value='7',
+                                             mandatory=False, version=1, checksum='checksum')
+
+    def test_locations(self):
+        stream = io.StringIO('Name;Condition;Max boxes\nfreezer;-80;10\nfridge;-80;\n')
+        response, message = imports.LocationsImport(user='user').run(stream=stream)
+        self.assertTrue(response)
+        get = framework.GetStandard(table=models.Locations)
+        rows = list(models.Locations.objects.order_by('id').values())
+        self.assertEqual([row['location'] for row in rows],
+                         [custom.identifier(prefix='L', table_id=row['id']) for row in rows])
+        self.assertEqual(set(get.verify_checksums(rows).values()), {True})
+        self.assertEqual(models.LocationsAuditTrail.objects.filter(action='Create').count(), 2)
+
+    def test_reagents(self):
+        stream = io.StringIO('Name;lot;ph\n' + ''.join('buffer {};lot{};\n'.format(x, x) for x in range(5)))
+        with override_settings(IMPORT_CHUNK_SIZE=2):
+            _import = imports.ReagentsImport(user='user', token='1', type='buffer')
+            response, message = _import.run(stream=stream)
+        self.assertTrue(response)
+        self.assertEqual(imports.progress(user='user', token='1')['rows'], 5)
+        self.assertEqual(models.Overview.objects.filter(affiliation='reagent').count(), 5)
+        self.assertEqual(models.DynamicReagents.objects.filter(type_attribute='ph', value='7').count(), 5)
+        get = framework.GetDynamic(table=models.Reagents, dynamic_table=models.DynamicReagents, type='buffer')
+        self.assertNotIn('color: red', ''.join(get.get()))
+
+    def test_invalid(self):
+        stream = io.StringIO('Name;lot;ph\nbuffer;lot1;7\nbuffer;;9\n')
+        _import = imports.ReagentsImport(user='user', type='buffer')
+        response, message = _import.run(stream=stream)
+        self.assertFalse(response)
+        self.assertEqual(len(_import.errors), 1)
+        self.assertFalse(models.Reagents.objects.exists())
+
+    def test_unreadable(self):
+        self.assertRaises(TypeError, imports.Import, user='user')
+        stream = io.TextIOWrapper(io.BytesIO(b'Name;lot;ph\nbuffer;\xff;7\n'), encoding='utf-8-sig', newline='')
+        _import = imports.ReagentsImport(user='user', type='buffer')
+        self.assertFalse(_import.run(stream=stream)[0])
+        self.assertEqual(_import.errors, ['File is not UTF-8 encoded.'])
+        stream = io.StringIO('Name;lot;ph\nbuffer;lot1;7\nbuffer;{};7\n'.format('x' * 200000))
+        _import = imports.ReagentsImport(user='user', type='buffer')
+        self.assertFalse(_import.run(stream=stream)[0])
+        self.assertEqual(_import.errors, ['Line 3: field larger than field limit (131072)'])
+        self.assertFalse(models.Reagents.objects.exists())
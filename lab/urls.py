@@ -25,7 +25,15 @@ urlpatterns = [
     # export
     url(r'^export/(?P<dialog>\w+)/$', views.export, name='export'),
     url(r'^export/(?P<dialog>\w+)/(?P<reagent>\w+)/$', views.export_reagents, name='export reagents'),
-    # url(r'^import/(?P<dialog>\w+)/$', views.import_data, name='import'),
+    # import
+    url(r'^import/progress/(?P<token>\w+)/$', views.import_progress, name='import progress'),
+    url(r'^import/(?P<dialog>\w+)/$', views.import_data, name='import'),
+    url(r'^import/(?P<dialog>\w+)/(?P<reagent>\w+)/$', views.import_data, name='import reagents'),
+    # data
+    url(r'^data/(?P<dialog>\w+)/$', views.data, name='data'),
+    url(r'^data/(?P<dialog>\w+)/(?P<reagent>\w+)/$', views.data, name='data reagents'),
+    # search
+    url(r'^search/$', views.search, name='search'),
     # others
     url(r'^offset/$', views.offset, name='offset'),
     url(r'^sidebar/$', views.sidebar, name='sidebar'),
@@ -59,6 +67,7 @@ urlpatterns = [
     url(r'^locations/delete/$', views.locations_delete, name='locations delete'),
     url(r'^locations/audit_trail/$', views.locations_audit_trail, name='locations audit trail'),
     url(r'^locations/label/$', views.locations_label, name='locations label'),
+    url(r'^locations/labels/$', views.locations_labels, name='locations labels'),
     # boxes
     url(r'^boxes/$', views.boxes, name='boxes'),
     url(r'^boxes/new/$', views.boxes_new, name='boxes new'),
@@ -66,6 +75,7 @@ urlpatterns = [
     url(r'^boxes/delete/$', views.boxes_delete, name='boxes delete'),
     url(r'^boxes/audit_trail/$', views.boxes_audit_trail, name='boxes audit trail'),
     url(r'^boxes/label/$', views.boxes_label, name='boxes label'),
+    url(r'^boxes/labels/$', views.boxes_labels, name='boxes labels'),
     # box types
     url(r'^box_types/$', views.box_types, name='box types'),
     url(r'^box_types/new/$', views.box_types_new, name='box types new'),
@@ -78,11 +88,13 @@ urlpatterns = [
     url(r'^reagents/delete/$', views.reagents_delete, name='reagents delete'),
     url(r'^reagents/audit_trail/(?P<reagent>\w+)/$', views.reagents_audit_trail, name='reagents audit trail'),
     url(r'^reagents/label/$', views.reagents_label, name='reagents label'),
+    url(r'^reagents/labels/$', views.reagents_labels, name='reagents labels'),
     url(r'^reagents/(?P<reagent>\w+)/$', views.reagents, name='reagents'),
     # logs
     url(r'^movement_log/$', views.movement_log, name='movement log'),
     url(r'^login_log/$', views.login_log, name='login log'),
     url(r'^label_log/$', views.label_log, name='label log'),
+    url(r'^label/(?P<key>[0-9a-f]{64})\.pdf$', views.label_pdf, name='label pdf'),
     url(r'^boxing_log/$', views.boxing_log, name='boxing log'),
     # roles
     url(r'^roles/$', views.roles, name='roles'),
@@ -18,16 +18,20 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
 # python imports
+import io
 import logging
 import json
 import csv
+from urllib.parse import urlencode
 
 # django imports
 from django.shortcuts import render
 from django.utils import timezone
 from django.conf import settings
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
-from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.http import HttpResponse, HttpResponseRedirect, HttpResponseBadRequest, JsonResponse, \
+    StreamingHttpResponse, HttpResponseNotFound
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib.auth.decorators import login_required
 
@@ -36,7 +40,9 @@ import lab.forms as forms
 import lab.models as models
 import lab.custom as custom
 import lab.decorators as decorators
+import lab.imports as imports
 import lab.framework as framework
+import lab.label_store as label_store
 
 # define logger
 log = logging.getLogger(__name__)
@@ -45,6 +51,37 @@ log = logging.getLogger(__name__)
 SECRET = settings.SECRET
 
 
+def print_labels(request, table, label):
+    """Function to print the labels of the items posted by a label view.
+
+        :param request: request of the label view
+        :type request: HttpRequest
+
+        :param table: table of the items
+        :type table: class
+
+        :param label: label type
+        :type label: str
+
+        :returns: json response, or bad request if items is not a non-empty list of strings
+        :rtype: JsonResponse, HttpResponseBadRequest
+    """
+    try:
+        uniques = json.loads(request.POST.get('items'))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest()
+    if not isinstance(uniques, list) or not uniques or not all(isinstance(x, str) for x in uniques):
+        return HttpResponseBadRequest()
+    response, pdf = framework.print_labels(table=table, uniques=uniques, label=label, user=request.user.username)
+    if response:
+        data = {'response': response,
+                'pdf': pdf}
+    else:
+        data = {'response': response,
+                'message': pdf}
+    return JsonResponse(data)
+
+
 @require_GET
 def index(request):
     context = {'tables': None,
@@ -554,7 +591,6 @@ def locations_new(request):
         manipulation = framework.TableManipulation(table=models.Locations,
                                                    table_audit_trail=models.LocationsAuditTrail)
         response, message = manipulation.new_identifier_at(user=request.user.username, prefix='L',
-                                                           location='L {}'.format(str(timezone.now())),
                                                            name=form.cleaned_data['name'],
                                                            condition=form.cleaned_data['condition'],
                                                            max_boxes=form.cleaned_data['max_boxes'])
@@ -620,13 +656,23 @@ def locations_label(request):
                                                                            request.POST.get('version')))
         # log record
         manipulation = framework.TableManipulation(table=models.LabelLog)
-        manipulation.new_log(unique='label', label=filename.split('/')[3], user=request.user.username,
+        manipulation.new_log(unique='label', label='{}_v-{}.pdf'.format(request.POST.get('unique'),
+                                                                        request.POST.get('version')),
+                             user=request.user.username,
                              action='print attempt', timestamp=timezone.now())
     data = {'response': response,
             'pdf': filename}
     return JsonResponse(data)
 
 
+@require_POST
+@login_required
+@decorators.permission('lo_l')
+@decorators.require_ajax
+def locations_labels(request):
+    return print_labels(request, table=models.Locations, label='location')
+
+
 @require_GET
 @login_required
 @decorators.permission('ty_r', 'ty_w', 'ty_d')
@@ -762,27 +808,13 @@ def boxes_audit_trail(request):
 def boxes_new(request):
     form = forms.BoxesFormNew(request.POST)
     if form.is_valid():
-        manipulation = framework.TableManipulation(table=models.Boxes,
-                                                   table_audit_trail=models.BoxesAuditTrail)
-        response, created_box = manipulation.new_identifier_at(user=request.user.username, prefix='B',
-                                                               box='B {}'.format(str(timezone.now())),
-                                                               name=form.cleaned_data['name'],
-                                                               box_type=form.cleaned_data['box_type'],
-                                                               type=form.cleaned_data['type'])
-        if response:
-            query = models.BoxTypes.objects.filter(box_type=form.cleaned_data['box_type'])[0]
-            _max = models.BoxTypes.objects.max(form.cleaned_data['box_type'])
-            manipulation_boxing = framework.TableManipulation(table=models.Boxing)
-            _success_list = list()
-            for x in range(_max):
-                _position = custom.determine_box_position(alignment=query.alignment, x=query.columns, y=query.rows,
-                                                          value=x + 1)
-                _success = manipulation_boxing.new_boxing(object='', box=created_box, position=_position)
-                _success_list.append(_success)
-            response = custom.check_equal(_success_list)
-
+        response, created = framework.new_boxes(user=request.user.username,
+                                                amount=form.cleaned_data['amount'] or 1,
+                                                name=form.cleaned_data['name'],
+                                                box_type=form.cleaned_data['box_type'],
+                                                type=form.cleaned_data['type'])
         data = {'response': response,
-                'message': created_box}
+                'message': ', '.join(created) if response else created}
         return JsonResponse(data)
     else:
         data = {'response': False,
@@ -843,13 +875,23 @@ def boxes_label(request):
                                                                            request.POST.get('version')))
         # log record
         manipulation = framework.TableManipulation(table=models.LabelLog)
-        manipulation.new_log(unique='label', label=filename.split('/')[3], user=request.user.username,
+        manipulation.new_log(unique='label', label='{}_v-{}.pdf'.format(request.POST.get('unique'),
+                                                                        request.POST.get('version')),
+                             user=request.user.username,
                              action='print attempt', timestamp=timezone.now())
     data = {'response': response,
             'pdf': filename}
     return JsonResponse(data)
 
 
+@require_POST
+@login_required
+@decorators.permission('bo_l')
+@decorators.require_ajax
+def boxes_labels(request):
+    return print_labels(request, table=models.Boxes, label='box')
+
+
 ###################
 # TYPE ATTRIBUTES #
 ###################
@@ -1093,7 +1135,6 @@ def samples_new(request):
                                                    table_audit_trail=models.SamplesAuditTrail)
         for x in range(form.cleaned_data['amount']):
             response, message = manipulation.new_identifier_at(user=request.user.username, prefix='S',
-                                                               sample='S {}'.format(str(timezone.now())),
                                                                name=form.cleaned_data['name'],
                                                                account=form.cleaned_data['account'])
         data = {'response': response,
@@ -1212,28 +1253,15 @@ def reagents_audit_trail(request, reagent):
 def reagents_new(request, reagent):
     form = forms.ReagentsFormNew(request.POST, request=request, type=reagent)
     if form.is_valid():
-        manipulation = framework.TableManipulation(table=models.Reagents,
-                                                   table_audit_trail=models.ReagentsAuditTrail)
-        response, message = manipulation.new_identifier_at(user=request.user.username, prefix='R',
-                                                           reagent='R {}'.format(str(timezone.now())),
-                                                           name=form.cleaned_data['name'],
-                                                           type=reagent)
-        if response:
-            manipulation_dynamic = framework.TableManipulation(table=models.DynamicReagents,
-                                                               table_audit_trail=models.DynamicReagentsAuditTrail)
-            _success_list = list()
-            for field in models.TypeAttributes.objects.columns_as_list(type=reagent):
-                response, message = manipulation_dynamic.new_dynamic_at(user=request.user.username,
-                                                                        identifier=manipulation.unique_value,
-                                                                        main_version=manipulation.version,
-                                                                        timestamp=manipulation.timestamp,
-                                                                        id_main=manipulation.id,
-                                                                        type_attribute=field,
-                                                                        value=request.POST.get(field))
-                _success_list.append(response)
-            response = custom.check_equal(_success_list)
+        values = {column: request.POST.get(column)
+                  for column in models.TypeAttributes.objects.columns_as_list(type=reagent)}
+        response, created = framework.new_reagents(user=request.user.username,
+                                                   amount=form.cleaned_data['amount'] or 1,
+                                                   type=reagent,
+                                                   name=form.cleaned_data['name'],
+                                                   values=values)
         data = {'response': response,
-                'message': message}
+                'message': ', '.join(created) if response else created}
         return JsonResponse(data)
     else:
         data = {'response': False,
@@ -1258,17 +1286,14 @@ def reagents_edit(request, reagent):
         if response:
             manipulation_dynamic = framework.TableManipulation(table=models.DynamicReagents,
                                                                table_audit_trail=models.DynamicReagentsAuditTrail)
-            _success_list = list()
-            for field in models.TypeAttributes.objects.columns_as_list(type=reagent):
-                response, message = manipulation_dynamic.edit_dynamic_at(user=request.user.username,
-                                                                         identifier=manipulation.unique_value,
-                                                                         main_version=manipulation.version,
-                                                                         timestamp=manipulation.timestamp,
-                                                                         id_main=manipulation.id,
-                                                                         type_attribute=field,
-                                                                         value=request.POST.get(field))
-                _success_list.append(response)
-            response = custom.check_equal(_success_list)
+            values = {column: request.POST.get(column)
+                      for column in models.TypeAttributes.objects.columns_as_list(type=reagent)}
+            response, message = manipulation_dynamic.edit_dynamic_bulk(user=request.user.username,
+                                                                       identifier=manipulation.unique_value,
+                                                                       id_main=manipulation.id,
+                                                                       main_version=manipulation.version,
+                                                                       timestamp=manipulation.timestamp,
+                                                                       values=values)
         data = {'response': response,
                 'message': message}
         return JsonResponse(data)
@@ -1325,13 +1350,23 @@ def reagents_label(request):
                                                                            request.POST.get('version')))
         # log record
         manipulation = framework.TableManipulation(table=models.LabelLog)
-        manipulation.new_log(unique='label', label=filename.split('/')[3], user=request.user.username,
+        manipulation.new_log(unique='label', label='{}_v-{}.pdf'.format(request.POST.get('unique'),
+                                                                        request.POST.get('version')),
+                             user=request.user.username,
                              action='print attempt', timestamp=timezone.now())
     data = {'response': response,
             'pdf': filename}
     return JsonResponse(data)
 
 
+@require_POST
+@login_required
+@decorators.permission('re_l')
+@decorators.require_ajax
+def reagents_labels(request):
+    return print_labels(request, table=models.Reagents, label='reagent')
+
+
 ############
 # ACCOUNTS #
 ############
@@ -1457,9 +1492,9 @@ def movement_log(request):
                'user': request.user.username,
                'perm': request.user.permissions,
                'header': get_log.html_header,
-               'query': get_log.get(),
-               'reagents': models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True),
-               'samples': models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)}
+               'reagents': models.Types.objects.types(affiliation='Reagents'),
+               'samples': models.Types.objects.types(affiliation='Samples')}
+    context = framework.first_page(context=context, get_standard=get_log)
     return render(request, 'lab/index.html', context)
 
 
@@ -1475,12 +1510,25 @@ def login_log(request):
                'user': request.user.username,
                'perm': request.user.permissions,
                'header': get_log.html_header,
-               'query': get_log.get(),
-               'reagents': models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True),
-               'samples': models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)}
+               'reagents': models.Types.objects.types(affiliation='Reagents'),
+               'samples': models.Types.objects.types(affiliation='Samples')}
+    context = framework.first_page(context=context, get_standard=get_log)
     return render(request, 'lab/index.html', context)
 
 
+@require_GET
+@login_required
+def label_pdf(request, key):
+    # labels are addressed by the hash of their content, the PDF is sent from the label store
+    data = label_store.store().get(key)
+    if data is None:
+        # unused labels are evicted, their records have to be printed again
+        return HttpResponseNotFound('Label is no longer stored, please print the labels again.')
+    response = HttpResponse(data, content_type='application/pdf')
+    response['Content-Disposition'] = 'inline; filename="label.pdf"'
+    return response
+
+
 @require_GET
 @login_required
 @decorators.permission('log_la')
@@ -1493,9 +1541,9 @@ def label_log(request):
                'user': request.user.username,
                'perm': request.user.permissions,
                'header': get_log.html_header,
-               'query': get_log.get(),
-               'reagents': models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True),
-               'samples': models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)}
+               'reagents': models.Types.objects.types(affiliation='Reagents'),
+               'samples': models.Types.objects.types(affiliation='Samples')}
+    context = framework.first_page(context=context, get_standard=get_log)
     return render(request, 'lab/index.html', context)
 
 
@@ -1511,9 +1559,9 @@ def boxing_log(request):
                'user': request.user.username,
                'perm': request.user.permissions,
                'header': get_log.html_header,
-               'query': get_log.get(),
-               'reagents': models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True),
-               'samples': models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)}
+               'reagents': models.Types.objects.types(affiliation='Reagents'),
+               'samples': models.Types.objects.types(affiliation='Samples')}
+    context = framework.first_page(context=context, get_standard=get_log)
     return render(request, 'lab/index.html', context)
 
 
@@ -1521,6 +1569,7 @@ def boxing_log(request):
 @login_required
 @decorators.permission('overview')
 def overview(request):
+    get_view = framework.GetView(table=models.Overview)
     context = {'tables': True,
                'content': 'overview',
                'session': True,
@@ -1529,10 +1578,10 @@ def overview(request):
                'perm': request.user.permissions,
                'modal_overview_boxing': forms.OverviewBoxingForm(),
                'modal_movement': forms.MovementsForm(),
-               'header': framework.GetView(table=models.Overview).html_header,
-               'query': framework.GetView(table=models.Overview).get(),
-               'reagents': models.Types.objects.filter(affiliation='Reagents').values_list('type', flat=True),
-               'samples': models.Types.objects.filter(affiliation='Samples').values_list('type', flat=True)}
+               'header': get_view.html_header,
+               'reagents': models.Types.objects.types(affiliation='Reagents'),
+               'samples': models.Types.objects.types(affiliation='Samples')}
+    context = framework.first_page(context=context, get_standard=get_view)
     return render(request, 'lab/index.html', context)
 
 
@@ -1573,29 +1622,14 @@ def overview_movement(request):
 def overview_move(request):
     form = forms.MovementsForm(request.POST, request=request)
     if form.is_valid():
-        manipulation = framework.TableManipulation(table=models.MovementLog)
-        timestamp = timezone.now()
-        box = request.POST.get('unique')[:7]
-        response = manipulation.move(user=request.user.username,
-                                     obj=box,
-                                     method='manual',
-                                     initial_location=str(form.cleaned_data['actual_location'])[:7],
-                                     new_location=str(form.cleaned_data['new_location'])[:7],
-                                     timestamp=timestamp)
-
-        if response:
-            manipulation_more = framework.TableManipulation(table=models.MovementLog)
-            _success_list = list()
-            boxed_objects = models.Overview.objects.filter(box=box)
-            for obj in boxed_objects:
-                response = manipulation_more.move(user=request.user.username,
-                                                  obj=obj,
-                                                  method=box,
-                                                  initial_location=str(form.cleaned_data['actual_location'])[:7],
-                                                  new_location=str(form.cleaned_data['new_location'])[:7],
-                                                  timestamp=timestamp)
-                _success_list.append(response)
-            response = custom.check_equal(_success_list)
+        boxes = [request.POST.get('unique')[:7]] + form.cleaned_data['more_boxes']
+        response, message = framework.move_boxes(user=request.user.username, boxes=boxes,
+                                                 new_location=str(form.cleaned_data['new_location'])[:7])
+        if not response:
+            data = {'response': False,
+                    'form_id': 'id_form_movement',
+                    'errors': {'__all__': [message]}}
+            return JsonResponse(data)
         data = {'response': response}
         return JsonResponse(data)
     else:
@@ -1614,77 +1648,24 @@ def overview_locate(request):
     if affiliation == 'box':
         data = {'response': False}
         return JsonResponse(data)
-    _type = models.Overview.objects.type(unique=request.GET.get('unique'))
-    box_count = models.Boxes.objects.count_box_by_type(type=_type)
-    count_mixed = models.Boxes.objects.count_box_by_type(type='')
-    if box_count == 0 and count_mixed == 0:
+    unique = request.GET.get('unique')
+    # hold the proposed position, an open proposal for the object is proposed again
+    held = models.Reservations.objects.held(object=unique)
+    if not held:
+        held = models.Reservations.objects.reserve(type=models.Overview.objects.type(unique=unique), object=unique,
+                                                   user=request.user.username)
+    if not held:
         data = {'response': True,
                 'location': '---',
                 'box': '---',
                 'position': '---'}
         return JsonResponse(data)
-    else:
-        # if dedicated boxes exist first check them
-        if box_count > 0:
-            # check dedicated boxes
-            for x in range(box_count):
-                box = models.Boxes.objects.box_by_type(type=_type, count=x)
-                position = models.Boxing.objects.next_position(box=box[:7])
-                location = models.Overview.objects.location(unique=box[:7])
-                if not location:
-                    location = '---'
-                if position:
-                    data = {'response': True,
-                            'location': location,
-                            'box': box,
-                            'position': position}
-                    return JsonResponse(data)
-            # if no return happened, check if mixes boxes exist
-            if count_mixed > 0:
-                for x in range(count_mixed):
-                    box = models.Boxes.objects.box_by_type(type='', count=x)
-                    position = models.Boxing.objects.next_position(box=box[:7])
-                    location = models.Overview.objects.location(unique=box[:7])
-                    if not location:
-                        location = '---'
-                    if position:
-                        data = {'response': True,
-                                'location': location,
-                                'box': box,
-                                'position': position}
-                        return JsonResponse(data)
-                # no position in mixed boxes return nothing
-                data = {'response': True,
-                        'location': '---',
-                        'box': '---',
-                        'position': '---'}
-                return JsonResponse(data)
-            # return nothing if no mixed boxes available
-            else:
-                data = {'response': True,
-                        'location': '---',
-                        'box': '---',
-                        'position': '---'}
-                return JsonResponse(data)
-        if count_mixed > 0:
-            for x in range(count_mixed):
-                box = models.Boxes.objects.box_by_type(type='', count=x)
-                position = models.Boxing.objects.next_position(box=box[:7])
-                location = models.Overview.objects.location(unique=box[:7])
-                if not location:
-                    location = '---'
-                if position:
-                    data = {'response': True,
-                            'location': location,
-                            'box': box,
-                            'position': position}
-                    return JsonResponse(data)
-            # no position in mixed boxes return nothing
-            data = {'response': True,
-                    'location': '---',
-                    'box': '---',
-                    'position': '---'}
-            return JsonResponse(data)
+    reservation = held[0]
+    data = {'response': True,
+            'location': models.Overview.objects.location(unique=reservation.box) or '---',
+            'box': models.Boxes.objects.filter(box=reservation.box)[0].__str__(),
+            'position': reservation.position}
+    return JsonResponse(data)
 
 
 @require_POST
@@ -1754,7 +1735,78 @@ def export_reagents(request, reagent, dialog):
     return response
 
 
-""""@require_POST
+@require_GET
+@login_required
+@decorators.export_permission
+@decorators.require_ajax
+def data(request, dialog, reagent=None):
+    get_standard = framework.get_dialog(dialog=dialog, reagent=reagent, dt=request.session.get('offset'))
+    try:
+        cursor = json.loads(request.GET.get('cursor', 'null'))
+    except ValueError:
+        return HttpResponseBadRequest()
+    rows, cursor = get_standard.page(cursor=cursor,
+                                     sort=request.GET.get('sort'),
+                                     descending=request.GET.get('order', 'desc') == 'desc',
+                                     search=request.GET.get('search'))
+    data = {'response': True,
+            'rows': rows,
+            'cursor': cursor}
+    return JsonResponse(data)
+
+
+@require_GET
+@login_required
+@decorators.require_ajax
+def search(request):
+    term = request.GET.get('term', '').strip()
+    # only dialogs the user is allowed to read
+    dialogs = [dialog for dialog in models.SEARCH_TABLES.values()
+               if request.user.permission(models.EXPORT_PERMISSIONS[dialog])]
+    results = list()
+    if len(term) >= 2 and dialogs:
+        results = models.Search.objects.find(term=term, dialogs=dialogs)
+    for result in results:
+        if result['dialog'] == 'reagents':
+            url = reverse('reagents', kwargs={'reagent': result['type']})
+        else:
+            url = reverse(result['dialog'])
+        result['url'] = '{}?{}'.format(url, urlencode({'search': result['object']}))
+    data = {'response': True,
+            'results': results}
+    return JsonResponse(data)
+
+
+@require_POST
+@login_required
+@decorators.import_permission
+@decorators.require_ajax
+def import_data(request, dialog, reagent=None):
+    upload = request.FILES.get('file')
+    if upload is None:
+        data = {'response': False,
+                'message': 'No file has been uploaded.'}
+        return JsonResponse(data)
+    kwargs = {'type': reagent} if dialog == 'reagents' else dict()
+    try:
+        _import = imports.IMPORTS[dialog](user=request.user.username, token=request.POST.get('token'), **kwargs)
+    except ValueError as error:
+        data = {'response': False,
+                'message': str(error)}
+        return JsonResponse(data)
+    # the upload is read line by line
+    response, message = _import.run(stream=io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    data = {'response': response,
+            'message': message,
+            'errors': _import.errors}
+    return JsonResponse(data)
+
+
+@require_GET
 @login_required
-def import_data(request, dialog):
-    pass"""
+@decorators.require_ajax
+def import_progress(request, token):
+    progress = imports.progress(user=request.user.username, token=token)
+    data = {'response': progress is not None,
+            'progress': progress}
+    return JsonResponse(data)
@@ -0,0 +1,17 @@
+-- Reagent attributes as jsonb (lab.models.ReagentAttributes), derived from lab_dynamicreagents.
+-- Executed by "manage.py migrate_attributes" in one transaction, safe to run repeatedly.
+
+-- containment lookups like attributes @> '{"clone": "X"}'
+CREATE INDEX IF NOT EXISTS reagent_attributes_gin ON reagent_attributes USING gin (attributes jsonb_path_ops);
+
+
+DELETE FROM reagent_attributes;
+
+
+INSERT INTO reagent_attributes (id_main, attributes, rows)
+	SELECT
+		d.id_main,
+		jsonb_object_agg(d.type_attribute, d.value ORDER BY d.id),
+		jsonb_object_agg(d.type_attribute, jsonb_build_array(d.id, d.checksum) ORDER BY d.id)
+	FROM lab_dynamicreagents d
+	GROUP BY d.id_main;
@@ -0,0 +1,14 @@
+-- Re-derive the free positions per box from boxes and boxing.
+-- Executed by "manage.py rebuild_free_positions" in one transaction.
+
+DELETE FROM lab_freepositions;
+
+
+INSERT INTO lab_freepositions (box, type, free)
+	SELECT
+		b.box,
+		b.type,
+		count(x.id) FILTER (WHERE x.object = '')
+	FROM lab_boxes b
+	LEFT JOIN lab_boxing x ON x.box = b.box
+	GROUP BY b.box, b.type;
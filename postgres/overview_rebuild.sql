@@ -0,0 +1,42 @@
+-- Re-derive the overview table from master data, movement log and boxing.
+-- Executed by "manage.py rebuild_overview" in one transaction.
+
+DELETE FROM overview;
+
+
+INSERT INTO overview (object, affiliation, type, location, box, position)
+	WITH objects AS (
+		SELECT
+			b.box AS object,
+			'box' AS affiliation,
+			b.type AS type
+		FROM lab_boxes b
+	UNION ALL
+		SELECT
+			r.reagent AS object,
+			'reagent' AS affiliation,
+			r.type AS type
+		FROM lab_reagents r
+	), locations AS (
+		SELECT DISTINCT ON (l.object)
+			l.object,
+			l.new_location AS location
+		FROM lab_movementlog l
+		ORDER BY l.object, l."timestamp" DESC, l.id DESC
+	)
+	SELECT
+		o.object,
+		o.affiliation,
+		o.type,
+		-- boxed objects are located where their box is
+		COALESCE(box_location.location, own_location.location) AS location,
+		b.box,
+		b.position
+	FROM
+		objects o
+	LEFT JOIN
+		lab_boxing b ON b.object::text = o.object::text
+	LEFT JOIN
+		locations box_location ON box_location.object::text = b.box::text
+	LEFT JOIN
+		locations own_location ON own_location.object::text = o.object::text;
@@ -0,0 +1,16 @@
+-- Indexes of the search table (lab.models.Search).
+-- Executed by "manage.py rebuild_search", safe to run repeatedly.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+
+-- prefix match on identifiers like R000123
+CREATE INDEX IF NOT EXISTS search_object_prefix ON search (upper(object) text_pattern_ops);
+
+
+-- similarity match on identifiers, names and attribute values
+CREATE INDEX IF NOT EXISTS search_text_trgm ON search USING gin (text gin_trgm_ops);
+
+
+-- full text match on whole words
+CREATE INDEX IF NOT EXISTS search_text_tsv ON search USING gin (to_tsvector('simple', text));
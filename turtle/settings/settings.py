@@ -218,6 +218,11 @@ SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# seconds role permissions are cached, editing or deleting a role invalidates them
+PERMISSIONS_CACHE_TIMEOUT = custom.value_to_int(os.environ.get('PERMISSIONS_CACHE_TIMEOUT', 300))
+# seconds box type layouts are cached, editing or deleting a box type invalidates them
+LAYOUT_CACHE_TIMEOUT = custom.value_to_int(os.environ.get('LAYOUT_CACHE_TIMEOUT', 300))
+
 ############
 # DATABASE #
 ############
@@ -265,6 +270,61 @@ if os.environ.get('SECURE_PROXY_SSL_HEADER', 0):
 # security settings of type string
 X_FRAME_OPTIONS = os.environ.get('X_FRAME_OPTIONS', 'SAMEORIGIN')
 
+##########
+# TABLES #
+##########
+
+# rows per page of table dialogs
+PAGE_SIZE = custom.value_to_int(os.environ.get('PAGE_SIZE', 100))
+# main records per chunk of dynamic reagent exports, the dynamic records are queried per chunk
+EXPORT_CHUNK_SIZE = custom.value_to_int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+# rows per chunk of csv imports, validated and written together
+IMPORT_CHUNK_SIZE = custom.value_to_int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+
+##########
+# BOXING #
+##########
+
+# seconds a proposed box position is held for the proposed object
+RESERVATION_TIMEOUT = custom.value_to_int(os.environ.get('RESERVATION_TIMEOUT', 300))
+
+
+##############
+# ATTRIBUTES #
+##############
+
+# storage of reagent attributes for reading and filtering ("eav" / "jsonb"), dynamic records stay the signed
+# source, "jsonb" requires "manage.py migrate_attributes" before enabling
+ATTRIBUTE_STORAGE = os.environ.get('ATTRIBUTE_STORAGE', 'eav')
+
+
+##########
+# LABELS #
+##########
+
+# directory of the label store, labels are stored by the hash of their render parameters
+LABEL_STORE_DIR = os.environ.get('LABEL_STORE_DIR', MEDIA_ROOT)
+# MB of labels kept on disk, least recently used labels are evicted first
+LABEL_STORE_SIZE = custom.value_to_int(os.environ.get('LABEL_STORE_SIZE', 512))
+# seconds an unused label is kept on disk
+LABEL_STORE_AGE = custom.value_to_int(os.environ.get('LABEL_STORE_AGE', 2592000))
+# MB of labels kept in memory per process
+LABEL_STORE_MEMORY = custom.value_to_int(os.environ.get('LABEL_STORE_MEMORY', 32))
+
+
+#############
+# CHECKSUMS #
+#############
+
+# algorithm for new checksums ("argon2" / "hmac-sha256"), existing checksums verify with their own algorithm
+CHECKSUM_ALGORITHM = os.environ.get('CHECKSUM_ALGORITHM', 'argon2')
+# verification engine ("serial" / "process") and number of worker processes (0 for cpu count)
+CHECKSUM_ENGINE = os.environ.get('CHECKSUM_ENGINE', 'serial')
+CHECKSUM_WORKERS = custom.value_to_int(os.environ.get('CHECKSUM_WORKERS', 0))
+# seconds a successful verification is cached
+CHECKSUM_CACHE_TIMEOUT = custom.value_to_int(os.environ.get('CHECKSUM_CACHE_TIMEOUT', 86400))
+
 ###########
 # LOGGING #
 ###########